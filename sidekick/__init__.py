@@ -0,0 +1 @@
+"""Shared services behind the Sidekick Streamlit app."""
@@ -0,0 +1,267 @@
+"""
+Headless HTTP API for the tools, for integrations such as the LMS and
+nightly jobs that shouldn't need a Streamlit session per request.
+
+Each teacher tool module exposes generate(**params), returning the same
+(text, export sections) as its page but without any Streamlit calls, and
+this serves them over HTTP:
+
+    GET  /tools            every tool id with its parameters, defaults and number bounds
+    POST /tools/{tool}     {"params": {...}, "exports": ["docx", "pdf"]}
+    POST /batch            {"requests": [{"tool": ..., "params": {...}, "exports": [...]}, ...]}
+    POST /jobs             {"tool": ..., "params": {...}, "title": ...} -> {"id", "status"}
+    GET  /jobs/{id}        {"id", "tool", "status", "error"}, plus "text" once done
+
+A generation replies {"tool", "text", "exports": {kind: base64 bytes}}. A
+batch runs all of its requests at once and replies with their results in
+order, each either a generation or {"tool", "error"}, so one bad request
+doesn't fail the rest. Generations run on a bounded thread pool, and their
+API calls queue in the shared scheduler under the caller's address, so a
+large batch takes its fair share rather than crowding out teachers using
+the app. A job runs on the background job workers (see sidekick.jobs)
+instead, for generations too long to hold a connection open; submitting
+one identical to a job still in flight returns that job's id. When
+SIDEKICK_API_KEY is set, requests need the header "Authorization: Bearer
+<key>". Without it the API only listens on this machine. Run it with
+
+    SIDEKICK_API_KEY=... python -m sidekick.api --host 0.0.0.0 --port 8000
+"""
+import argparse
+import asyncio
+import base64
+import hmac
+import inspect
+import ipaddress
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from sidekick.exports import RENDERERS, export_bytes
+from sidekick.jobs import DONE, ensure_workers, get_job_queue
+from sidekick.llm import CompletionError, current_session
+from sidekick.telemetry import current_tool
+from sidekick.tools import headless_tools
+
+API_KEY = os.environ.get("SIDEKICK_API_KEY")
+# Generations (each one or more API calls plus its exports) running at once across all requests
+API_CONCURRENCY = int(os.environ.get("SIDEKICK_API_CONCURRENCY", "16"))
+API_MAX_BATCH = int(os.environ.get("SIDEKICK_API_MAX_BATCH", "100"))
+
+log = logging.getLogger("sidekick.api")
+
+_executor = ThreadPoolExecutor(max_workers=API_CONCURRENCY, thread_name_prefix="api")
+
+
+def tool_parameters(generate):
+    """{name: default, or None when required} of a tool's generate()."""
+    return {
+        name: None if parameter.default is inspect.Parameter.empty else parameter.default
+        for name, parameter in inspect.signature(generate).parameters.items()
+    }
+
+
+# Default type -> the JSON types accepted for the parameter
+PARAM_TYPES = {bool: bool, int: int, float: (int, float), str: str, tuple: (list, tuple), list: (list, tuple)}
+PARAM_TYPE_NAMES = {bool: "true or false", int: "a whole number", (int, float): "a number", str: "text",
+                    (list, tuple): "a list"}
+
+
+def param_type(default):
+    """The types accepted for a parameter with this default, or None if it has none to go by."""
+    if default is inspect.Parameter.empty or default is None:
+        return None
+    return PARAM_TYPES.get(type(default))
+
+
+def param_bounds(module):
+    """{name: (min, max)} of a tool's numeric parameters, the same limits as its page's widgets."""
+    return getattr(module, "PARAM_BOUNDS", {})
+
+
+def check_request(item):
+    """(tool id, params, exports) of one generation request, or ValueError saying what is wrong with it."""
+    if not isinstance(item, dict):
+        raise ValueError("Each request must be a JSON object.")
+    tool = item.get("tool")
+    if tool not in headless_tools():
+        raise ValueError(f"Unknown tool {tool!r}; see GET /tools.")
+    params = item.get("params") or {}
+    exports = item.get("exports") or []
+    if not isinstance(params, dict):
+        raise ValueError("params must be a JSON object.")
+    if not isinstance(exports, list) or any(kind not in RENDERERS for kind in exports):
+        raise ValueError(f"exports must be a list of {', '.join(RENDERERS)}.")
+    module = headless_tools()[tool][1]
+    signature = inspect.signature(module.generate)
+    try:
+        signature.bind(**params)
+    except TypeError as error:
+        raise ValueError(f"Bad params for {tool}: {error}") from error
+    for name, value in params.items():
+        expected = param_type(signature.parameters[name].default)
+        # bool is an int in Python, but not a number of questions
+        if expected is not None and (not isinstance(value, expected) or (expected is not bool and isinstance(value, bool))):
+            raise ValueError(f"Bad params for {tool}: {name} must be {PARAM_TYPE_NAMES[expected]}.")
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            # No tool takes a negative count or length
+            low, high = param_bounds(module).get(name, (0, None))
+            if value < low or (high is not None and value > high):
+                limits = f"at least {low}" if high is None else f"between {low} and {high}"
+                raise ValueError(f"Bad params for {tool}: {name} must be {limits}.")
+    return tool, params, exports
+
+
+def run_generation(tool, params, exports, session_id):
+    """Generate and render the exports asked for, on a pool thread; returns the JSON reply."""
+    # Pool threads don't see the request's context, so calls here queue under the caller
+    current_session.set(session_id)
+    name, module = headless_tools()[tool]
+    current_tool.set(name)
+    text, sections = module.generate(**params)
+    return {
+        "tool": tool,
+        "text": text,
+        "exports": {kind: base64.b64encode(export_bytes(kind, sections)).decode("ascii") for kind in exports},
+    }
+
+
+async def generate(item, session_id):
+    tool, params, exports = check_request(item)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, run_generation, tool, params, exports, session_id)
+
+
+def _authorised(request):
+    if not API_KEY:
+        return True
+    scheme, _, key = request.headers.get("authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(key.strip(), API_KEY)
+
+
+def _session_id(request):
+    return f"api:{request.client.host if request.client else 'local'}"
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _error(status, message):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def list_tools(request):
+    if not _authorised(request):
+        return _error(401, "Missing or wrong API key.")
+    return JSONResponse({
+        tool: {"name": name, "params": tool_parameters(module.generate), "bounds": param_bounds(module)}
+        for tool, (name, module) in headless_tools().items()
+    })
+
+
+async def generate_one(request):
+    if not _authorised(request):
+        return _error(401, "Missing or wrong API key.")
+    body = await _json_body(request)
+    if not isinstance(body, dict):
+        return _error(400, "The body must be a JSON object.")
+    try:
+        return JSONResponse(await generate({**body, "tool": request.path_params["tool"]}, _session_id(request)))
+    except ValueError as error:
+        return _error(400, str(error))
+    except CompletionError as error:
+        return _error(502, str(error))
+
+
+async def _batch_item(item, session_id):
+    tool = item.get("tool") if isinstance(item, dict) else None
+    try:
+        return await generate(item, session_id)
+    except (ValueError, CompletionError) as error:
+        return {"tool": tool, "error": str(error)}
+    except Exception:
+        # Whatever went wrong stays with this item rather than failing the batch
+        log.exception("batch item for %s failed", tool)
+        return {"tool": tool, "error": "Something went wrong while generating this request."}
+
+
+async def generate_batch(request):
+    if not _authorised(request):
+        return _error(401, "Missing or wrong API key.")
+    body = await _json_body(request)
+    items = body.get("requests") if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        return _error(400, 'The body must be a JSON object with a "requests" list.')
+    if len(items) > API_MAX_BATCH:
+        return _error(413, f"A batch can hold at most {API_MAX_BATCH} requests.")
+    session_id = _session_id(request)
+    results = await asyncio.gather(*(_batch_item(item, session_id) for item in items))
+    return JSONResponse({"results": results})
+
+
+async def submit_job(request):
+    if not _authorised(request):
+        return _error(401, "Missing or wrong API key.")
+    body = await _json_body(request)
+    try:
+        tool, params, _ = check_request(body)
+    except ValueError as error:
+        return _error(400, str(error))
+    title = body.get("title") or headless_tools()[tool][0]
+    job_id = await asyncio.to_thread(get_job_queue().submit, tool, params, _session_id(request), str(title))
+    return JSONResponse({"id": job_id, "status": get_job_queue().get(job_id).status}, status_code=202)
+
+
+async def job_status(request):
+    if not _authorised(request):
+        return _error(401, "Missing or wrong API key.")
+    job = await asyncio.to_thread(get_job_queue().get, request.path_params["job_id"])
+    if job is None:
+        return _error(404, "No such job.")
+    reply = {"id": job.id, "tool": job.tool, "status": job.status, "error": job.error}
+    if job.status == DONE:
+        reply["text"], _ = get_job_queue().result(job.id)
+    return JSONResponse(reply)
+
+
+app = Starlette(routes=[
+    Route("/tools", list_tools, methods=["GET"]),
+    Route("/tools/{tool}", generate_one, methods=["POST"]),
+    Route("/batch", generate_batch, methods=["POST"]),
+    Route("/jobs", submit_job, methods=["POST"]),
+    Route("/jobs/{job_id}", job_status, methods=["GET"]),
+])
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    args = parser.parse_args()
+    if not API_KEY and not is_loopback(args.host):
+        # Every route spends the OpenAI key, so it is never served open beyond this machine
+        parser.error(f"Set SIDEKICK_API_KEY before listening on {args.host}.")
+    ensure_workers()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Offline benchmark for the tool pages.
+
+Starts the fake OpenAI server (sidekick.fake_openai) in a subprocess, points
+the app at it and drives each tool's generation path headlessly through
+Streamlit's AppTest, one process per concurrent visitor, exports included.
+Every run uses a fresh topic so the response cache doesn't flatter the
+numbers. For each tool it reports throughput, latency percentiles, LLM calls
+per run and peak memory (RSS of a visitor's process), and it can save the
+results and fail on regressions against a saved baseline. Needs streamlit
+1.28+ for streamlit.testing.
+
+    python -m sidekick.bench --concurrency 8 --iterations 3 --latency lognormal:0.8,0.5 --rate-limit 0.05
+    python -m sidekick.bench --save bench.json
+    python -m sidekick.bench --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+
+
+def _widget(at, label):
+    """The input widget whose label starts with label."""
+    for widget in [*at.text_input, *at.text_area, *at.number_input, *at.checkbox]:
+        if widget.label.startswith(label):
+            return widget
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def lesson_builder(at, n):
+    _widget(at, "Grade Level").set_value("7")
+    _widget(at, "Subject").set_value("Science")
+    _widget(at, "Lesson Topic").set_value(f"Volcanoes {n}")
+    _widget(at, "Generate suggested resources").check()
+    return "Generate Lesson Plan"
+
+
+def cloze_worksheet(at, n):
+    _widget(at, "Grade Level").set_value("7")
+    _widget(at, "Enter a learning goal").set_value(f"Explain how volcanoes erupt ({n})")
+    _widget(at, "Make the passage a cloze activity").check()
+    return "Generate Worksheet"
+
+
+def test_creator(at, n):
+    _widget(at, "Grade Level").set_value("7")
+    _widget(at, "Subject").set_value("Science")
+    _widget(at, "Topic").set_value(f"Volcanoes {n}")
+    return "Generate Test"
+
+
+def unit_planner(at, n):
+    _widget(at, "Grade Level").set_value("7")
+    _widget(at, "Subject").set_value("Science")
+    _widget(at, "Unit Topic").set_value(f"Volcanoes {n}")
+    return "Generate Unit Plan"
+
+
+# Sidebar tool -> fills in the page for run n and returns the label of the button to press
+SCENARIOS = {
+    "Lesson Builder": lesson_builder,
+    "Worksheet Generator": cloze_worksheet,
+    "Test Creator": test_creator,
+    "Unit Planner": unit_planner,
+}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_session(tool, first_run, iterations, timeout):
+    """
+    Open the app as one visitor, select tool and generate iterations times
+    after one untimed warm-up run (which pays for the lazy imports). Runs in
+    its own process; returns the run times, the error count, the tool's LLM
+    calls, the process's peak RSS in bytes and the wall clock span of the
+    timed runs.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from sidekick.telemetry import get_telemetry
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.run()
+    at.sidebar.radio[0].set_value(tool).run()
+
+    def generate(n):
+        label = SCENARIOS[tool](at, n)
+        # Apply the inputs first, so only the generation itself is timed
+        at.run()
+        button = next(button for button in at.button if button.label == label)
+        start = time.monotonic()
+        button.click().run()
+        return time.monotonic() - start
+
+    generate(first_run)
+    calls_before = len([event for event in get_telemetry().events("llm") if event["tool"] == tool])
+    seconds, errors = [], 0
+    started = time.time()
+    for n in range(first_run + 1, first_run + 1 + iterations):
+        seconds.append(generate(n))
+        if at.exception or at.error:
+            errors += 1
+    span = (started, time.time())
+    calls = len([event for event in get_telemetry().events("llm") if event["tool"] == tool]) - calls_before
+    # ru_maxrss is in KB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return seconds, errors, calls, peak, span
+
+
+def bench_tool(tool, concurrency, iterations, timeout):
+    # AppTest swaps a process-wide Streamlit runtime in and out on every run,
+    # so concurrent visitors each get their own process
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=concurrency, mp_context=context) as pool:
+        futures = [
+            pool.submit(run_session, tool, session * (iterations + 1), iterations, timeout)
+            for session in range(concurrency)
+        ]
+        sessions = [future.result() for future in futures]
+    seconds = sorted(value for session in sessions for value in session[0])
+    runs = len(seconds)
+    elapsed = max(session[4][1] for session in sessions) - min(session[4][0] for session in sessions)
+    return {
+        "runs": runs,
+        "errors": sum(session[1] for session in sessions),
+        "runs_per_second": round(runs / elapsed, 3),
+        "p50": round(percentile(seconds, 0.5), 3),
+        "p95": round(percentile(seconds, 0.95), 3),
+        "p99": round(percentile(seconds, 0.99), 3),
+        "llm_calls_per_run": round(sum(session[2] for session in sessions) / runs, 2),
+        "peak_rss_mb": round(max(session[3] for session in sessions) / 1024 / 1024, 1),
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_server(args):
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "sidekick.fake_openai",
+            "--port", str(port),
+            "--latency", args.latency,
+            "--tokens-per-second", str(args.tokens_per_second),
+            "--rate-limit", str(args.rate_limit),
+            "--retry-after", str(args.retry_after),
+        ],
+        cwd=REPO_DIR,
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("The fake OpenAI server did not start")
+
+
+def regressions(results, baseline, tolerance):
+    """Human-readable list of metrics that got worse than baseline by more than tolerance."""
+    found = []
+    for tool, result in results.items():
+        base = baseline.get(tool)
+        if not base:
+            continue
+        for name in ("p95", "peak_rss_mb"):
+            if base[name] and result[name] > base[name] * (1 + tolerance):
+                found.append(f"{tool}: {name} {base[name]} -> {result[name]}")
+        if result["runs_per_second"] < base["runs_per_second"] * (1 - tolerance):
+            found.append(f"{tool}: runs_per_second {base['runs_per_second']} -> {result['runs_per_second']}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tool pages against a local fake OpenAI API.")
+    parser.add_argument("--tools", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=4, help="sessions generating at once")
+    parser.add_argument("--iterations", type=int, default=3, help="generations per session")
+    parser.add_argument("--latency", default="lognormal:0.8,0.5", help="fake API time to first token distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of fake API requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--timeout", type=float, default=180, help="seconds allowed for one page run")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression against the baseline")
+    args = parser.parse_args(argv)
+
+    server, base_url = start_fake_server(args)
+    # Set before any sidekick module reads them: a throwaway data folder keeps the real cache out of it
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": base_url,
+        "SIDEKICK_DATA_DIR": tempfile.mkdtemp(prefix="sidekick-bench-"),
+        # Visitors generate in the page; job workers would only add their own load on the fake API
+        "SIDEKICK_JOB_WORKERS": "0",
+    })
+    results = {}
+    try:
+        for tool in args.tools:
+            results[tool] = bench_tool(tool, args.concurrency, args.iterations, args.timeout)
+            print(f"{tool}: {json.dumps(results[tool])}", flush=True)
+    finally:
+        server.terminate()
+        server.wait()
+
+    columns = ["runs", "errors", "runs_per_second", "p50", "p95", "p99", "llm_calls_per_run", "peak_rss_mb"]
+    print()
+    print(f"{'tool':<22}" + "".join(f"{column:>18}" for column in columns))
+    for tool, result in results.items():
+        print(f"{tool:<22}" + "".join(f"{result[column]:>18}" for column in columns))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            found = regressions(results, json.load(file), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
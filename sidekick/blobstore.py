@@ -0,0 +1,206 @@
+"""
+Shared store for generated text and rendered export files.
+
+Sessions keep only content-hash references in st.session_state; the bytes
+live here once per process, zlib-compressed, however many sessions refer to
+them. Memory is capped: past the budget the least recently used blobs, and
+blobs only referenced by sessions that have gone idle, are spilled to files
+in the data folder, so a reference a session holds stays valid. Spilled
+files that go unread for the TTL are deleted.
+"""
+import collections
+import hashlib
+import os
+import threading
+import time
+import zlib
+
+from sidekick.settings import data_path
+
+BLOB_MEMORY_BYTES = int(float(os.environ.get("SIDEKICK_BLOB_MEMORY_MB", "64")) * 1024 * 1024)
+BLOB_TTL_SECONDS = int(os.environ.get("SIDEKICK_BLOB_TTL", str(24 * 3600)))
+# Sessions with no rerun for this long have their blobs moved out of memory
+SESSION_IDLE_SECONDS = int(os.environ.get("SIDEKICK_SESSION_IDLE", "900"))
+COMPACT_INTERVAL_SECONDS = 60
+
+
+def content_key(data):
+    """Content hash of bytes or text."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """Compressed, LRU-spilled blob store with per-session references."""
+
+    def __init__(self, directory=None, max_bytes=BLOB_MEMORY_BYTES, ttl=BLOB_TTL_SECONDS,
+                 idle_seconds=SESSION_IDLE_SECONDS):
+        self.directory = directory or data_path("blobs")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # key -> (compressed?, stored bytes, raw size), least recently used first
+        self._memory = collections.OrderedDict()
+        self._memory_bytes = 0
+        # session id -> [last seen, keys it references]
+        self._sessions = {}
+        self._last_compact = time.monotonic()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.blob")
+
+    def put(self, data, key=None, session_id=None):
+        """Store bytes or text and return its key (the content hash unless given)."""
+        raw = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        key = key or content_key(raw)
+        packed = zlib.compress(raw, 6)
+        # Already-compressed formats (DOCX, PPTX are zips) are kept as they are
+        entry = (True, packed, len(raw)) if len(packed) < len(raw) else (False, raw, len(raw))
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+            else:
+                self._memory[key] = entry
+                self._memory_bytes += len(entry[1])
+            if session_id is not None:
+                self._hold(session_id, key)
+            self._evict()
+        self._maybe_compact()
+        return key
+
+    def get(self, key):
+        """The bytes stored under key, from memory or a spilled file, or None if gone."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+        if entry is None:
+            entry = self._load(key)
+            if entry is None:
+                return None
+            with self._lock:
+                if key not in self._memory:
+                    self._memory[key] = entry
+                    self._memory_bytes += len(entry[1])
+                self._evict()
+        compressed, stored, _ = entry
+        return zlib.decompress(stored) if compressed else stored
+
+    def get_text(self, key):
+        data = self.get(key)
+        return None if data is None else data.decode("utf-8")
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._memory:
+                return True
+        return os.path.exists(self._path(key))
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                compressed = file.read(1) == b"z"
+                stored = file.read()
+            # Reading a spilled blob keeps it from being swept
+            os.utime(path)
+        except OSError:
+            return None
+        raw_size = len(zlib.decompress(stored)) if compressed else len(stored)
+        return compressed, stored, raw_size
+
+    def _spill(self, key):
+        # Caller holds the lock
+        compressed, stored, _ = self._memory.pop(key)
+        self._memory_bytes -= len(stored)
+        path = self._path(key)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as file:
+                file.write(b"z" if compressed else b"r")
+                file.write(stored)
+            os.replace(tmp, path)
+
+    def _evict(self):
+        # Caller holds the lock
+        while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+            self._spill(next(iter(self._memory)))
+
+    def _hold(self, session_id, key):
+        session = self._sessions.setdefault(session_id, [time.monotonic(), set()])
+        session[0] = time.monotonic()
+        session[1].add(key)
+
+    def touch(self, session_id):
+        """Mark a session active (e.g. on every rerun)."""
+        with self._lock:
+            self._sessions.setdefault(session_id, [time.monotonic(), set()])[0] = time.monotonic()
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if time.monotonic() - self._last_compact >= COMPACT_INTERVAL_SECONDS:
+            self.compact()
+
+    def compact(self):
+        """
+        Spill blobs that only idle sessions refer to, forget sessions idle past
+        the TTL, and delete spilled files nobody has read within the TTL.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._last_compact = now
+            for session_id, (last_seen, _) in list(self._sessions.items()):
+                if now - last_seen > self.ttl:
+                    del self._sessions[session_id]
+            active = set()
+            idle = set()
+            for last_seen, keys in self._sessions.values():
+                (idle if now - last_seen > self.idle_seconds else active).update(keys)
+            for key in idle - active:
+                if key in self._memory:
+                    self._spill(key)
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        """Gauge of what the store holds: memory (compressed and raw), spilled files and sessions."""
+        with self._lock:
+            raw = sum(entry[2] for entry in self._memory.values())
+            stats = {
+                "entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "raw_bytes": raw,
+                "sessions": len(self._sessions),
+            }
+        spilled = 0
+        names = [name for name in os.listdir(self.directory) if name.endswith(".blob")]
+        for name in names:
+            try:
+                spilled += os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        stats["spilled_entries"] = len(names)
+        stats["spilled_bytes"] = spilled
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Process-wide BlobStore shared by every session."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
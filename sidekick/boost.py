@@ -0,0 +1,91 @@
+"""
+Background pool of pre-generated teacher boost messages.
+
+Sessions pop a ready-made message instead of waiting on the API to draw the
+sidebar. When the pool drops below its low watermark a single background
+thread tops it back up, and the pool is shared by every session in the
+process.
+"""
+import collections
+import os
+import threading
+
+from sidekick.llm import chat_completion_request
+from sidekick.scheduler import BACKGROUND
+
+BOOST_POOL_SIZE = int(os.environ.get("SIDEKICK_BOOST_POOL_SIZE", "8"))
+BOOST_LOW_WATERMARK = int(os.environ.get("SIDEKICK_BOOST_LOW_WATERMARK", "3"))
+
+
+class BoostPool:
+    """Thread-safe queue of boost messages refilled by a background thread."""
+
+    def __init__(self, generate, size=BOOST_POOL_SIZE, low_watermark=BOOST_LOW_WATERMARK):
+        self._generate = generate
+        self.size = size
+        self.low_watermark = low_watermark
+        self._messages = collections.deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._messages)
+
+    def pop(self):
+        """Return a boost message straight away, or None while the pool is still filling."""
+        with self._lock:
+            message = self._messages.popleft() if self._messages else None
+            start_refill = len(self._messages) < self.low_watermark and not self._refilling
+            if start_refill:
+                self._refilling = True
+        if start_refill:
+            threading.Thread(target=self._refill, name="teacher-boost-refill", daemon=True).start()
+        return message
+
+    def _refill(self):
+        try:
+            # Bounded so a run of empty replies can't call the API in a tight loop
+            for _ in range(self.size * 2):
+                if len(self) >= self.size:
+                    return
+                try:
+                    message = self._generate()
+                except Exception:
+                    # Leave the pool short; the next pop() will try again
+                    return
+                if message:
+                    with self._lock:
+                        self._messages.append(message)
+        finally:
+            with self._lock:
+                self._refilling = False
+
+
+def generate_teacher_boost():
+    boost_prompt = (
+        "Generate an uplifting teacher boost message that is either funny, sarcastic, "
+        "or a random quirky fact. Please ensure your answer is 40 tokens or less. "
+        "Don't use words like hell or other possible offensive terms. You must not use hell or other offensive words."
+    )
+    return chat_completion_request(
+        system_msg="You are a creative teacher boost generator.",
+        user_msg=boost_prompt,
+        max_tokens=40,
+        temperature=0.9,
+        tool="Teacher Boost",
+        priority=BACKGROUND
+    )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_boost_pool():
+    """Process-wide BoostPool of teacher boosts, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BoostPool(generate_teacher_boost)
+        return _pool
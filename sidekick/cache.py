@@ -0,0 +1,129 @@
+"""
+Persistent response cache for chat completions.
+
+Entries are keyed on a hash of the request (model, system message, user
+message, max_tokens, temperature) and stored in a local SQLite file, so every
+session and every Streamlit process on the instance shares them. Entries
+expire after a TTL and the least recently used ones are evicted once the
+stored text passes a size budget.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from sidekick.settings import data_path
+
+CACHE_TTL_SECONDS = int(os.environ.get("SIDEKICK_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_BYTES = int(float(os.environ.get("SIDEKICK_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+
+def cache_key(model, system_msg, user_msg, max_tokens, temperature, response_format=None):
+    """Content hash identifying one completion request."""
+    fields = [model, system_msg, user_msg, max_tokens, temperature]
+    if response_format is not None:
+        # Only appended when set, so plain-text requests keep their existing keys
+        fields.append(response_format)
+    payload = json.dumps(fields, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed completion cache with TTL expiry and LRU eviction."""
+
+    def __init__(self, path=None, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES):
+        self.path = path or data_path("responses.sqlite3")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # Counters for this process; stats() also reports the shared totals
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, conn, name):
+        conn.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (name,))
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count(conn, "misses")
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._count(conn, "hits")
+            return row[0]
+
+    def put(self, key, value):
+        """Store value under key, then evict expired and least recently used entries."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                stale = []
+                for old_key, old_size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((old_key,))
+                    total -= old_size
+                conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self):
+        """Hit/miss counters for this process and for all processes, plus cache size."""
+        with self._connect() as conn:
+            shared = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_hits": shared.get("hits", 0),
+            "shared_misses": shared.get("misses", 0),
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide ResponseCache, created on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
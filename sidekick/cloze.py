@@ -0,0 +1,90 @@
+"""
+Cloze (fill-in-the-blank) engine for the Worksheet Generator.
+
+A passage is tokenised once, recording the span of every word and the first
+occurrence of each candidate word. Blanks are then placed by span index, so
+producing another variant of the same passage (a different, seeded set of
+blanks) costs a sample and a join rather than a fresh parse and regex.
+"""
+import random
+import re
+from functools import lru_cache
+
+BLANK = "_____"
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+STOPWORDS = frozenset({
+    'i', 'me', 'my', 'myself', 'we', 'our', 'ours', 'ourselves', 'you', "you're",
+    "you've", "you'll", "you'd", 'your', 'yours', 'yourself', 'yourselves', 'he',
+    'him', 'his', 'himself', 'she', "she's", 'her', 'hers', 'herself', 'it', "it's",
+    'its', 'itself', 'they', 'them', 'their', 'theirs', 'themselves', 'what', 'which',
+    'who', 'whom', 'this', 'that', "that'll", 'these', 'those', 'am', 'is', 'are', 'was',
+    'were', 'be', 'been', 'being', 'have', 'has', 'had', 'having', 'do', 'does', 'did',
+    'doing', 'a', 'an', 'the', 'and', 'but', 'if', 'or', 'because', 'as', 'until', 'while',
+    'of', 'at', 'by', 'for', 'with', 'about', 'against', 'between', 'into', 'through',
+    'during', 'before', 'after', 'above', 'below', 'to', 'from', 'up', 'down', 'in', 'out',
+    'on', 'off', 'over', 'under', 'again', 'further', 'then', 'once', 'here', 'there', 'when',
+    'where', 'why', 'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some',
+    'such', 'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 's', 't',
+    'can', 'will', 'just', 'don', "don't", 'should', "should've", 'now', 'd', 'll', 'm', 'o',
+    're', 've', 'y', 'ain', 'aren', "aren't", 'couldn', "couldn't", 'didn', "didn't", 'doesn',
+    "doesn't", 'hadn', "hadn't", 'hasn', "hasn't", 'haven', "haven't", 'isn', "isn't", 'ma',
+    'mightn', "mightn't", 'mustn', "mustn't", 'needn', "needn't", 'shan', "shan't", 'shouldn',
+    "shouldn't", 'wasn', "wasn't", 'weren', "weren't", 'won', "won't", 'wouldn', "wouldn't"
+})
+
+
+class ClozePassage:
+    """A passage tokenised once, ready to have any set of its words blanked."""
+
+    def __init__(self, passage):
+        self.passage = passage
+        self.spans = []
+        # candidate word -> index in spans of its first occurrence
+        self.first_index = {}
+        for index, match in enumerate(WORD_PATTERN.finditer(passage)):
+            self.spans.append(match.span())
+            word = match.group(0)
+            if word not in self.first_index and word.lower() not in STOPWORDS and len(word) > 3:
+                self.first_index[word] = index
+        self.candidates = list(self.first_index)
+
+    def blank(self, num_blanks, rng=random):
+        """Blank the first occurrence of num_blanks random candidate words; returns (text, shuffled answers)."""
+        selected = rng.sample(self.candidates, min(num_blanks, len(self.candidates)))
+        pieces = []
+        last = 0
+        for index in sorted(self.first_index[word] for word in selected):
+            start, end = self.spans[index]
+            pieces.append(self.passage[last:start])
+            pieces.append(BLANK)
+            last = end
+        pieces.append(self.passage[last:])
+        rng.shuffle(selected)
+        return "".join(pieces), selected
+
+    def variants(self, count, num_blanks, seed=None):
+        """
+        count (text, answers) variants, each with its own blanks, reproducible for
+        a given seed. num_blanks may be a list of counts to cycle through, e.g. to
+        give support and extension versions fewer or more blanks.
+        """
+        counts = [num_blanks] if isinstance(num_blanks, int) else list(num_blanks)
+        base = random.Random(seed).getrandbits(32) if seed is not None else random.getrandbits(32)
+        return [self.blank(counts[i % len(counts)], random.Random(base + i)) for i in range(count)]
+
+
+@lru_cache(maxsize=64)
+def parse_passage(passage):
+    """ClozePassage for passage, reused when the same passage is blanked again."""
+    return ClozePassage(passage)
+
+
+def create_cloze(passage: str, num_blanks: int = 5):
+    """Blank num_blanks words of passage; returns (cloze passage, shuffled answers)."""
+    return parse_passage(passage).blank(num_blanks)
+
+
+def create_cloze_variants(passage, count, num_blanks=5, seed=None):
+    """Many differentiated cloze versions of one passage from a single parse."""
+    return parse_passage(passage).variants(count, num_blanks, seed=seed)
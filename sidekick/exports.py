@@ -0,0 +1,256 @@
+"""
+Export engine for generated text.
+
+Every tool exports through here. A document is a list of (heading, body)
+sections, and it can be rendered as DOCX, PPTX or PDF. Rendering runs on a
+small worker pool rather than the script thread, and the resulting bytes go
+into the shared blob store under a hash of the document, so download
+buttons redrawn on a rerun (or in another session) reuse them instead of
+rebuilding the file. Slide decks are laid out by sidekick.slides, and a
+deck built while its text was still streaming is handed over with
+submit_deck.
+"""
+import hashlib
+import json
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+
+from sidekick.blobstore import get_blob_store
+from sidekick.slides import SlideDeckWriter
+from sidekick.telemetry import current_tool, get_telemetry
+
+MIME_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "pdf": "application/pdf",
+    "zip": "application/zip",
+}
+
+# fpdf's core fonts only cover latin-1, so swap the usual typographic characters
+PDF_REPLACEMENTS = {
+    "‘": "'", "’": "'", "“": '"', "”": '"',
+    "–": "-", "—": "-", "•": "-", "…": "...", "≤": "<=", "≥": ">=",
+}
+
+
+def clean_export_text(text):
+    """Remove the markdown asterisks and hashes the model likes to add."""
+    return re.sub(r'[\*\#]', '', text)
+
+
+def text_sections(text):
+    """A single untitled section holding text, the shape most tools export."""
+    return [(None, text)]
+
+
+def render_docx(sections):
+    from docx import Document
+
+    doc = Document()
+    for heading, body in sections:
+        if heading:
+            doc.add_heading(heading, level=2)
+        doc.add_paragraph(body)
+    _strip_document_protection(doc)
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_pptx(sections):
+    # Untitled sections are split at their own headings; every section is paginated to fit its slides
+    deck = SlideDeckWriter()
+    for heading, body in sections:
+        deck.add_section(heading, body)
+    return deck.close()
+
+
+def _pdf_text(text):
+    for char, replacement in PDF_REPLACEMENTS.items():
+        text = text.replace(char, replacement)
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def render_pdf(sections):
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    for heading, body in sections:
+        if heading:
+            pdf.set_font("Helvetica", "B", 14)
+            pdf.multi_cell(0, 8, _pdf_text(heading))
+            pdf.ln(2)
+        pdf.set_font("Helvetica", size=11)
+        pdf.multi_cell(0, 6, _pdf_text(body))
+        pdf.ln(4)
+    output = pdf.output(dest="S")
+    # fpdf 1.x returns a latin-1 str, fpdf2 returns a bytearray
+    return output.encode("latin-1") if isinstance(output, str) else bytes(output)
+
+
+def _strip_document_protection(doc):
+    # Remove document protection if it exists to avoid a locked/read-only file
+    try:
+        protection = doc.settings.element.xpath('//w:documentProtection')
+        if protection:
+            protection[0].getparent().remove(protection[0])
+    except Exception:
+        pass
+
+
+class DocxSetWriter:
+    """
+    One multi-section DOCX built from versions that finish in any order.
+    Each version is appended, after a page break, as soon as every version
+    before it is in, so only out-of-order text waits in memory.
+    """
+
+    def __init__(self, basename):
+        from docx import Document
+
+        self.basename = basename
+        self._doc = Document()
+        self._next = 0
+        self._sections = 0
+        self._waiting = {}
+
+    def add(self, index, heading, body):
+        self._waiting[index] = (heading, body)
+        self._flush()
+
+    def skip(self, index):
+        """Leave a version out (e.g. its generation failed) without holding up later ones."""
+        self._waiting[index] = None
+        self._flush()
+
+    def _flush(self):
+        while self._next in self._waiting:
+            section = self._waiting.pop(self._next)
+            self._next += 1
+            if section is None:
+                continue
+            if self._sections:
+                self._doc.add_page_break()
+            heading, body = section
+            self._doc.add_heading(heading, level=1)
+            self._doc.add_paragraph(body)
+            self._sections += 1
+
+    def close(self):
+        _strip_document_protection(self._doc)
+        buffer = BytesIO()
+        self._doc.save(buffer)
+        return buffer.getvalue()
+
+
+class ZipSetWriter:
+    """A zip holding one DOCX per version, each rendered and compressed as it arrives."""
+
+    def __init__(self, basename):
+        self.basename = basename
+        # Spills to disk past 8 MB so a big class set doesn't sit in memory while it builds
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        self._zip = zipfile.ZipFile(self._buffer, "w", zipfile.ZIP_DEFLATED)
+
+    def add(self, index, heading, body):
+        self._zip.writestr(f"{self.basename}_{index + 1:02d}.docx", render_docx([(heading, body)]))
+
+    def skip(self, index):
+        pass
+
+    def close(self):
+        self._zip.close()
+        self._buffer.seek(0)
+        data = self._buffer.read()
+        self._buffer.close()
+        return data
+
+
+def class_set_writer(bundle, basename):
+    """Writer for a class set bundled as one "docx" or as a "zip" of DOCX files."""
+    return DocxSetWriter(basename) if bundle == "docx" else ZipSetWriter(basename)
+
+
+RENDERERS = {
+    "docx": render_docx,
+    "pptx": render_pptx,
+    "pdf": render_pdf,
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+# Renders in flight, so concurrent requests for one document share a Future
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def export_key(kind, sections):
+    """Content hash identifying one rendered file."""
+    payload = json.dumps([kind, [list(section) for section in sections]], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def submit_export(kind, sections):
+    """
+    Start rendering sections as kind on the export pool and return a Future of
+    the file bytes. A file rendered before comes straight from the blob store,
+    and identical requests in flight share one Future, so a rerun (or another
+    session exporting the same text) never renders the file twice.
+    """
+    key = export_key(kind, sections)
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is not None:
+            return future
+        data = get_blob_store().get(key)
+        if data is not None:
+            future = Future()
+            future.set_result(data)
+            return future
+        sections = list(sections)
+        future = _executor.submit(_render, kind, lambda: RENDERERS[kind](sections), key, current_tool.get())
+        _pending[key] = future
+    future.add_done_callback(lambda done: _finish(key))
+    return future
+
+
+def submit_deck(deck):
+    """
+    Finish a SlideDeckWriter that was fed as its text streamed in, and save
+    it on the export pool. Returns the deck's slide sections: passed to
+    export_buttons they pick up this deck rather than rendering it again.
+    """
+    sections = deck.finish()
+    key = export_key("pptx", sections)
+    with _pending_lock:
+        if key in _pending or key in get_blob_store():
+            return sections
+        future = _executor.submit(_render, "pptx", deck.close, key, current_tool.get())
+        _pending[key] = future
+    future.add_done_callback(lambda done: _finish(key))
+    return sections
+
+
+def _render(kind, build, key, tool):
+    start = time.monotonic()
+    data = build()
+    get_telemetry().record("export", tool, format=kind, seconds=time.monotonic() - start, bytes=len(data))
+    get_blob_store().put(data, key=key)
+    return data
+
+
+def _finish(key):
+    # Finished renders are served from the blob store; failed ones are retried next time
+    with _pending_lock:
+        _pending.pop(key, None)
+
+
+def export_bytes(kind, sections):
+    """Rendered file bytes, from the blob store when this document was exported before."""
+    return submit_export(kind, sections).result()
@@ -0,0 +1,221 @@
+"""
+A local stand-in for the OpenAI chat completions API, for benchmarks.
+
+It answers POST /v1/chat/completions with canned replies (a JSON object when
+the request asks for JSON mode), streamed as server-sent events when asked,
+with usage figures like the real API. Latency comes from a configurable
+distribution, streamed replies are paced at a configurable token rate, and
+a share of requests can be answered with a 429 to exercise the retry and
+throttling paths. Run it on its own with
+
+    python -m sidekick.fake_openai --port 8765 --latency lognormal:0.8,0.5 --rate-limit 0.05
+
+and point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Plain-text reply; the lesson plan lines mention resources so the Lesson Builder follows them up
+CANNED_TEXT = (
+    "Learning Goal: Students explain how volcanoes form and erupt.\n\n"
+    "Hook: Show a short eruption clip and ask students what they notice.\n\n"
+    "Warm-up: Students complete a vocab list of key volcano terms.\n\n"
+    "Main Task: In pairs, students complete a worksheet labelling a volcano cross-section "
+    "and answer comprehension questions about magma, lava and tectonic plates.\n\n"
+    "Exit Ticket: Each student writes one fact and one question on a handout.\n\n"
+    "1. What is magma?\n2. Why do volcanoes erupt?\n3. Where are most volcanoes found?\n\n"
+    "Answer Key:\n1. Molten rock below the surface.\n2. Pressure from gas and magma builds up.\n"
+    "3. Along tectonic plate boundaries."
+)
+
+# JSON-mode reply covering the worksheet and test shapes the tools ask for
+CANNED_JSON = json.dumps({
+    "passage": (
+        "Volcanoes form where magma from deep inside the Earth rises through cracks in the crust. "
+        "When pressure from gas and molten rock builds beneath the surface, the volcano erupts, "
+        "sending lava, ash and rock into the air. Most volcanoes are found along the edges of "
+        "tectonic plates, especially around the Pacific Ocean in a region called the Ring of Fire."
+    ),
+    "instructions": "Answer every question. Write in full sentences where asked.",
+    "questions": [
+        {"question": "What is magma?", "answer": "Molten rock below the Earth's surface."},
+        {"question": "Why do volcanoes erupt?", "answer": "Pressure from gas and magma builds up."},
+        {"question": "Where are most volcanoes found?", "answer": "Along tectonic plate boundaries."},
+    ],
+    "sections": [
+        {"heading": "True/False", "note": "", "questions": [
+            {"question": "Lava is magma that has reached the surface.", "answer": "True"},
+            {"question": "Volcanoes only form in cold climates.", "answer": "False"},
+        ]},
+        {"heading": "Multiple Choice", "note": "", "questions": [
+            {"question": "Which region has the most volcanoes?",
+             "options": ["The Ring of Fire", "The Sahara", "Antarctica", "The Amazon"],
+             "answer": "A"},
+        ]},
+        {"heading": "Short Answer", "note": "Short Answer responses require 3–5 sentences.", "questions": [
+            {"question": "Explain how a volcano erupts.", "answer": "Magma rises, pressure builds and it erupts."},
+        ]},
+    ],
+})
+
+
+def parse_distribution(spec):
+    """
+    A sampler for a latency spec in seconds: "fixed:S", "uniform:LOW,HIGH" or
+    "lognormal:MEDIAN,SIGMA".
+    """
+    name, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if name == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if name == "uniform" and len(values) == 2:
+        return lambda: random.uniform(*values)
+    if name == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+def _tokens(text):
+    """Split text into word-sized pieces that join back into the same text."""
+    pieces = text.split(" ")
+    return [piece + " " for piece in pieces[:-1]] + pieces[-1:]
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency="lognormal:0.8,0.5", tokens_per_second=80.0,
+                 rate_limit=0.0, retry_after=1.0):
+        super().__init__(address, _Handler)
+        self.sample_latency = parse_distribution(latency)
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.counts = {"requests": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=()):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        body = data.encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server.count("requests")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        if random.random() < server.rate_limit:
+            server.count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                headers=[("Retry-After", str(server.retry_after))]
+            )
+            return
+
+        json_mode = (request.get("response_format") or {}).get("type") == "json_object"
+        pieces = _tokens(CANNED_JSON if json_mode else CANNED_TEXT)
+        finish_reason = "stop"
+        if request.get("max_tokens") and len(pieces) > request["max_tokens"]:
+            pieces = pieces[:request["max_tokens"]]
+            finish_reason = "length"
+        prompt_tokens = sum(len(message.get("content", "")) for message in request.get("messages", [])) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(pieces),
+            "total_tokens": prompt_tokens + len(pieces),
+        }
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request.get("model", "fake")}
+
+        # Time to first token, then (for streams) the rest paced at the token rate
+        time.sleep(server.sample_latency())
+        if not request.get("stream"):
+            time.sleep(len(pieces) / server.tokens_per_second)
+            self._send_json(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunk = {**base, "object": "chat.completion.chunk"}
+        for piece in pieces:
+            delta = {"index": 0, "delta": {"content": piece}, "finish_reason": None}
+            self._write_chunk("data: " + json.dumps({**chunk, "choices": [delta]}) + "\n\n")
+            time.sleep(1 / server.tokens_per_second)
+        done = {"index": 0, "delta": {}, "finish_reason": finish_reason}
+        self._write_chunk("data: " + json.dumps({**chunk, "choices": [done]}) + "\n\n")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self._write_chunk("data: " + json.dumps({**chunk, "choices": [], "usage": usage}) + "\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.8,0.5",
+                        help="time to first token: fixed:S, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of requests answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with each 429")
+    args = parser.parse_args(argv)
+    server = FakeOpenAIServer(
+        (args.host, args.port),
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after
+    )
+    print(f"Fake OpenAI API listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Per-user history of generated outputs.
+
+Every finished generation is stored in a local SQLite file with the tool,
+a short title, the inputs that produced it, the output text and its export
+sections. Teachers can browse, search and re-export past outputs, and a tool
+page can redraw its last output after a rerun or a trip to another tool,
+all without another API call. Only the newest entries per user are kept.
+"""
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from sidekick.settings import data_path
+
+HISTORY_PER_USER = int(os.environ.get("SIDEKICK_HISTORY_PER_USER", "200"))
+
+HistoryEntry = collections.namedtuple("HistoryEntry", "id tool title inputs text sections created_at")
+
+
+class GenerationHistory:
+    """SQLite-backed store of each user's generations, newest first."""
+
+    def __init__(self, path=None, per_user=HISTORY_PER_USER):
+        self.path = path or data_path("history.sqlite3")
+        self.per_user = per_user
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, tool TEXT NOT NULL,"
+                " title TEXT NOT NULL, inputs TEXT NOT NULL, text TEXT NOT NULL, sections TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS generations_user ON generations (user_id, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _entry(row):
+        entry_id, tool, title, inputs, text, sections, created_at = row
+        sections = [tuple(section) for section in json.loads(sections)]
+        return HistoryEntry(entry_id, tool, title, json.loads(inputs), text, sections, created_at)
+
+    def add(self, user_id, tool, title, inputs, text, sections):
+        """Store one generation and return its id, dropping the user's oldest beyond the limit."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO generations (user_id, tool, title, inputs, text, sections, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    user_id, tool, title,
+                    json.dumps(inputs, ensure_ascii=False, default=str),
+                    text,
+                    json.dumps([list(section) for section in sections], ensure_ascii=False),
+                    time.time(),
+                )
+            )
+            conn.execute(
+                "DELETE FROM generations WHERE user_id = ? AND id NOT IN"
+                " (SELECT id FROM generations WHERE user_id = ? ORDER BY created_at DESC LIMIT ?)",
+                (user_id, user_id, self.per_user)
+            )
+            return cursor.lastrowid
+
+    def get(self, user_id, entry_id):
+        """One of the user's entries, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, tool, title, inputs, text, sections, created_at FROM generations"
+                " WHERE user_id = ? AND id = ?",
+                (user_id, entry_id)
+            ).fetchone()
+        return None if row is None else self._entry(row)
+
+    def search(self, user_id, query="", tool=None, limit=50):
+        """
+        The user's entries, newest first, optionally for one tool and matching
+        every word of query in the title, inputs or text (case-insensitive).
+        """
+        sql = ["SELECT id, tool, title, inputs, text, sections, created_at FROM generations WHERE user_id = ?"]
+        params = [user_id]
+        if tool:
+            sql.append("AND tool = ?")
+            params.append(tool)
+        for word in query.split():
+            pattern = "%" + word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            sql.append(
+                "AND (title LIKE ? ESCAPE '\\' OR inputs LIKE ? ESCAPE '\\' OR text LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern] * 3)
+        sql.append("ORDER BY created_at DESC LIMIT ?")
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(" ".join(sql), params).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def tools(self, user_id):
+        """Tools the user has history for."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT tool FROM generations WHERE user_id = ? ORDER BY tool", (user_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(self, user_id, entry_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM generations WHERE user_id = ? AND id = ?", (user_id, entry_id))
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history():
+    """Process-wide GenerationHistory, created on first use."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = GenerationHistory()
+        return _history
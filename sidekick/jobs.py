@@ -0,0 +1,342 @@
+"""
+Durable background jobs for long generations.
+
+A job is one headless generation (a tool's generate(**params)) recorded in a
+local SQLite file. Worker processes, not the Streamlit script, claim and run
+the jobs, so a teacher can click another widget, switch tools or close the
+tab and the work carries on. The page only polls the job's status.
+Submitting a job identical to one already queued or running returns the
+existing job's id and adds the submitter as another subscriber, so the
+work is paid for once. When a job finishes, its output is added to every
+subscriber's history, where the page picks it up or the teacher finds it
+later in My History.
+
+A worker refreshes its job's heartbeat while it runs. A running job whose
+heartbeat goes stale (its worker died or the app restarted) is queued
+again, up to JOB_MAX_ATTEMPTS times. The app starts SIDEKICK_JOB_WORKERS
+worker processes on first use; set it to 0 and run them separately with
+
+    python -m sidekick.jobs --workers 4
+"""
+import argparse
+import atexit
+import collections
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+from sidekick.settings import data_path
+
+JOB_WORKERS = int(os.environ.get("SIDEKICK_JOB_WORKERS", "2"))
+JOB_POLL_SECONDS = 0.5
+JOB_HEARTBEAT_SECONDS = 10
+# A running job not heard from for this long is assumed lost and queued again
+JOB_STALE_SECONDS = 60
+JOB_MAX_ATTEMPTS = 3
+# Finished jobs are kept this long for status and result lookups
+JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+Job = collections.namedtuple("Job", "id tool status error attempts created_at started_at finished_at")
+
+log = logging.getLogger("sidekick.jobs")
+
+
+def job_key(tool, params):
+    """Hash identifying identical jobs."""
+    payload = json.dumps([tool, params], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class JobQueue:
+    """SQLite-backed queue of generation jobs shared by every process using the data folder."""
+
+    def __init__(self, path=None):
+        self.path = path or data_path("jobs.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, key TEXT NOT NULL, tool TEXT NOT NULL, params TEXT NOT NULL,"
+                " status TEXT NOT NULL, error TEXT, text TEXT, sections TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+                " worker TEXT, heartbeat REAL, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+            )
+            # At most one queued or running job per key
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS jobs_in_flight ON jobs (key) WHERE status IN ('queued', 'running')"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS subscribers ("
+                " job_id TEXT NOT NULL, user_id TEXT NOT NULL, title TEXT NOT NULL, history_id INTEGER,"
+                " PRIMARY KEY (job_id, user_id))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can't claim one job
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def submit(self, tool, params, user_id, title):
+        """
+        Queue tool's generate(**params) for user_id and return the job id. An
+        identical job already queued or running is reused instead.
+        """
+        key = job_key(tool, params)
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM subscribers WHERE job_id IN (SELECT id FROM jobs WHERE finished_at < ?)",
+                (now - JOB_RETENTION_SECONDS,)
+            )
+            conn.execute("DELETE FROM jobs WHERE finished_at < ?", (now - JOB_RETENTION_SECONDS,))
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE key = ? AND status IN (?, ?)", (key, QUEUED, RUNNING)
+            ).fetchone()
+            if row is not None:
+                job_id = row[0]
+            else:
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (id, key, tool, params, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, key, tool, json.dumps(params, ensure_ascii=False, default=str), QUEUED, now)
+                )
+            conn.execute(
+                "INSERT OR IGNORE INTO subscribers (job_id, user_id, title) VALUES (?, ?, ?)",
+                (job_id, user_id, title)
+            )
+        return job_id
+
+    def get(self, job_id):
+        """The Job, or None once it has been pruned (or never existed)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, tool, status, error, attempts, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return None if row is None else Job(*row)
+
+    def result(self, job_id):
+        """(text, sections) of a finished job, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT text, sections FROM jobs WHERE id = ? AND status = ?", (job_id, DONE)).fetchone()
+        if row is None:
+            return None
+        return row[0], [tuple(section) for section in json.loads(row[1])]
+
+    def history_id(self, job_id, user_id):
+        """The user's history entry for a finished job, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT history_id FROM subscribers WHERE job_id = ? AND user_id = ?", (job_id, user_id)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def claim(self, worker):
+        """Mark the oldest queued job as running on worker and return (id, tool, params), or None."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Jobs whose worker has gone quiet go back in the queue, or fail once they've had enough tries
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?"
+                " WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+                (FAILED, now, "The job was interrupted too many times.", RUNNING, now - JOB_STALE_SECONDS,
+                 JOB_MAX_ATTEMPTS)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat < ?",
+                (QUEUED, RUNNING, now - JOB_STALE_SECONDS)
+            )
+            row = conn.execute(
+                "SELECT id, tool, params FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, heartbeat = ?, started_at = ?, attempts = attempts + 1"
+                " WHERE id = ?",
+                (RUNNING, worker, now, now, row[0])
+            )
+        return row[0], row[1], json.loads(row[2])
+
+    def heartbeat(self, job_id, worker):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time(), job_id, worker, RUNNING)
+            )
+
+    def finish(self, job_id, worker, tool_name, params, text, sections):
+        """
+        Store a job's output and add it to every subscriber's history. The job
+        is marked done first, and history is only written by the worker that
+        did so, so a job run twice (its first worker was presumed dead) is
+        never saved twice.
+        """
+        from sidekick.history import get_history
+
+        with self._transaction() as conn:
+            marked = conn.execute(
+                "UPDATE jobs SET status = ?, text = ?, sections = ?, finished_at = ?"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, text, json.dumps([list(section) for section in sections], ensure_ascii=False), time.time(),
+                 job_id, worker, RUNNING)
+            ).rowcount
+            # Only queued and running jobs take new subscribers, so this is everyone
+            subscribers = conn.execute("SELECT user_id, title FROM subscribers WHERE job_id = ?", (job_id,)).fetchall()
+        if not marked:
+            return
+        for user_id, title in subscribers:
+            history_id = get_history().add(user_id, tool_name, title, params, text, sections)
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE subscribers SET history_id = ? WHERE job_id = ? AND user_id = ?", (history_id, job_id, user_id)
+                )
+
+    def fail(self, job_id, worker, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND worker = ?",
+                (FAILED, error, time.time(), job_id, worker)
+            )
+
+    def stats(self):
+        """Jobs per status."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Process-wide JobQueue, created on first use."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
+
+
+def run_job(queue, worker, job_id, tool, params):
+    from sidekick.llm import CompletionError, current_session
+    from sidekick.tools import headless_tools
+
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            queue.heartbeat(job_id, worker)
+
+    threading.Thread(target=beat, name="job-heartbeat", daemon=True).start()
+    # Queue fairly with other work under the job rather than one shared background session
+    current_session.set(f"job:{job_id}")
+    try:
+        tool_name, module = headless_tools()[tool]
+        text, sections = module.generate(**params)
+    except CompletionError as error:
+        queue.fail(job_id, worker, str(error))
+    except Exception:
+        log.error("job %s (%s) crashed:\n%s", job_id, tool, traceback.format_exc())
+        queue.fail(job_id, worker, "Something went wrong while generating. Please try again.")
+    else:
+        queue.finish(job_id, worker, tool_name, params, text, sections)
+        log.info("job %s (%s) done", job_id, tool)
+    finally:
+        stop.set()
+
+
+def worker_main():
+    """Claim and run jobs until the process is stopped."""
+    queue = get_job_queue()
+    worker = f"{os.uname().nodename if hasattr(os, 'uname') else 'local'}:{os.getpid()}"
+    while True:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+        run_job(queue, worker, *claimed)
+
+
+def start_workers(count):
+    """
+    Start count worker processes and return them. Each is a fresh
+    `python -m sidekick.jobs --workers 1`, since multiprocessing would
+    re-run the Streamlit script (the app's __main__) in every child.
+    """
+    return [
+        subprocess.Popen([sys.executable, "-m", "sidekick.jobs", "--workers", "1"], stdin=subprocess.DEVNULL)
+        for _ in range(count)
+    ]
+
+
+def _stop_workers():
+    for process in _workers or ():
+        process.terminate()
+
+
+_workers = None
+_workers_lock = threading.Lock()
+
+
+def ensure_workers(count=JOB_WORKERS):
+    """Start this process's job workers the first time it is called, replacing any that have died."""
+    global _workers
+    with _workers_lock:
+        if _workers is None:
+            _workers = start_workers(count)
+            # Workers are only this process's while it runs; queued jobs wait in the file for the next start
+            atexit.register(_stop_workers)
+        elif any(process.poll() is not None for process in _workers):
+            _workers = [process for process in _workers if process.poll() is None]
+            _workers += start_workers(count - len(_workers))
+        return _workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Sidekick background job workers.")
+    parser.add_argument("--workers", type=int, default=max(1, JOB_WORKERS))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if args.workers == 1:
+        worker_main()
+        return
+    processes = [
+        multiprocessing.Process(target=worker_main, name=f"sidekick-job-worker-{i + 1}", daemon=True)
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+"""
+Chat completion helpers shared by every tool.
+
+The OpenAI client (and the openai package itself) is created on first use
+and then reused, with its pooled HTTP connections, by every session in the
+process. Each helper call has an overall deadline; rate limits, timeouts,
+connection errors and 5xx responses are retried with jittered exponential
+backoff, and slow calls can optionally be hedged with a second request.
+Every attempt is admitted by the process-wide scheduler first. The model is
+chosen per tool by sidekick.routing, and an attempt that is rate limited or
+misses the tool's SLO moves on to the route's next model.
+"""
+import collections
+import contextvars
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from sidekick.cache import cache_key, get_cache
+from sidekick.prompts import count_tokens
+from sidekick.routing import log_fallback, log_route, route_for
+from sidekick.scheduler import INTERACTIVE, get_scheduler
+from sidekick.semantic_cache import SEMANTIC_THRESHOLDS, get_semantic_cache
+from sidekick.telemetry import estimate_cost, get_telemetry
+
+# Prompt and reply together, in tokens, for the smallest routed model (gpt-3.5-turbo)
+CONTEXT_WINDOW = 16385
+
+# Tools where a fresh answer matters more than a fast one skip the response cache
+CACHE_OPT_OUT = {"Self Care Tool", "Teacher Boost"}
+
+# Timeout for one attempt, and the deadline for a helper call including retries (seconds)
+REQUEST_TIMEOUT = float(os.environ.get("SIDEKICK_REQUEST_TIMEOUT", "45"))
+CALL_DEADLINE = float(os.environ.get("SIDEKICK_CALL_DEADLINE", "90"))
+MAX_ATTEMPTS = int(os.environ.get("SIDEKICK_MAX_ATTEMPTS", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+# Requests in flight at once for batch work such as class sets
+BATCH_CONCURRENCY = int(os.environ.get("SIDEKICK_BATCH_CONCURRENCY", "4"))
+
+# Hedging fires a second attempt when the first is slower than the recent p95
+HEDGE_BY_DEFAULT = os.environ.get("SIDEKICK_HEDGE") == "1"
+HEDGE_MIN_SAMPLES = 20
+
+
+# Session the current script run belongs to, for fair queuing, and an optional
+# callback shown the call's queue position while it waits (set by app.py)
+current_session = contextvars.ContextVar("sidekick_session", default="background")
+queue_listener = contextvars.ContextVar("sidekick_queue_listener", default=None)
+# Optional callback told the similarity when a near-duplicate request's answer is served
+cache_listener = contextvars.ContextVar("sidekick_cache_listener", default=None)
+
+
+class CompletionError(Exception):
+    """Raised when the API could not produce a completion before the deadline."""
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+
+    def __init__(self, window=200):
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q, min_samples=HEDGE_MIN_SAMPLES):
+        """The q-th quantile (0-1) of the window, or None until there are enough samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+latencies = LatencyTracker()
+
+_client = None
+_client_lock = threading.Lock()
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+def get_client():
+    """Process-wide OpenAI client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            import openai
+            # Retries are handled here so they respect the call deadline
+            _client = openai.OpenAI(
+                api_key=os.environ.get("OPENAI_API_KEY"),
+                timeout=REQUEST_TIMEOUT,
+                max_retries=0
+            )
+        return _client
+
+
+def _is_retryable(error):
+    import openai
+    return isinstance(error, (
+        openai.RateLimitError,
+        openai.APIConnectionError,  # includes timeouts
+        openai.InternalServerError,
+    ))
+
+
+def _retry_after(error):
+    """Seconds the server asked us to wait, if it said."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _hedged_create(params, timeout):
+    threshold = latencies.percentile(0.95)
+    create = get_client().chat.completions.create
+    primary = _hedge_pool.submit(create, timeout=timeout, **params)
+    if threshold is None or threshold >= timeout:
+        return primary.result()
+    done, _ = wait([primary], timeout=threshold)
+    if done:
+        return primary.result()
+    # The first attempt is slower than usual: race a second one and keep the winner
+    backup = _hedge_pool.submit(create, timeout=timeout - threshold, **params)
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def prompt_tokens(messages):
+    """Locally counted prompt tokens, including the few each message adds."""
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 3
+
+
+def estimate_tokens(params):
+    """Token cost of a request (prompt plus completion budget) for rate limiting."""
+    return prompt_tokens(params["messages"]) + params.get("max_tokens", 1000)
+
+
+def create_completion(params, deadline=CALL_DEADLINE, hedge=HEDGE_BY_DEFAULT, session_id=None, priority=INTERACTIVE,
+                      route=None):
+    """
+    Call chat.completions.create with retries inside an overall deadline.
+    Each attempt waits for the scheduler to admit it. With a route, an
+    attempt that is rate limited or runs past the route's SLO moves
+    params["model"] to the route's next model, without backing off, while
+    one is left. Raises CompletionError once the deadline or attempt budget
+    runs out, or when the API rejects the request outright.
+    """
+    import openai
+
+    scheduler = get_scheduler()
+    session_id = session_id or current_session.get()
+    tokens = estimate_tokens(params)
+    deadline_at = time.monotonic() + deadline
+    last_error = None
+    position = 0
+    for attempt in range(MAX_ATTEMPTS):
+        can_fall_back = route is not None and position < len(route.models) - 1
+        try:
+            scheduler.acquire(
+                session_id,
+                priority=priority,
+                tokens=tokens,
+                timeout=max(0, deadline_at - time.monotonic()),
+                on_wait=queue_listener.get()
+            )
+        except TimeoutError as error:
+            raise CompletionError("Sidekick is very busy right now. Please try again in a minute.") from error
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            break
+        timeout = min(REQUEST_TIMEOUT, remaining)
+        if can_fall_back:
+            # Give up on this model at the SLO while another one is left to try
+            timeout = min(timeout, route.slo)
+        start = time.monotonic()
+        try:
+            if hedge and not params.get("stream"):
+                response = _hedged_create(params, timeout)
+            else:
+                response = get_client().chat.completions.create(timeout=timeout, **params)
+        except openai.APIError as error:
+            if not _is_retryable(error):
+                raise CompletionError(str(error)) from error
+            last_error = error
+            if can_fall_back and isinstance(error, (openai.RateLimitError, openai.APITimeoutError)):
+                position += 1
+                params["model"] = route.models[position]
+                log_fallback(route, position, "rate limited" if isinstance(error, openai.RateLimitError) else "missed SLO")
+                continue
+        else:
+            if not params.get("stream"):
+                latencies.add(time.monotonic() - start)
+            return response
+        # Full-jitter exponential backoff, unless the server told us how long to wait
+        delay = _retry_after(last_error) or random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        if isinstance(last_error, openai.RateLimitError):
+            # Everyone shares the key, so everyone backs off
+            scheduler.throttle(delay)
+        if time.monotonic() + delay >= deadline_at:
+            break
+        time.sleep(delay)
+    raise CompletionError("The AI service did not respond in time. Please try again.") from last_error
+
+
+def chat_completion_request(system_msg, user_msg, max_tokens=1000, temperature=0.7, stream=False, tool=None,
+                            deadline=CALL_DEADLINE, hedge=None, session_id=None, priority=INTERACTIVE,
+                            response_format=None, inputs=None):
+    """
+    A helper to call the model routed for tool with system & user messages.
+    With stream=True it returns a generator of text deltas instead of the full reply.
+    Replies are served from the shared response cache unless the tool opts out.
+    Pass max_tokens=None to leave the length to the model, priority=BACKGROUND
+    for work nobody is waiting on, and response_format to ask for JSON.
+    Tools in SEMANTIC_THRESHOLDS can pass their inputs (a dict of the page's
+    fields) to also be served the answer to a near-identical earlier request.
+    Every call is recorded in telemetry under its tool name. hedge defaults
+    to the tool's routing profile.
+    """
+    start = time.monotonic()
+    route = route_for(tool)
+    if hedge is None:
+        hedge = route.hedge or HEDGE_BY_DEFAULT
+    if max_tokens is not None:
+        # A very long pasted prompt leaves less room for the reply
+        room = CONTEXT_WINDOW - prompt_tokens([{"content": system_msg}, {"content": user_msg}])
+        max_tokens = max(1, min(max_tokens, room))
+    use_cache = tool not in CACHE_OPT_OUT
+    similar = use_cache and inputs is not None and tool in SEMANTIC_THRESHOLDS
+    # Requests are only near-duplicates if everything but the prompt wording matches
+    # Keyed by the tool's own model; an answer from a fallback model still answers the request
+    settings = (route.models[0], system_msg, max_tokens, temperature, response_format)
+    if use_cache:
+        key = cache_key(route.models[0], system_msg, user_msg, max_tokens, temperature, response_format)
+        cached = get_cache().get(key)
+        if cached is not None:
+            get_telemetry().record("llm", tool, seconds=time.monotonic() - start, cached=True)
+            return iter([cached]) if stream else cached
+    if similar:
+        match = cached_similar(tool, inputs, settings)
+        if match is not None:
+            cached, similarity = match
+            get_telemetry().record(
+                "llm", tool, seconds=time.monotonic() - start, cached=True, similarity=round(similarity, 3)
+            )
+            return iter([cached]) if stream else cached
+
+    params = {
+        "model": route.models[0],
+        "messages": [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg}
+        ],
+        "temperature": temperature,
+        "stream": stream,
+    }
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+    if response_format is not None:
+        params["response_format"] = response_format
+    if stream:
+        # The last chunk then carries the token usage
+        params["stream_options"] = {"include_usage": True}
+    log_route(route, stream)
+    try:
+        response = create_completion(
+            params, deadline=deadline, hedge=hedge, session_id=session_id, priority=priority, route=route
+        )
+    except CompletionError as error:
+        get_telemetry().record("llm", tool, seconds=time.monotonic() - start, model=params["model"], error=str(error))
+        raise
+    if stream:
+        finished = {}
+
+        def on_done(usage, text, first_token_at, finish_reason):
+            finished["reason"] = finish_reason
+            record_completion(tool, params, start, usage, text, first_token_at)
+        deltas = iter_stream_deltas(response, on_done)
+        if not use_cache:
+            return deltas
+        on_stored = (lambda: get_semantic_cache().add(tool, inputs, key, settings)) if similar else None
+        return cache_stream(
+            deltas, key, on_stored, lambda text: cacheable(text, finished.get("reason"), response_format)
+        )
+    text = response.choices[0].message.content.strip()
+    record_completion(tool, params, start, response.usage, text)
+    if use_cache and cacheable(text, response.choices[0].finish_reason, response_format):
+        get_cache().put(key, text)
+        if similar:
+            get_semantic_cache().add(tool, inputs, key, settings)
+    return text
+
+
+def cacheable(text, finish_reason, response_format):
+    """
+    Whether a reply is worth caching: not cut off at max_tokens and, in JSON
+    mode, a complete object. Otherwise "please try again" would be served the
+    same broken reply until it expired.
+    """
+    if finish_reason == "length":
+        return False
+    if response_format is not None:
+        from sidekick.structured import parse_reply
+
+        try:
+            parse_reply(text)
+        except CompletionError:
+            return False
+    return True
+
+
+def cached_similar(tool, inputs, settings):
+    """
+    The cached (reply, similarity) of an earlier request near-identical to
+    this one, or None. Tells the cache listener when one is served.
+    """
+    match = get_semantic_cache().lookup(tool, inputs, settings)
+    if match is None:
+        return None
+    key, similarity = match
+    text = get_cache().get(key)
+    if text is None:
+        # The response itself has expired or been evicted
+        get_semantic_cache().forget(tool, key)
+        return None
+    notify = cache_listener.get()
+    if notify is not None:
+        notify(similarity)
+    return text, similarity
+
+
+def complete_many(requests, max_workers=BATCH_CONCURRENCY, session_id=None):
+    """
+    Run chat_completion_request for each kwargs dict in requests on a bounded
+    thread pool, yielding (index, text, error) as each call finishes. Callers
+    on the script thread can draw each result as it arrives.
+    """
+    # Worker threads don't see this run's context, so pass the session along for fair queuing
+    session_id = session_id or current_session.get()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="llm-batch") as pool:
+        futures = {
+            pool.submit(chat_completion_request, session_id=session_id, **request): index
+            for index, request in enumerate(requests)
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except CompletionError as error:
+                yield futures[future], None, error
+
+
+GraphNode = collections.namedtuple("GraphNode", "name deps run")
+GraphNode.__doc__ = """
+One step of run_graph: run(results) is called with the results of the
+nodes named in deps, once they have all succeeded, and returns this node's result.
+"""
+
+
+def _run_node(node, results, session_id):
+    # Pool threads don't see the script run's context, so calls here queue under the caller's session
+    current_session.set(session_id)
+    return node.run(results)
+
+
+def run_graph(nodes, max_workers=BATCH_CONCURRENCY, session_id=None):
+    """
+    Run a dependency graph of GraphNodes on a bounded thread pool, starting
+    each node as soon as its dependencies have succeeded, and yield
+    (name, result, error) as each one finishes. A node whose dependency
+    failed is yielded with that error without running.
+    """
+    session_id = session_id or current_session.get()
+    waiting = {node.name: node for node in nodes}
+    results = {}
+    failed = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="llm-graph") as pool:
+        running = {}
+        while waiting or running:
+            for name, node in list(waiting.items()):
+                broken = next((failed[dep] for dep in node.deps if dep in failed), None)
+                if broken is not None:
+                    del waiting[name]
+                    failed[name] = broken
+                    yield name, None, broken
+                elif all(dep in results for dep in node.deps):
+                    del waiting[name]
+                    inputs = {dep: results[dep] for dep in node.deps}
+                    running[pool.submit(_run_node, node, inputs, session_id)] = name
+            if not running:
+                # Only nodes waiting on something that will never finish are left
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except CompletionError as error:
+                    failed[name] = error
+                    yield name, None, error
+                else:
+                    yield name, results[name], None
+
+
+def record_completion(tool, params, start, usage, text, first_token_at=None):
+    """Record a finished call's wall time, time to first token, tokens and cost."""
+    if usage is not None:
+        prompt_count, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+    else:
+        # Some servers don't report usage; count locally instead
+        prompt_count, completion_tokens = prompt_tokens(params["messages"]), count_tokens(text)
+    get_telemetry().record(
+        "llm",
+        tool,
+        seconds=time.monotonic() - start,
+        model=params["model"],
+        ttft=None if first_token_at is None else first_token_at - start,
+        prompt_tokens=prompt_count,
+        completion_tokens=completion_tokens,
+        max_tokens=params.get("max_tokens"),
+        cost=estimate_cost(params["model"], prompt_count, completion_tokens),
+        estimated_usage=usage is None
+    )
+
+
+def iter_stream_deltas(response, on_done=None):
+    """
+    Yield the text pieces of a streamed chat completion as they arrive. If
+    given, on_done(usage, full text, time of the first piece, finish reason)
+    is called when the stream ends or is abandoned. A stream that breaks off
+    (a dropped connection, a read timeout, an error event) raises
+    CompletionError, like a failed call.
+    """
+    usage = None
+    first_token_at = None
+    finish_reason = None
+    parts = []
+    try:
+        for chunk in response:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token_at is None:
+                    first_token_at = time.monotonic()
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+    except Exception as error:
+        # Only reading the response runs in here, so this is the API or the connection failing
+        raise CompletionError("The reply was cut off partway. Please try again.") from error
+    finally:
+        if on_done is not None:
+            on_done(usage, "".join(parts), first_token_at, finish_reason)
+
+
+def cache_stream(deltas, key, on_stored=None, check=None):
+    """
+    Pass deltas through and cache the full text once the stream completes,
+    then call on_stored if given. With check, the text is only cached if
+    check(text) is true.
+    """
+    parts = []
+    for delta in deltas:
+        parts.append(delta)
+        yield delta
+    text = "".join(parts).strip()
+    if check is not None and not check(text):
+        return
+    get_cache().put(key, text)
+    if on_stored is not None:
+        on_stored()
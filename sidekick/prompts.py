@@ -0,0 +1,66 @@
+"""
+Prompt templates and token budgets for the tools.
+
+A PromptTemplate keeps a tool's system message and its fixed instructions
+(reply format, house rules) as constants and puts them first. Only the
+per-request details come after them, so consecutive requests share the
+longest possible prefix, which the provider can serve from its prompt
+cache. Token counts are worked out locally, with tiktoken when it is
+installed and a close estimate otherwise. Each tool sizes max_tokens from
+what it actually asked for (question counts, passage length, weeks) through
+output_budget, instead of using one large fixed limit.
+"""
+import re
+
+# gpt-3.5-turbo's longest reply
+MAX_OUTPUT_TOKENS = 4096
+TOKENS_PER_WORD = 1.4
+# Headroom over the estimate, so a slightly long reply isn't cut off mid-sentence
+BUDGET_MARGIN = 1.2
+
+_encoding = None
+
+
+def _tiktoken_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # Not installed, or its vocabulary can't be fetched: use the estimate
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    """Tokens in text for gpt-3.5-turbo, exact with tiktoken and estimated without it."""
+    if not text:
+        return 0
+    encoding = _tiktoken_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Short words and punctuation are one token each; long words split into several
+    pieces = re.findall(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]", text)
+    return sum(1 + len(piece) // 7 for piece in pieces)
+
+
+def output_budget(words, floor=64, ceiling=MAX_OUTPUT_TOKENS):
+    """max_tokens for a reply expected to run to about words words (JSON syntax included)."""
+    return int(min(ceiling, max(floor, words * TOKENS_PER_WORD * BUDGET_MARGIN)))
+
+
+class PromptTemplate:
+    """A tool's fixed system message and instructions, followed by per-request details."""
+
+    def __init__(self, system, instructions=""):
+        self.system = system
+        self.instructions = instructions
+
+    def user_msg(self, *details):
+        """The fixed instructions first, then the non-empty details in order."""
+        return "\n\n".join(part for part in (self.instructions, *details) if part)
+
+    def request(self, *details, max_tokens, **kwargs):
+        """Keyword arguments for chat_completion_request."""
+        return dict(system_msg=self.system, user_msg=self.user_msg(*details), max_tokens=max_tokens, **kwargs)
@@ -0,0 +1,101 @@
+"""
+Model routing: which model each tool's calls go to.
+
+Every tool has a profile: a tier (fast, balanced or quality) and a latency
+SLO in seconds. A tier is a model, set per deployment with
+SIDEKICK_FAST_MODEL, SIDEKICK_BALANCED_MODEL and SIDEKICK_QUALITY_MODEL. A
+call starts on its tool's tier. If that model is rate limited, or doesn't
+answer within the SLO, the call moves to the next tier in FALLBACKS.
+Other failures are retried on the same model. The last tier left gets the
+rest of the call's deadline. Small, frequent tools sit on the fast tier
+with short SLOs and hedged requests, so they take the quickest path and
+give up on a slow model early. The planners stay on the balanced tier unless
+SIDEKICK_PLANNER_TIER=quality moves them up.
+
+Each decision is logged on the "sidekick.routing" logger: the route at
+INFO and every fallback at WARNING. The model that answered is recorded
+with the call in telemetry.
+"""
+import collections
+import logging
+import os
+
+TIER_MODELS = {
+    "fast": os.environ.get("SIDEKICK_FAST_MODEL", "gpt-4o-mini"),
+    "balanced": os.environ.get("SIDEKICK_BALANCED_MODEL", "gpt-3.5-turbo"),
+    "quality": os.environ.get("SIDEKICK_QUALITY_MODEL", "gpt-4o"),
+}
+
+# Unit Planner and Lesson Builder write the longest plans. The quality tier (gpt-4o) plans them
+# better but costs about 5x per prompt token and 6-7x per reply token, so it is opt in
+PLANNER_TIER = os.environ.get("SIDEKICK_PLANNER_TIER", "balanced")
+
+# Tier -> tiers to try next, in order
+FALLBACKS = {
+    "fast": ("balanced",),
+    "balanced": ("fast",),
+    "quality": ("balanced", "fast"),
+}
+
+Profile = collections.namedtuple("Profile", "tier slo hedge")
+Profile.__doc__ = "A tool's tier, its SLO in seconds per attempt before falling back, and whether to hedge."
+
+TOOL_PROFILES = {
+    "Teacher Boost": Profile("fast", 5, True),
+    "Self Care Tool": Profile("fast", 8, True),
+    "Feeling Peckish": Profile("fast", 10, True),
+    "Email Assistant": Profile("fast", 10, True),
+    "Video Assistant": Profile("fast", 10, True),
+    "Feedback Assistant": Profile("balanced", 15, False),
+    "Unit Glossary Generator": Profile("balanced", 15, False),
+    "Worksheet Generator": Profile("balanced", 20, False),
+    "Test Creator": Profile("balanced", 30, False),
+    "Unit Planner": Profile(PLANNER_TIER, 40, False),
+    "Lesson Builder": Profile(PLANNER_TIER, 45, False),
+}
+DEFAULT_PROFILE = Profile("balanced", 30, False)
+
+Route = collections.namedtuple("Route", "tool models tiers slo hedge")
+Route.__doc__ = "The models a tool's call may use, in order, with their tiers, the SLO and hedging."
+
+log = logging.getLogger("sidekick.routing")
+
+
+def profile_for(tool):
+    return TOOL_PROFILES.get(tool, DEFAULT_PROFILE)
+
+
+def route_for(tool):
+    """The Route for a call from tool: its tier's model first, then the fallbacks' (each model once)."""
+    profile = profile_for(tool)
+    models, tiers = [], []
+    for tier in (profile.tier, *FALLBACKS[profile.tier]):
+        if TIER_MODELS[tier] not in models:
+            models.append(TIER_MODELS[tier])
+            tiers.append(tier)
+    return Route(tool, tuple(models), tuple(tiers), profile.slo, profile.hedge)
+
+
+def log_route(route, stream):
+    log.info(
+        "route tool=%s tier=%s model=%s slo=%ss fallbacks=%s stream=%s",
+        route.tool, route.tiers[0], route.models[0], route.slo, ",".join(route.models[1:]) or "-", stream
+    )
+
+
+def log_fallback(route, position, reason):
+    log.warning(
+        "fallback tool=%s from=%s to=%s (%s tier) reason=%s",
+        route.tool, route.models[position - 1], route.models[position], route.tiers[position], reason
+    )
+
+
+def routing_table():
+    """Every profiled tool's tier, model, SLO and fallback models, for the metrics page."""
+    return [
+        {
+            "tool": tool, "tier": route.tiers[0], "model": route.models[0], "slo": route.slo,
+            "hedge": route.hedge, "fallbacks": ", ".join(route.models[1:]),
+        }
+        for tool, route in ((tool, route_for(tool)) for tool in TOOL_PROFILES)
+    ]
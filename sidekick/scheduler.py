@@ -0,0 +1,281 @@
+"""
+Process-wide scheduler for OpenAI requests.
+
+Every Streamlit session shares one API key, so every request is admitted
+here first. The scheduler keeps requests and tokens inside per-minute
+budgets. Waiting requests are ordered by priority (interactive tools ahead
+of background work such as the teacher boost) and then round-robin across
+sessions, so one teacher generating a class set cannot starve everyone
+else. When the API rate-limits us anyway, admissions pause for everyone
+instead of every session failing at once.
+
+The app, each job worker and the API are separate processes on the same
+key, so get_scheduler() keeps the budgets in a SQLite file in the data
+folder (SharedBudget) that all of them admit against. Queue order is still
+per process.
+"""
+import collections
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from sidekick.settings import data_path
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+REQUESTS_PER_MINUTE = int(os.environ.get("SIDEKICK_RPM_LIMIT", "500"))
+TOKENS_PER_MINUTE = int(os.environ.get("SIDEKICK_TPM_LIMIT", "160000"))
+WINDOW_SECONDS = 60.0
+
+
+class Ticket:
+    """A request waiting for (or holding) admission."""
+
+    __slots__ = ("id", "session_id", "priority", "tokens")
+
+    def __init__(self, id, session_id, priority, tokens):
+        self.id = id
+        self.session_id = session_id
+        self.priority = priority
+        self.tokens = tokens
+
+
+def _window_delay(budget, now, requests, used_tokens, oldest, tokens):
+    """Seconds until a request for tokens fits budget's window, or 0 if it fits now."""
+    # A request bigger than the whole budget is let through on an empty window
+    fits_tokens = used_tokens + tokens <= budget.tokens_per_minute or not requests
+    if requests < budget.requests_per_minute and fits_tokens:
+        return 0.0
+    return max(0.01, WINDOW_SECONDS - (now - oldest))
+
+
+class WindowBudget:
+    """Requests and tokens admitted in the last minute, counted in this process only."""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        # (admitted at, tokens) for every request admitted in the last window
+        self._admitted = collections.deque()
+        self._paused_until = 0.0
+
+    def _expire(self, now):
+        while self._admitted and now - self._admitted[0][0] >= WINDOW_SECONDS:
+            self._admitted.popleft()
+
+    def admit(self, tokens):
+        """Record a request for tokens and return 0 if it fits now, else the seconds to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._expire(now)
+            used_tokens = sum(used for _, used in self._admitted)
+            oldest = self._admitted[0][0] if self._admitted else now
+            delay = _window_delay(self, now, len(self._admitted), used_tokens, oldest, tokens)
+            if delay == 0:
+                self._admitted.append((now, tokens))
+            return delay
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def usage(self):
+        """(requests, tokens) admitted in the last window."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._admitted), sum(tokens for _, tokens in self._admitted)
+
+
+class SharedBudget:
+    """
+    The same budgets kept in a SQLite file, so every process using the data
+    folder admits against one window and one pause.
+    """
+
+    def __init__(self, path=None, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        self.path = path or data_path("scheduler.sqlite3")
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS admissions (at REAL NOT NULL, tokens INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS admissions_at ON admissions (at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS pause (id INTEGER PRIMARY KEY CHECK (id = 1), until REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so two processes can't both take the last slot
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def admit(self, tokens):
+        """Record a request for tokens and return 0 if it fits now, else the seconds to wait first."""
+        # Wall-clock time, as the window is compared between processes
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM admissions WHERE at <= ?", (now - WINDOW_SECONDS,))
+            paused = conn.execute("SELECT until FROM pause").fetchone()
+            if paused is not None and now < paused[0]:
+                return paused[0] - now
+            requests, used_tokens, oldest = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0), MIN(at) FROM admissions"
+            ).fetchone()
+            delay = _window_delay(self, now, requests, used_tokens, oldest, tokens)
+            if delay == 0:
+                conn.execute("INSERT INTO admissions (at, tokens) VALUES (?, ?)", (now, tokens))
+            return delay
+
+    def pause(self, seconds):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO pause (id, until) VALUES (1, ?) ON CONFLICT (id) DO UPDATE SET until = MAX(until, excluded.until)",
+                (time.time() + seconds,)
+            )
+
+    def usage(self):
+        """(requests, tokens) admitted by every process in the last window."""
+        with self._connect() as conn:
+            return tuple(conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM admissions WHERE at > ?", (time.time() - WINDOW_SECONDS,)
+            ).fetchone())
+
+
+class Scheduler:
+    """Rate-limited, priority-then-round-robin admission queue."""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE, budget=None):
+        # The budgets are counted in this process unless given a shared one
+        self.budget = budget or WindowBudget(requests_per_minute, tokens_per_minute)
+        self._cond = threading.Condition()
+        self._ids = itertools.count()
+        # priority -> session id -> that session's waiting tickets, in rotation order
+        self._queues = {INTERACTIVE: collections.OrderedDict(), BACKGROUND: collections.OrderedDict()}
+
+    def _order(self):
+        """Waiting tickets in the order they will be admitted."""
+        order = []
+        for priority in (INTERACTIVE, BACKGROUND):
+            queues = [list(queue) for queue in self._queues[priority].values()]
+            for round_ in itertools.zip_longest(*queues):
+                order.extend(ticket for ticket in round_ if ticket is not None)
+        return order
+
+    def _head(self):
+        for priority in (INTERACTIVE, BACKGROUND):
+            for queue in self._queues[priority].values():
+                return queue[0]
+        return None
+
+    def position(self, ticket):
+        """1-based place of a waiting ticket in the queue, or 0 once admitted."""
+        with self._cond:
+            for index, waiting in enumerate(self._order(), 1):
+                if waiting is ticket:
+                    return index
+            return 0
+
+    def acquire(self, session_id, priority=INTERACTIVE, tokens=0, timeout=None, on_wait=None):
+        """
+        Block until the request may be sent. on_wait(position) is called from
+        this thread whenever the request's place in the queue changes, never
+        while the scheduler's lock is held (it may draw UI). Raises
+        TimeoutError if it is not admitted within timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            ticket = Ticket(next(self._ids), session_id, priority, tokens)
+            self._queues[priority].setdefault(session_id, collections.deque()).append(ticket)
+        last_position = None
+        admitted = False
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    if self._head() is ticket:
+                        # Other processes can't wake this one, but the delay is how long until it fits
+                        delay = self.budget.admit(tokens)
+                        if delay == 0:
+                            admitted = True
+                            break
+                    else:
+                        delay = None
+                    position = self.position(ticket) if on_wait is not None else None
+                    if position is None or position == last_position:
+                        if deadline is not None:
+                            remaining = deadline - now
+                            if remaining <= 0:
+                                raise TimeoutError("Timed out waiting for a request slot")
+                            delay = remaining if delay is None else min(delay, remaining)
+                        self._cond.wait(delay)
+                        continue
+                # The place in line changed: report it outside the lock, then check again
+                last_position = position
+                on_wait(position)
+        finally:
+            with self._cond:
+                self._dequeue(ticket)
+                self._cond.notify_all()
+        if on_wait is not None and admitted and last_position:
+            on_wait(0)
+        return ticket
+
+    def _dequeue(self, ticket):
+        queues = self._queues[ticket.priority]
+        queue = queues.get(ticket.session_id)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        if queue:
+            # This session just had its turn, so it goes to the back of the rotation
+            queues.move_to_end(ticket.session_id)
+        else:
+            del queues[ticket.session_id]
+
+    def throttle(self, seconds):
+        """Pause all admissions, e.g. after the API answers with a 429."""
+        self.budget.pause(seconds)
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self):
+        requests, tokens = self.budget.usage()
+        with self._cond:
+            return {
+                "waiting": sum(len(queue) for queues in self._queues.values() for queue in queues.values()),
+                "requests_last_minute": requests,
+                "tokens_last_minute": tokens,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Process-wide Scheduler shared by every session, admitting against the budgets every process shares."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(budget=SharedBudget())
+        return _scheduler
@@ -0,0 +1,288 @@
+"""
+Near-duplicate lookup in front of the response cache.
+
+The exact response cache only helps when two prompts match byte for byte,
+but teachers type the same unit many ways ("Year 7 Science Volcanoes",
+"year 7 science – volcanoes unit"). For the tools listed in
+SEMANTIC_THRESHOLDS, the tool's inputs are normalised: free-text fields
+(subject, topic, description) become a hashed character n-gram TF-IDF
+vector, and every other input (year, options) must match exactly. A new
+request whose vector is close enough to an earlier one with the same exact
+inputs is answered with that request's cached response.
+
+Only pointers live here: each row maps normalised inputs to a response
+cache key, so the response cache's TTL and eviction still apply. Rows are
+kept in a small SQLite table shared by every process, and each process
+holds the vectors for lookup as NumPy matrices, one per tool and set of
+exact inputs. New rows are picked up on every lookup; a match is checked
+against the table before it is used, so rows another process deleted are
+dropped rather than served.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from sidekick.settings import data_path
+
+# Tool -> cosine similarity a stored request needs to be reused
+SEMANTIC_THRESHOLDS = {
+    "Unit Glossary Generator": 0.9,
+    "Unit Planner": 0.92,
+    "Video Assistant": 0.88,
+}
+
+# Inputs compared by meaning rather than exactly
+FREE_TEXT_FIELDS = {"subject", "topic", "description"}
+
+# Words that don't change what is being asked for
+STOP_WORDS = {"a", "an", "and", "the", "of", "on", "in", "for", "to", "about", "unit", "topic", "lesson", "lessons"}
+
+SEMANTIC_DIMENSIONS = 1024
+SEMANTIC_MAX_ENTRIES = int(os.environ.get("SIDEKICK_SEMANTIC_MAX_ENTRIES", "2000"))
+
+
+def singular(word):
+    """Crude plural folding: volcanoes, cities and systems become volcano, city and system."""
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    return word[:-1] if word.endswith("s") else word
+
+
+def normalise_text(text):
+    """Lower-case, singular words of text with accents, punctuation and filler words removed."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(singular(word) for word in re.findall(r"[a-z0-9]+", text) if word not in STOP_WORDS)
+
+
+def normalise_value(value):
+    """An exact-match input in canonical form: "Year 7", "year7" and 7 all become "7"."""
+    if isinstance(value, str):
+        value = normalise_text(value)
+        digits = re.fullmatch(r"(?:year|grade|yr)?\s*(\d+)", value)
+        return digits.group(1) if digits else value
+    return value
+
+
+def split_inputs(inputs, extra=()):
+    """
+    The (bucket, text) of a request: a hash of its exact-match inputs plus
+    extra request settings, and its normalised free text.
+    """
+    exact = {name: normalise_value(value) for name, value in inputs.items() if name not in FREE_TEXT_FIELDS}
+    text = " ".join(normalise_text(inputs[name]) for name in sorted(inputs) if name in FREE_TEXT_FIELDS)
+    payload = json.dumps([sorted(exact.items()), list(extra)], ensure_ascii=False, default=str)
+    return format(zlib.crc32(payload.encode("utf-8")), "08x"), text
+
+
+def features(text):
+    """Hashed feature counts of text: its words plus the 3- and 4-character grams of each word."""
+    counts = np.zeros(SEMANTIC_DIMENSIONS, dtype=np.float32)
+    for word in text.split():
+        grams = [f"w:{word}"]
+        padded = f" {word} "
+        for size in (3, 4):
+            grams.extend(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+        for gram in grams:
+            # crc32 rather than hash() so every process agrees
+            counts[zlib.crc32(gram.encode("utf-8")) % SEMANTIC_DIMENSIONS] += 1
+    # Sublinear term frequency, so one long repeated word can't dominate
+    return np.log1p(counts)
+
+
+class _Index:
+    """Vectors for one tool and set of exact inputs."""
+
+    def __init__(self):
+        self.ids = []
+        self.texts = []
+        self.keys = []
+        self.matrix = np.zeros((0, SEMANTIC_DIMENSIONS), dtype=np.float32)
+
+    def add(self, row_id, text, key, vector):
+        self.ids.append(row_id)
+        self.texts.append(text)
+        self.keys.append(key)
+        self.matrix = np.vstack([self.matrix, vector])
+
+    def remove(self, row_id):
+        position = self.ids.index(row_id)
+        for column in (self.ids, self.texts, self.keys):
+            del column[position]
+        self.matrix = np.delete(self.matrix, position, axis=0)
+
+
+class SemanticCache:
+    """Maps normalised tool inputs to response cache keys, with nearest-neighbour lookup."""
+
+    def __init__(self, path=None, max_entries=SEMANTIC_MAX_ENTRIES):
+        self.path = path or data_path("semantic.sqlite3")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (tool, bucket) -> _Index, and tool -> (entries, document frequency per dimension)
+        self._indexes = {}
+        self._frequencies = {}
+        self._last_row = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS requests ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, tool TEXT NOT NULL, bucket TEXT NOT NULL,"
+                " text TEXT NOT NULL, key TEXT NOT NULL, created_at REAL NOT NULL,"
+                " UNIQUE (tool, bucket, text))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _index_row(self, row_id, tool, bucket, text, key):
+        # Caller holds the lock
+        vector = features(text)
+        self._indexes.setdefault((tool, bucket), _Index()).add(row_id, text, key, vector)
+        entries, frequency = self._frequencies.get(tool, (0, np.zeros(SEMANTIC_DIMENSIONS, dtype=np.float32)))
+        self._frequencies[tool] = (entries + 1, frequency + (vector > 0))
+
+    def _unindex_row(self, row_id, tool, bucket):
+        # Caller holds the lock
+        index = self._indexes.get((tool, bucket))
+        if index is None or row_id not in index.ids:
+            return
+        vector = index.matrix[index.ids.index(row_id)]
+        index.remove(row_id)
+        entries, frequency = self._frequencies[tool]
+        self._frequencies[tool] = (entries - 1, frequency - (vector > 0))
+
+    def _refresh(self):
+        """Index rows added (by any process) since the last look."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, tool, bucket, text, key FROM requests WHERE id > ? ORDER BY id", (self._last_row,)
+            ).fetchall()
+        with self._lock:
+            for row_id, tool, bucket, text, key in rows:
+                # Another thread may have indexed these while this one was reading
+                if row_id <= self._last_row:
+                    continue
+                self._index_row(row_id, tool, bucket, text, key)
+                self._last_row = row_id
+
+    def _weights(self, tool):
+        # Caller holds the lock; smoothed inverse document frequency over the tool's requests
+        entries, frequency = self._frequencies[tool]
+        return np.log((1 + entries) / (1 + frequency)) + 1
+
+    def lookup(self, tool, inputs, extra=()):
+        """
+        The closest earlier request as (response cache key, similarity), or
+        None when nothing with the same exact inputs passes the tool's threshold.
+        """
+        bucket, text = split_inputs(inputs, extra)
+        self._refresh()
+        while True:
+            match = self._closest(tool, bucket, text)
+            if match is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+            row_id, key, similarity = match
+            # Another process may have evicted or forgotten the row since it was indexed here
+            with self._connect() as conn:
+                exists = conn.execute("SELECT 1 FROM requests WHERE id = ?", (row_id,)).fetchone()
+            with self._lock:
+                if exists:
+                    self.hits += 1
+                    return key, similarity
+                self._unindex_row(row_id, tool, bucket)
+
+    def _closest(self, tool, bucket, text):
+        """(row id, key, similarity) of the nearest indexed request past the threshold, or None."""
+        with self._lock:
+            index = self._indexes.get((tool, bucket))
+            if index is None or not index.ids or not text:
+                return None
+            weights = self._weights(tool)
+            query = features(text) * weights
+            rows = index.matrix * weights
+            norms = np.linalg.norm(rows, axis=1) * np.linalg.norm(query)
+            similarities = rows @ query / np.where(norms > 0, norms, 1)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < SEMANTIC_THRESHOLDS.get(tool, 1.0):
+                return None
+            return index.ids[best], index.keys[best], similarity
+
+    def add(self, tool, inputs, key, extra=()):
+        """Remember that this request's answer is cached under key."""
+        bucket, text = split_inputs(inputs, extra)
+        if not text:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO requests (tool, bucket, text, key, created_at) VALUES (?, ?, ?, ?, ?)",
+                (tool, bucket, text, key, time.time())
+            )
+            # Keep only the newest requests per tool
+            stale = conn.execute(
+                "SELECT id, bucket FROM requests WHERE tool = ? ORDER BY id DESC LIMIT -1 OFFSET ?",
+                (tool, self.max_entries)
+            ).fetchall()
+            conn.executemany("DELETE FROM requests WHERE id = ?", [(row_id,) for row_id, _ in stale])
+        with self._lock:
+            for row_id, stale_bucket in stale:
+                self._unindex_row(row_id, tool, stale_bucket)
+            # A replaced row has a new id; drop the old one from this process's index
+            index = self._indexes.get((tool, bucket))
+            if index is not None and text in index.texts:
+                self._unindex_row(index.ids[index.texts.index(text)], tool, bucket)
+        self._refresh()
+
+    def forget(self, tool, key):
+        """Drop pointers to a response that is no longer cached."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, bucket FROM requests WHERE tool = ? AND key = ?", (tool, key)).fetchall()
+            conn.execute("DELETE FROM requests WHERE tool = ? AND key = ?", (tool, key))
+        with self._lock:
+            for row_id, bucket in rows:
+                self._unindex_row(row_id, tool, bucket)
+
+    def stats(self):
+        """Hit/miss counters for this process and the requests indexed per tool."""
+        self._refresh()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": {tool: entries for tool, (entries, _) in sorted(self._frequencies.items())},
+            }
+
+
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Process-wide SemanticCache, created on first use."""
+    global _semantic_cache
+    with _semantic_cache_lock:
+        if _semantic_cache is None:
+            _semantic_cache = SemanticCache()
+        return _semantic_cache
@@ -0,0 +1,11 @@
+"""Runtime settings shared by the sidekick modules, read from the environment."""
+import os
+
+# Local folder for caches and other files that outlive a single session
+DATA_DIR = os.environ.get("SIDEKICK_DATA_DIR", ".sidekick")
+
+
+def data_path(filename):
+    """Return the path of a file inside DATA_DIR, creating the folder if needed."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
@@ -0,0 +1,208 @@
+"""
+PowerPoint decks from generated text.
+
+Text is split into blocks at its headings (markdown headings, bold lines,
+lines ending in a colon such as "Hook (10 minutes):", and plan sections
+such as "Lesson 2: Erosion" or "Exit Ticket: ..."), and each block's
+heading becomes its slide title. A block too long for one
+slide is paginated across as many as it needs, by measuring how many
+wrapped lines the text box holds at the slide font size, with "(cont.)"
+titles. SlideDeckWriter adds slides as soon as their block is complete, so
+the deck for a streamed plan is built while the plan is still arriving and
+only the unfinished block is held as text.
+"""
+import re
+import textwrap
+from io import BytesIO
+
+SLIDE_FONT_PT = 18
+# Text box position and size in inches (left, top, width, height) on the default 10 x 7.5 slide
+TEXT_BOX = (1, 1.5, 8, 5)
+# Average character width and line height as a share of the font size
+CHAR_WIDTH_EM = 0.5
+LINE_HEIGHT_EM = 1.2
+TITLE_CHARS = 60
+
+_MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*$")
+_BOLD_LINE = re.compile(r"^\*\*(.+?)\*\*$")
+# "Label: rest" with a short capitalised label, optionally bold
+_LABEL_LINE = re.compile(r"^(?:\*\*)?([A-Z][\w'&()/ \-–]{0,40}?)(?:\*\*)?\s*:(?:\*\*)?\s*(.*)$")
+# Labels that start a new slide even with text after the colon; others ("Time: 10 minutes") only on their own
+SECTION_LABELS = {
+    "overview", "learning goal", "learning goals", "learning intention", "learning intentions",
+    "success criteria", "hook", "warm-up", "warm up", "main task", "main activity", "exit ticket",
+    "differentiation", "assessment", "resources", "materials", "reflection", "conclusion", "introduction",
+}
+
+
+def line_capacity(width=TEXT_BOX[2], height=TEXT_BOX[3], font_pt=SLIDE_FONT_PT):
+    """(characters per line, lines per slide) of a text box in inches at font_pt."""
+    chars = int(width * 72 / (font_pt * CHAR_WIDTH_EM))
+    lines = int(height * 72 / (font_pt * LINE_HEIGHT_EM))
+    return chars, lines
+
+
+def split_heading(line):
+    """(title, rest of the line) if line is a heading, else None."""
+    line = line.strip()
+    for pattern in (_MARKDOWN_HEADING, _BOLD_LINE):
+        match = pattern.match(line)
+        if match:
+            return match.group(1).strip("*: "), ""
+    match = _LABEL_LINE.match(line)
+    if not match or len(match.group(1).split()) > 5:
+        return None
+    label, rest = match.group(1).strip(), match.group(2).strip()
+    # "Hook (10 minutes)" is the hook section
+    name = re.sub(r"\s*\(.*?\)\s*", " ", label).strip().lower()
+    if re.match(r"(lesson|week|day|part) \d+", name):
+        # "Lesson 2: Erosion" is a title in itself
+        return line.strip("*: ").replace("**", ""), ""
+    if not rest or name in SECTION_LABELS:
+        return label, rest
+    return None
+
+
+def clean_slide_text(text):
+    """Slide text without markdown emphasis, with bullets as dots."""
+    text = re.sub(r"^(\s*)[*-]\s+", r"\1• ", text, flags=re.MULTILINE)
+    return re.sub(r"[*#]", "", text)
+
+
+def paginate(title, lines, capacity=None):
+    """
+    Split a block's lines into (title, body) slides that each fit the text
+    box, breaking between lines where possible.
+    """
+    chars, max_lines = capacity or line_capacity()
+    title = title if len(title) <= TITLE_CHARS else title[:TITLE_CHARS - 1].rstrip() + "…"
+    pages, page, used = [], [], 0
+    for line in lines:
+        wrapped = textwrap.wrap(line, chars) or [""]
+        if len(wrapped) > max_lines:
+            # A single line longer than a whole slide is split between slides (with a line to spare)
+            step = max_lines - 1
+            pieces = [" ".join(wrapped[i:i + step]) for i in range(0, len(wrapped), step)]
+        else:
+            pieces = [line]
+        for piece in pieces:
+            height = len(textwrap.wrap(piece, chars) or [""])
+            if used + height > max_lines and page:
+                pages.append(page)
+                page, used = [], 0
+            if not page and not piece:
+                # No blank line at the top of a slide
+                continue
+            page.append(piece)
+            used += height
+    if page or not pages:
+        pages.append(page)
+    return [
+        (title if i == 0 else f"{title} (cont.)", "\n".join(page).strip())
+        for i, page in enumerate(pages)
+    ]
+
+
+def _block_lines(text):
+    """Cleaned lines of a block, without leading, trailing or repeated blank lines."""
+    lines = []
+    for line in clean_slide_text(text).splitlines():
+        line = line.rstrip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+class SlideDeckWriter:
+    """
+    A PPTX built slide by slide. Feed it streamed text, or whole sections,
+    and each block becomes its slides as soon as it is complete.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or line_capacity()
+        # (title, body) of every slide added, in order
+        self.sections = []
+        self._prs = None
+        self._buffer = ""
+        self._title = None
+        self._block = []
+
+    def _slide(self, title, body):
+        from pptx.util import Inches, Pt
+
+        if self._prs is None:
+            from pptx import Presentation
+            self._prs = Presentation()
+        slide = self._prs.slides.add_slide(self._prs.slide_layouts[5])
+        if slide.shapes.title:
+            slide.shapes.title.text = title
+        left, top, width, height = TEXT_BOX
+        text_frame = slide.shapes.add_textbox(Inches(left), Inches(top), Inches(width), Inches(height)).text_frame
+        text_frame.word_wrap = True
+        text_frame.text = body
+        for paragraph in text_frame.paragraphs:
+            for run in paragraph.runs:
+                run.font.size = Pt(SLIDE_FONT_PT)
+        self.sections.append((title, body))
+
+    def _close_block(self):
+        lines = _block_lines("\n".join(self._block))
+        if self._title is not None or lines:
+            title = self._title or f"Slide {len(self.sections) + 1}"
+            for page_title, page in paginate(clean_slide_text(title).strip(), lines, self.capacity):
+                self._slide(page_title, page)
+        self._title, self._block = None, []
+
+    def _line(self, line):
+        heading = split_heading(line)
+        if heading is None:
+            self._block.append(line)
+            return
+        self._close_block()
+        self._title, rest = heading
+        if rest:
+            self._block.append(rest)
+
+    def feed(self, text):
+        """Add streamed text; every block completed by it becomes slides."""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._line(line)
+
+    def consume(self, deltas):
+        """Pass streamed deltas through, feeding each one to the deck."""
+        for delta in deltas:
+            self.feed(delta)
+            yield delta
+
+    def add_section(self, heading, body):
+        """Add a whole section: slides titled heading, or split at body's own headings if heading is None."""
+        self.finish()
+        if heading:
+            self._title = heading
+            self._block = body.splitlines()
+        else:
+            self.feed(body + "\n")
+        self.finish()
+
+    def finish(self):
+        """Turn any remaining text into slides and return every slide's (title, body)."""
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ""
+        self._close_block()
+        return self.sections
+
+    def close(self):
+        """The finished deck as PPTX bytes."""
+        self.finish()
+        if self._prs is None:
+            from pptx import Presentation
+            self._prs = Presentation()
+        buffer = BytesIO()
+        self._prs.save(buffer)
+        return buffer.getvalue()
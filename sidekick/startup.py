@@ -0,0 +1,72 @@
+"""
+Import-cost tracking for cold start.
+
+timed_import() records how long each module took the first time the app
+imported it, and import_report() lists those timings for the sidebar.
+Running this module measures every tool and heavy dependency in a fresh
+interpreter, which is the number to compare between deploys:
+
+    python -m sidekick.startup
+"""
+import importlib
+import subprocess
+import sys
+import threading
+import time
+
+# Modules whose cold import cost we track between deploys
+TRACKED_MODULES = [
+    "streamlit",
+    "openai",
+    "docx",
+    "pptx",
+    "fpdf",
+]
+
+IMPORT_TIMES = {}
+_lock = threading.Lock()
+
+
+def timed_import(name):
+    """Import a module, recording its cost the first time this process loads it."""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        IMPORT_TIMES.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def import_report():
+    """(module, seconds) pairs recorded by timed_import, slowest first."""
+    with _lock:
+        return sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True)
+
+
+def measure_cold_import(name):
+    """Seconds taken to import a module in a fresh interpreter."""
+    code = (
+        "import importlib, time; start = time.perf_counter(); "
+        f"importlib.import_module({name!r}); print(time.perf_counter() - start)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip())
+
+
+def main():
+    from sidekick.tools import TOOL_MODULES
+
+    names = TRACKED_MODULES + [f"sidekick.tools.{module}" for module in TOOL_MODULES.values()]
+    print(f"{'module':<40} {'cold import (ms)':>16}")
+    for name in names:
+        try:
+            seconds = measure_cold_import(name)
+        except subprocess.CalledProcessError:
+            print(f"{name:<40} {'failed':>16}")
+            continue
+        print(f"{name:<40} {seconds * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
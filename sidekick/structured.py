@@ -0,0 +1,185 @@
+"""
+Structured (JSON) replies and an incremental parser for streaming them.
+
+Tools that need to take a reply apart (a passage, its questions and answers,
+the sections of a test) ask the model for a JSON object instead of prose.
+While the reply streams, every top-level field, and every item of a
+top-level list, is handed over as soon as it is complete, so a page can draw
+each part the moment it arrives instead of waiting for the whole reply.
+"""
+import json
+
+from sidekick.llm import CompletionError
+
+# OpenAI's JSON mode: the reply is guaranteed to be one JSON object
+JSON_FORMAT = {"type": "json_object"}
+
+# Completed values are reported down to this depth: 1 = top-level fields, 2 = items of top-level lists
+EMIT_DEPTH = 2
+
+
+class _Frame:
+    """An object or array the scanner is inside of."""
+
+    __slots__ = ("kind", "path", "key", "expect_key", "start", "scalar")
+
+    def __init__(self, kind, path):
+        self.kind = kind
+        self.path = path
+        self.key = 0 if kind == "[" else None
+        self.expect_key = kind == "{"
+        self.start = None  # where the child value being read began
+        self.scalar = False  # whether that child is a bare number / true / false / null
+
+
+class IncrementalJSONParser:
+    """
+    Scans a JSON object as it streams in. feed() returns the (path, value)
+    pairs completed by the new text, where path is a tuple of keys and list
+    indexes, e.g. ("questions", 2). Nothing is parsed twice except the small
+    slices being reported, so the cost stays linear in the reply length.
+    """
+
+    def __init__(self, emit_depth=EMIT_DEPTH):
+        self.emit_depth = emit_depth
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._root_start = None
+        self._root_end = None
+        self._in_string = False
+        self._string_is_key = False
+        self._string_start = 0
+        self._escape = False
+
+    @property
+    def done(self):
+        return self._root_end is not None
+
+    def feed(self, delta):
+        self._text += delta
+        events = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            self._step(text, self._pos, events)
+            self._pos += 1
+        return events
+
+    def _step(self, text, i, events):
+        ch = text[i]
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                frame = self._stack[-1]
+                if self._string_is_key:
+                    frame.key = json.loads(text[self._string_start:i + 1])
+                else:
+                    self._complete(frame, i + 1, events)
+            return
+        if not self._stack:
+            # Anything before the root object (e.g. a stray code fence) is skipped
+            if ch == "{":
+                self._root_start = i
+                self._stack.append(_Frame("{", ()))
+            return
+        frame = self._stack[-1]
+        if frame.scalar and (ch in ",}]" or ch.isspace()):
+            frame.scalar = False
+            self._complete(frame, i, events)
+        if ch == '"':
+            self._in_string = True
+            self._string_start = i
+            self._string_is_key = frame.expect_key
+            if not frame.expect_key:
+                frame.start = i
+        elif ch in "{[":
+            frame.start = i
+            self._stack.append(_Frame(ch, frame.path + (frame.key,)))
+        elif ch in "}]":
+            self._stack.pop()
+            if not self._stack:
+                self._root_end = i + 1
+            else:
+                self._complete(self._stack[-1], i + 1, events)
+        elif ch == ":":
+            frame.expect_key = False
+        elif ch == ",":
+            if frame.kind == "[":
+                frame.key += 1
+            else:
+                frame.expect_key = True
+        elif not ch.isspace() and frame.start is None:
+            frame.start = i
+            frame.scalar = True
+
+    def _complete(self, frame, end, events):
+        path = frame.path + (frame.key,)
+        if len(path) <= self.emit_depth:
+            try:
+                events.append((path, json.loads(self._text[frame.start:end])))
+            except ValueError:
+                pass  # left for result() to report
+        frame.start = None
+
+    def result(self):
+        """The whole object once the stream has ended. Raises ValueError if it never closed."""
+        if not self.done:
+            raise ValueError("The JSON reply ended before the object was closed")
+        return json.loads(self._text[self._root_start:self._root_end])
+
+
+def _merge(partial, path, value):
+    if len(path) == 1:
+        partial[path[0]] = value
+    elif len(path) == 2 and isinstance(path[1], int):
+        items = partial.setdefault(path[0], [])
+        if path[1] == len(items):
+            items.append(value)
+
+
+def iter_partial(deltas):
+    """
+    Yield the reply object as it fills in: once per completed top-level field
+    or list item, then the whole parsed object last. Raises CompletionError if
+    the reply is not a complete JSON object (e.g. it hit max_tokens).
+    """
+    parser = IncrementalJSONParser()
+    partial = {}
+    for delta in deltas:
+        events = parser.feed(delta)
+        for path, value in events:
+            _merge(partial, path, value)
+        if events:
+            yield partial
+    try:
+        reply = parser.result()
+    except ValueError as error:
+        raise CompletionError("The reply came back incomplete. Please try again.") from error
+    if not isinstance(reply, dict):
+        raise CompletionError("The reply was not in the expected format. Please try again.")
+    yield reply
+
+
+def parse_reply(text):
+    """Parse a complete structured reply, e.g. one served from the cache."""
+    reply = {}
+    for reply in iter_partial([text]):
+        pass
+    return reply
+
+
+def field(item, name):
+    """item[name] as text, tolerating list items that came back as bare strings."""
+    if isinstance(item, dict):
+        value = item.get(name)
+        return "" if value is None else str(value).strip()
+    return str(item).strip()
+
+
+def numbered(items, name):
+    """A 1. 2. 3. list of one field of each item."""
+    return "\n".join(f"{i}. {field(item, name)}" for i, item in enumerate(items, start=1))
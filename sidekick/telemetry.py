@@ -0,0 +1,174 @@
+"""
+Per-call telemetry: latency, tokens, cost, cache hits and export times.
+
+Every completion, export render and script rerun is recorded as a small
+event tagged with the tool it came from (exports, rendered on a pool, take
+theirs from current_tool when submitted). Recent events stay in an in-memory
+ring buffer that the metrics page summarises, and every event is also
+appended as a JSON line to a size-capped rolling file in the data folder,
+so numbers survive a restart and can be analysed offline. Each process
+(the app, every job worker, the API) writes its own telemetry-<pid>.jsonl,
+since rotating one file shared between processes loses events;
+read_telemetry_files() merges them.
+"""
+import collections
+import contextvars
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+from sidekick.settings import data_path
+
+TELEMETRY_BUFFER_SIZE = int(os.environ.get("SIDEKICK_TELEMETRY_BUFFER", "5000"))
+TELEMETRY_FILE_BYTES = int(float(os.environ.get("SIDEKICK_TELEMETRY_FILE_MB", "5")) * 1024 * 1024)
+TELEMETRY_FILE_BACKUPS = 3
+# Files of processes that stopped writing this long ago are deleted
+TELEMETRY_FILE_RETENTION_SECONDS = 30 * 24 * 3600
+TELEMETRY_FILE_PATTERN = "telemetry-*.jsonl*"
+
+# The tool whose page or API request is running, for events recorded away from its code
+current_tool = contextvars.ContextVar("sidekick_tool", default=None)
+
+# USD per 1K (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+}
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank q-th quantile (0-1) of an already sorted list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Telemetry:
+    """Thread-safe ring buffer of events, mirrored to a rolling JSON-lines file."""
+
+    def __init__(self, path=None, size=TELEMETRY_BUFFER_SIZE, max_bytes=TELEMETRY_FILE_BYTES):
+        self._events = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._log = logging.getLogger("sidekick.telemetry")
+        self._log.propagate = False
+        if not self._log.handlers:
+            prune_telemetry_files()
+            handler = logging.handlers.RotatingFileHandler(
+                path or data_path(f"telemetry-{os.getpid()}.jsonl"),
+                maxBytes=max_bytes,
+                backupCount=TELEMETRY_FILE_BACKUPS,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._log.addHandler(handler)
+            self._log.setLevel(logging.INFO)
+
+    def record(self, kind, tool=None, **fields):
+        """Record one event, e.g. record("llm", "Test Creator", seconds=2.1, prompt_tokens=300)."""
+        event = {"ts": time.time(), "kind": kind, "tool": tool or "other", **fields}
+        with self._lock:
+            self._events.append(event)
+        try:
+            self._log.info(json.dumps(event, default=str))
+        except Exception:
+            # Telemetry must never break a tool
+            pass
+        return event
+
+    def events(self, kind=None):
+        with self._lock:
+            events = list(self._events)
+        return [event for event in events if kind is None or event["kind"] == kind]
+
+    def summary(self, kind, events=None):
+        """
+        One row per tool (and file format, for exports) for events of kind:
+        call count, p50/p95/p99 of wall time (and of time to first token
+        where recorded), mean tokens, total estimated cost, cache hit rate
+        and error count. Summarises this process's events unless given others.
+        """
+        groups = collections.defaultdict(list)
+        events = self.events(kind) if events is None else [event for event in events if event["kind"] == kind]
+        for event in events:
+            # Exports are split by file format within each tool
+            groups[event["tool"], event.get("format") or ""].append(event)
+        rows = []
+        for (tool, file_format), events in sorted(groups.items()):
+            row = {"tool": tool, "format": file_format} if kind == "export" else {"tool": tool}
+            row["calls"] = len(events)
+            for name in ("seconds", "ttft") if kind == "llm" else ("seconds",):
+                values = sorted(event[name] for event in events if event.get(name) is not None)
+                for q in PERCENTILES:
+                    value = percentile(values, q)
+                    row[f"{name} p{int(q * 100)}"] = None if value is None else round(value, 3)
+            if kind == "llm":
+                sent = [event for event in events if not event.get("cached") and not event.get("error")]
+                for name in ("prompt_tokens", "completion_tokens"):
+                    row[f"mean {name}"] = round(sum(event.get(name, 0) for event in sent) / len(sent)) if sent else None
+                row["max completion_tokens"] = max((event.get("completion_tokens", 0) for event in sent), default=None)
+                row["cost usd"] = round(sum(event.get("cost", 0.0) for event in sent), 4)
+                row["cache hit rate"] = round(sum(1 for event in events if event.get("cached")) / len(events), 3)
+            row["errors"] = sum(1 for event in events if event.get("error"))
+            rows.append(row)
+        return rows
+
+
+def _telemetry_files():
+    return glob.glob(data_path(TELEMETRY_FILE_PATTERN))
+
+
+def prune_telemetry_files(retention=TELEMETRY_FILE_RETENTION_SECONDS):
+    """Delete the files (and rotated backups) of processes that stopped writing long ago."""
+    cutoff = time.time() - retention
+    for path in _telemetry_files():
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            # Already removed by another process
+            pass
+
+
+def read_telemetry_files(since=None):
+    """Every process's recorded events (from since, a timestamp, if given), oldest first."""
+    events = []
+    for path in _telemetry_files():
+        try:
+            with open(path, encoding="utf-8") as lines:
+                for line in lines:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a process that was killed mid-write
+                        continue
+                    if since is None or event.get("ts", 0) >= since:
+                        events.append(event)
+        except OSError:
+            continue
+    events.sort(key=lambda event: event.get("ts", 0))
+    return events
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Process-wide Telemetry shared by every session."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry()
+        return _telemetry
@@ -0,0 +1,49 @@
+"""
+The tool pages listed in the sidebar.
+
+Each tool lives in its own module exposing render(), and a module is only
+imported the first time its tool is selected. Teacher tools also expose
+generate(**params), the same generation without Streamlit, for the HTTP API
+and background jobs. Admin tools are only listed for visitors who open the
+app with the admin key (see ui.admin_enabled).
+"""
+import functools
+
+from sidekick.startup import timed_import
+
+# Sidebar label -> module under sidekick.tools, in sidebar order
+TOOL_MODULES = {
+    "Lesson Builder": "lesson_builder",
+    "Unit Planner": "unit_planner",
+    "Unit Glossary Generator": "glossary_generator",
+    "Worksheet Generator": "worksheet_generator",
+    "Test Creator": "test_creator",
+    "Email Assistant": "email_assistant",
+    "Video Assistant": "video_assistant",
+    "Feedback Assistant": "feedback_assistant",
+    "Self Care Tool": "self_care",
+    "Feeling Peckish": "feeling_peckish",
+    "My History": "my_history",
+}
+
+# Hidden admin pages, listed after the teacher tools when enabled
+ADMIN_TOOLS = {
+    "Metrics": "metrics",
+}
+
+
+def load_tool(name):
+    """Import (once) and return the module for a sidebar tool."""
+    module = TOOL_MODULES.get(name) or ADMIN_TOOLS[name]
+    return timed_import(f"sidekick.tools.{module}")
+
+
+@functools.lru_cache(maxsize=None)
+def headless_tools():
+    """Tool id (its module name) -> (sidebar name, module) for every tool with a generate()."""
+    tools = {}
+    for name, module_name in TOOL_MODULES.items():
+        module = load_tool(name)
+        if hasattr(module, "generate"):
+            tools[module_name] = (name, module)
+    return tools
@@ -0,0 +1,40 @@
+"""Email Assistant: drafts school emails to parents, students and staff."""
+import streamlit as st
+
+from sidekick.exports import clean_export_text, text_sections
+from sidekick.llm import chat_completion_request
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.ui import display_output_stream
+
+EMAIL_PROMPT = PromptTemplate(
+    "You are an experienced teacher writing professional school emails.",
+    "Write the email described below. Keep the email clear, respectful, and well-structured."
+)
+
+
+def email_request(recipient, context, tone, **kwargs):
+    """chat_completion_request arguments for an email."""
+    return EMAIL_PROMPT.request(
+        f"A {tone.lower()} email to a {recipient.lower()} about the following situation:\n{context}",
+        max_tokens=output_budget(350),
+        tool="Email Assistant",
+        **kwargs
+    )
+
+
+def generate(context, recipient="Parent", tone="Professional"):
+    """Headless generation: (text, export sections) of an email."""
+    email = chat_completion_request(**email_request(recipient, context, tone))
+    return email, text_sections(clean_export_text(email))
+
+
+def render():
+    st.header("✉️ Email Assistant")
+    recipient = st.selectbox("Who is the email to?", ["Parent", "Student", "Staff", "Other"])
+    context = st.text_area("Briefly describe the situation or what you want to say:")
+    tone = st.selectbox("Choose tone", ["Supportive", "Professional", "Friendly"])
+
+    if st.button("Generate Email"):
+        with st.spinner("Writing your email..."):
+            email_stream = chat_completion_request(**email_request(recipient, context, tone, stream=True))
+        display_output_stream(email_stream)
@@ -0,0 +1,248 @@
+"""Feedback Assistant: Star and 2 Wishes feedback on student writing, one piece or a whole class set."""
+import csv
+import io
+import itertools
+import os
+import re
+import zipfile
+
+import streamlit as st
+
+from sidekick.exports import DocxSetWriter, clean_export_text, text_sections
+from sidekick.llm import chat_completion_request, complete_many
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.ui import class_set_download, display_output_block, display_output_stream, save_generation
+from sidekick.writing import analyse_writing, highlight, load_dictionary, writing_report
+
+# Pieces of writing marked at once in a class set
+FEEDBACK_CONCURRENCY = int(os.environ.get("SIDEKICK_FEEDBACK_CONCURRENCY", "8"))
+
+# CSV headers (lower case) holding the student's name and their writing; the first one present is used
+NAME_COLUMNS = ("student", "student name", "name")
+TEXT_COLUMNS = ("text", "writing", "response", "essay", "submission", "answer")
+
+# Spelling, repetition and sentence checks are done locally (sidekick.writing) and highlighted in the
+# student's text, so the model only writes the commentary and never has to quote the text back
+FEEDBACK_PROMPT = PromptTemplate(
+    "You are a kind, helpful teacher giving writing feedback.",
+    "Give feedback on the student writing below using the Star and 2 Wishes model: one specific strength "
+    "and two specific next steps, covering grammar, cohesion and sentence structure as well as the "
+    "automatic checks listed. Keep it under 150 words. Do not quote or rewrite the text and do not "
+    "list individual errors; they are already highlighted for the student."
+)
+
+# Without an en-AU word list the local checks can't find spelling errors, so the model is asked to
+SPELLING_INSTRUCTION = (
+    "Spelling errors are not highlighted because no spelling check could be run, so end with a line "
+    "'Spelling to check:' listing up to five misspelt words from the text (Australian spelling), or 'none'."
+)
+
+# The commentary's length doesn't grow with the essay
+FEEDBACK_TOKENS = output_budget(150)
+SPELLING_FEEDBACK_TOKENS = output_budget(175)
+
+
+def feedback_request(student_text, tone, analysis, **kwargs):
+    """chat_completion_request arguments for the commentary on one analysed piece of writing."""
+    spelling_checked = analysis.misspellings is not None
+    return FEEDBACK_PROMPT.request(
+        f"Use a {tone.lower()} tone." + ("" if spelling_checked else f" {SPELLING_INSTRUCTION}"),
+        f"Automatic checks:\n{writing_report(analysis)}",
+        f"Student text:\n{student_text}",
+        max_tokens=FEEDBACK_TOKENS if spelling_checked else SPELLING_FEEDBACK_TOKENS,
+        tool="Feedback Assistant",
+        **kwargs
+    )
+
+
+def feedback_appendix(student_text, analysis):
+    """The local checks and the highlighted text, shown after the commentary."""
+    return f"Writing Check:\n{writing_report(analysis)}\n\nYour Writing, Highlighted:\n{highlight(student_text, analysis.spans)}"
+
+
+def feedback_text(commentary, student_text, analysis):
+    return f"{commentary.strip()}\n\n{feedback_appendix(student_text, analysis)}"
+
+
+def display_feedback(text, container=None):
+    """The output block with the highlights in bold (display_output_block drops markdown)."""
+    display_output_block(re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text, flags=re.DOTALL), container=container)
+
+
+def _decode(data):
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # Older Windows exports
+        return data.decode("cp1252", "replace")
+
+
+def _docx_text(data):
+    from docx import Document
+
+    return "\n".join(paragraph.text for paragraph in Document(io.BytesIO(data)).paragraphs)
+
+
+def _csv_submissions(text):
+    reader = csv.DictReader(io.StringIO(text))
+    headers = {header.strip().lower(): header for header in reader.fieldnames or [] if header}
+    rows = list(reader)
+    name_column = next((headers[name] for name in NAME_COLUMNS if name in headers), None)
+    text_column = next((headers[name] for name in TEXT_COLUMNS if name in headers), None)
+    if text_column is None and headers:
+        # Otherwise the writing is whichever column holds the most text
+        text_column = max(headers.values(), key=lambda header: sum(len(row.get(header) or "") for row in rows))
+    for i, row in enumerate(rows, 1):
+        yield (row.get(name_column) or "").strip() or f"Student {i}", row.get(text_column) or ""
+
+
+def read_submissions(name, data, skipped):
+    """
+    (student, text) for each piece of writing in an uploaded file: a .docx
+    or .txt named after the student, a CSV with a row per student, or a zip
+    of any of these. Files that can't be read are added to skipped.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    try:
+        if extension == ".zip":
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for info in sorted(archive.infolist(), key=lambda info: info.filename):
+                    base = os.path.basename(info.filename)
+                    # Folders, Mac metadata and Word lock files
+                    if info.is_dir() or info.filename.startswith("__MACOSX/") or base.startswith((".", "~$")):
+                        continue
+                    yield from read_submissions(info.filename, archive.read(info), skipped)
+        elif extension == ".docx":
+            yield os.path.splitext(os.path.basename(name))[0], _docx_text(data)
+        elif extension == ".txt":
+            yield os.path.splitext(os.path.basename(name))[0], _decode(data)
+        elif extension == ".csv":
+            yield from _csv_submissions(_decode(data))
+        else:
+            skipped.append(name)
+    except Exception:
+        # A corrupt zip or document, or a CSV that isn't one
+        skipped.append(name)
+
+
+def feedback_summary_csv(submissions, analyses, feedback):
+    """One row per student: the local checks, whether it was marked, and the feedback."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Student", "Words", "Sentences", "Possible Spelling Errors", "Status", "Feedback"])
+    for (student, _), analysis, result in zip(submissions, analyses, feedback):
+        writer.writerow([
+            student, analysis.words, analysis.sentences, ", ".join(analysis.misspellings or []),
+            "marked" if result else "failed", clean_export_text(result or ""),
+        ])
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def mark_class_set(submissions, tone, max_workers=FEEDBACK_CONCURRENCY):
+    """
+    Feedback on every submission, all in flight at once within max_workers,
+    with a line per student showing when theirs is done. Each piece goes
+    into the combined document once every one before it is in. Returns
+    the analysis and feedback per submission (None where it failed) and
+    the document.
+    """
+    analyses = [analyse_writing(text) for _, text in submissions]
+    writer = DocxSetWriter("feedback")
+    progress = st.progress(0.0, text=f"Marking {len(submissions)} pieces of writing...")
+    with st.expander("Progress by student", expanded=True):
+        slots = []
+        for student, _ in submissions:
+            slot = st.empty()
+            slot.caption(f"⏳ {student}")
+            slots.append(slot)
+
+    feedback = [None] * len(submissions)
+    requests = [feedback_request(text, tone, analysis) for (_, text), analysis in zip(submissions, analyses)]
+    # Streamlit calls stay on the script thread; workers only talk to the API
+    for done, (i, text, error) in enumerate(complete_many(requests, max_workers=max_workers), 1):
+        student = submissions[i][0]
+        if error is not None:
+            slots[i].warning(f"⚠️ {student}: feedback could not be generated.")
+            writer.skip(i)
+        else:
+            feedback[i] = feedback_text(text, submissions[i][1], analyses[i])
+            slots[i].caption(f"✅ {student}")
+            writer.add(i, student, clean_export_text(feedback[i]))
+        progress.progress(done / len(submissions), text=f"{done} of {len(submissions)} marked")
+    return analyses, feedback, writer.close()
+
+
+def generate(student_text, tone="Gentle"):
+    """Headless generation: (text, export sections) of feedback on student_text."""
+    analysis = analyse_writing(student_text)
+    feedback = feedback_text(chat_completion_request(**feedback_request(student_text, tone, analysis)), student_text, analysis)
+    return feedback, text_sections(clean_export_text(feedback))
+
+
+def render_class_set():
+    uploads = st.file_uploader(
+        "Upload student writing: .docx or .txt files (one per student), a zip of them, or a CSV with a row per student",
+        type=["docx", "txt", "zip", "csv"],
+        accept_multiple_files=True
+    )
+    tone = st.selectbox("Choose feedback tone", ["Gentle", "Firm", "Colloquial"])
+
+    if st.button("Mark Class Set", disabled=not uploads):
+        skipped = []
+        submissions = [
+            (student, text.strip())
+            for upload in uploads
+            for student, text in read_submissions(upload.name, upload.getvalue(), skipped)
+            if text.strip()
+        ]
+        if skipped:
+            st.warning(f"⚠️ Couldn't read {', '.join(skipped)}; those files were left out.")
+        if not submissions:
+            st.warning("⚠️ No student writing found in the uploaded files.")
+            return
+
+        analyses, feedback, document = mark_class_set(submissions, tone)
+        failed = [student for (student, _), result in zip(submissions, feedback) if result is None]
+        if failed:
+            st.warning(f"⚠️ No feedback for {', '.join(failed)}. Please try them again.")
+
+        sections = [(student, clean_export_text(result)) for (student, _), result in zip(submissions, feedback) if result]
+        if sections:
+            saved = save_generation(
+                "Feedback Assistant",
+                f"Class set: {len(sections)} pieces of writing",
+                {"tone": tone, "students": [student for student, _ in submissions]},
+                "\n\n".join(f"{student}\n\n{body}" for student, body in sections),
+                sections
+            )
+            if saved is None:
+                st.caption("🔒 Not saved to My History: feedback on student writing is only kept when you are signed in.")
+        class_set_download(document, "docx", "feedback")
+        st.download_button(
+            label="📊 Download Summary (CSV)",
+            data=feedback_summary_csv(submissions, analyses, feedback),
+            file_name="feedback_summary.csv",
+            mime="text/csv",
+            key="feedback_summary_download_btn"
+        )
+
+
+def render():
+    st.header("🧠 Feedback Assistant")
+    if load_dictionary() is None:
+        st.caption("ℹ️ No Australian English word list is installed, so spelling is checked by the AI rather than highlighted in the text.")
+    if st.radio("Mark", ["One piece of writing", "A class set (upload files)"], horizontal=True) != "One piece of writing":
+        render_class_set()
+        return
+    student_text = st.text_area("Paste student writing here:")
+    tone = st.selectbox("Choose feedback tone", ["Gentle", "Firm", "Colloquial"])
+
+    if st.button("Generate Feedback"):
+        with st.spinner("Analysing writing..."):
+            analysis = analyse_writing(student_text)
+            feedback_stream = chat_completion_request(**feedback_request(student_text, tone, analysis, stream=True))
+        # The local checks follow the commentary as soon as it has finished streaming
+        display_output_stream(
+            itertools.chain(feedback_stream, ["\n\n" + feedback_appendix(student_text, analysis)]),
+            draw=display_feedback
+        )
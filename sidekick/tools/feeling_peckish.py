@@ -0,0 +1,33 @@
+"""Feeling Peckish: recipes for hungry teachers."""
+import streamlit as st
+
+from sidekick.exports import clean_export_text, text_sections
+from sidekick.llm import chat_completion_request
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.ui import display_output_stream
+
+RECIPE_PROMPT = PromptTemplate(
+    "You are an expert chef who provides creative and detailed recipes.",
+    "Provide a detailed recipe for the dish or beverage below. Include a list of ingredients, "
+    "step-by-step instructions, and any useful tips for preparation."
+)
+
+
+def recipe_request(dish, **kwargs):
+    """chat_completion_request arguments for a recipe."""
+    return RECIPE_PROMPT.request(dish, max_tokens=output_budget(450), temperature=0.7, tool="Feeling Peckish", **kwargs)
+
+
+def generate(dish):
+    """Headless generation: (text, export sections) of a recipe."""
+    recipe = chat_completion_request(**recipe_request(dish))
+    return recipe, text_sections(clean_export_text(recipe))
+
+
+def render():
+    st.header("🍽️ Feeling Peckish")
+    dish = st.text_input("Enter a dish or beverage (e.g., chicken curry or espresso martini):")
+    if st.button("Get Recipe"):
+        with st.spinner("Messing up the kitchen..."):
+            recipe_stream = chat_completion_request(**recipe_request(dish, stream=True))
+        display_output_stream(recipe_stream)
@@ -0,0 +1,51 @@
+"""Unit Glossary Generator: 3-tier vocabulary lists for a unit."""
+import streamlit as st
+
+from sidekick.exports import clean_export_text, text_sections
+from sidekick.llm import chat_completion_request
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.ui import display_output_stream
+
+GLOSSARY_PROMPT = PromptTemplate(
+    "You are a helpful and experienced curriculum-aligned teacher.",
+    "Create a 3-tier vocabulary glossary for the unit described below. "
+    "Use this structure:\n"
+    "Tier 1 (General): 10 basic words students must know.\n"
+    "Tier 2 (Core): 7 subject-specific words they will encounter in lessons.\n"
+    "Tier 3 (Stretch): 5 challenge words that extend thinking.\n\n"
+    "Use bullet points. Keep each definition under 20 words. "
+    "Use student-friendly language, especially for primary year levels."
+)
+
+# 22 words, each with a definition of up to 20 words
+GLOSSARY_TOKENS = output_budget(22 * 16 + 30)
+
+
+def glossary_request(year, subject, topic, **kwargs):
+    """chat_completion_request arguments for a unit's glossary."""
+    return GLOSSARY_PROMPT.request(
+        f"A Year {year} {subject} unit on '{topic}'.",
+        max_tokens=GLOSSARY_TOKENS,
+        tool="Unit Glossary Generator",
+        inputs={"year": year, "subject": subject, "topic": topic},
+        **kwargs
+    )
+
+
+def generate(year, subject, topic):
+    """Headless generation: (text, export sections) of a unit glossary."""
+    glossary = chat_completion_request(**glossary_request(year, subject, topic))
+    return glossary, text_sections(clean_export_text(glossary))
+
+
+def render():
+    st.header("📘 Unit Glossary Generator")
+    year = st.text_input("Grade Level (e.g. 7)", placeholder="Enter grade level here")
+    subject = st.text_input("Subject (e.g. Science, HASS)")
+    topic = st.text_input("Topic or Unit Focus (e.g. Body Systems, Volcanoes)")
+   
+
+    if st.button("Generate Glossary"):
+        with st.spinner("Generating vocabulary list..."):
+            glossary_stream = chat_completion_request(**glossary_request(year, subject, topic, stream=True))
+        display_output_stream(glossary_stream)
@@ -0,0 +1,368 @@
+"""Lesson Builder: lesson plans with optional printable resources."""
+import os
+import re
+
+import streamlit as st
+
+from sidekick.exports import clean_export_text, submit_deck, text_sections
+from sidekick.llm import chat_completion_request, complete_many
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.slides import SlideDeckWriter
+from sidekick.structured import JSON_FORMAT, field, parse_reply
+from sidekick.ui import (
+    BACKGROUND_LABEL,
+    display_output_block,
+    display_output_stream,
+    export_buttons,
+    last_generation,
+    save_generation,
+    show_generation,
+    show_job,
+    submit_job,
+)
+
+# Maximum number of Lesson Builder resource requests in flight at once
+RESOURCE_CONCURRENCY = int(os.environ.get("SIDEKICK_RESOURCE_CONCURRENCY", "4"))
+# Lessons of a multi-lesson sequence written at once
+LESSON_CONCURRENCY = int(os.environ.get("SIDEKICK_LESSON_CONCURRENCY", "8"))
+
+# (min, max) of each numeric generate() parameter, shared by the widgets and the HTTP API
+PARAM_BOUNDS = {"duration": (30, 120), "lessons": (1, 20)}
+
+LESSON_PROMPT = PromptTemplate(
+    "You are a practical, creative Australian teacher.",
+    "Write classroom-ready lesson plans. Start each lesson with a clear Learning Goal. "
+    "Structure each lesson with: Hook, Learning Intentions, Warm-up, Main Task, Exit Ticket."
+)
+
+SKELETON_PROMPT = PromptTemplate(
+    "You are a practical, creative Australian teacher.",
+    "Outline the sequence of lessons described below: a short title and a one-sentence focus for each "
+    "lesson, building on each other in a sensible teaching order. "
+    'Reply with a JSON object of the form {"lessons": [{"title": "<lesson title>", "focus": "<what it covers>"}]}.'
+)
+
+RESOURCE_PROMPT = PromptTemplate(
+    "You are a practical and creative teacher who writes printable classroom resources.",
+    "Create the student resource described below, as mentioned in a lesson plan. It should be printable "
+    "and suitable for the year level given. Include questions or tasks and an answer key if relevant."
+)
+
+
+def lesson_budget(lesson_count, duration, with_resources):
+    """max_tokens for the plans: longer lessons have more to describe, and resources are written out in full."""
+    words_per_lesson = 250 + 3 * duration + (250 if with_resources else 0)
+    return output_budget(lesson_count * words_per_lesson)
+
+
+# Plan lines mentioning one of these get a resource written for them
+RESOURCE_KEYWORDS = ["worksheet", "handout", "comprehension task", "activity sheet", "vocab list"]
+
+
+def class_details(goal_focus, device_use, grouping, lesson_style, assessment, differentiation,
+                  generate_resources, include_curriculum):
+    """The part of a lesson prompt describing the class and how it is taught."""
+    prompt_parts = [
+        f"Align each Learning Goal to a {goal_focus.lower()} outcome.",
+        f"The lesson should use {', '.join(device_use).lower()}. Students should work in {grouping.lower()}.",
+        f"Use a {lesson_style.lower()} approach."
+    ]
+    if differentiation:
+        prompt_parts.append("Include differentiation strategies for: " + ", ".join(differentiation) + ".")
+    if assessment != "No Assessment":
+        prompt_parts.append(f"End each lesson with a {assessment.lower()} as an assessment.")
+    if generate_resources:
+        prompt_parts.append("If you mention any resources (like handouts, worksheets, activities), include the full text or link to each.")
+    if include_curriculum:
+        prompt_parts.append("Align the lesson with the Australian V9 curriculum.")
+    return " ".join(prompt_parts)
+
+
+def sequence_details(lesson_count, duration, year, subject, topic, details):
+    return (
+        f"A sequence of {lesson_count} lessons, each {duration} minutes long, "
+        f"for a Year {year} {subject} class on '{topic}'. {details}"
+    )
+
+
+def single_lesson_request(lesson_count, duration, year, subject, topic, details, with_resources, **kwargs):
+    """chat_completion_request arguments for the lesson(s) written as one reply."""
+    return LESSON_PROMPT.request(
+        f"Create {lesson_count} lesson(s), each {duration} minutes long, "
+        f"for a Year {year} {subject} class on '{topic}'. {details}",
+        max_tokens=lesson_budget(lesson_count, duration, with_resources),
+        tool="Lesson Builder",
+        **kwargs
+    )
+
+
+def lesson_requests(outline, details, max_tokens):
+    """chat_completion_request arguments for each lesson of an outlined sequence."""
+    sequence = "\n".join(
+        f"Lesson {i}: {title}" + (f" – {focus}" if focus else "") for i, (title, focus) in enumerate(outline, 1)
+    )
+    return [
+        LESSON_PROMPT.request(
+            details,
+            f"The whole sequence:\n{sequence}",
+            f"Write only lesson {i}: {title}" + (f" ({focus})" if focus else "") + ". Do not repeat its title.",
+            max_tokens=max_tokens,
+            tool="Lesson Builder"
+        )
+        for i, (title, focus) in enumerate(outline, 1)
+    ]
+
+
+def resource_lines(lesson_plan):
+    """The plan lines that mention a printable resource."""
+    return [line.strip() for line in lesson_plan.split("\n") if any(word in line.lower() for word in RESOURCE_KEYWORDS)]
+
+
+def resource_request(context, year):
+    """chat_completion_request arguments for the resource a plan line mentions."""
+    return RESOURCE_PROMPT.request(
+        f"Year level: {year}\nResource: {context}",
+        max_tokens=output_budget(400),
+        temperature=0.7,
+        tool="Lesson Builder"
+    )
+
+
+def fetch_outline(details, lesson_count, topic):
+    """(title, focus) for each lesson of the sequence, from one short request."""
+    reply = parse_reply(chat_completion_request(**SKELETON_PROMPT.request(
+        details,
+        max_tokens=output_budget(lesson_count * 30 + 10),
+        tool="Lesson Builder",
+        response_format=JSON_FORMAT
+    )))
+    lessons = reply.get("lessons") if isinstance(reply.get("lessons"), list) else []
+    outline = [(field(item, "title") or topic, field(item, "focus")) for item in lessons if isinstance(item, dict)]
+    # Exactly the number of lessons asked for, whatever the outline came back with
+    outline = outline[:lesson_count]
+    while len(outline) < lesson_count:
+        outline.append((f"{topic} (part {len(outline) + 1})", ""))
+    return outline
+
+
+def generate_lessons_concurrently(outline, details, max_tokens, deck, max_workers=LESSON_CONCURRENCY):
+    """
+    Write each lesson of the outline as its own request, all in flight at
+    once within max_workers. Each lesson appears in its slot as soon as it
+    finishes and goes into the deck once every lesson before it is in.
+    Returns the lessons merged in order; a failed lesson is left out.
+    """
+    progress = st.progress(0.0, text=f"Writing {len(outline)} lessons at once...")
+    slots = []
+    for i, (title, _) in enumerate(outline, 1):
+        slot = st.empty()
+        slot.caption(f"Writing lesson {i}: {title}...")
+        slots.append(slot)
+
+    requests = lesson_requests(outline, details, max_tokens)
+    lessons = [None] * len(outline)
+    written = 0
+    next_lesson = 0
+    # Streamlit calls stay on the script thread; workers only talk to the API
+    for i, text, error in complete_many(requests, max_workers=max_workers):
+        written += 1
+        progress.progress(written / len(outline), text=f"{written} of {len(outline)} lessons written")
+        if error is not None:
+            slots[i].warning(f"⚠️ Lesson {i + 1} could not be generated. Please try again.")
+            lessons[i] = ""
+        else:
+            lessons[i] = f"### Lesson {i + 1}: {outline[i][0]}\n\n{text}"
+            display_lesson_plan(lessons[i], container=slots[i])
+        while next_lesson < len(lessons) and lessons[next_lesson] is not None:
+            deck.feed(lessons[next_lesson] + "\n\n")
+            next_lesson += 1
+    progress.empty()
+    return "\n\n".join(lesson for lesson in lessons if lesson)
+
+
+def generate_resources_concurrently(lines, year, max_workers=RESOURCE_CONCURRENCY):
+    """
+    Generate the follow-up resources for a lesson plan as one bounded batch.
+    Each resource appears in its own slot as soon as it finishes, and the
+    returned (context, resource) list keeps the order of the plan lines.
+    """
+    contexts = lines
+
+    # Reserve a slot per resource up front so results land in plan order
+    slots = []
+    for i, context in enumerate(contexts, 1):
+        st.markdown(f"**{i}. From lesson plan:** _{context}_")
+        slot = st.empty()
+        slot.caption("Writing resource...")
+        slots.append(slot)
+
+    requests = [resource_request(context, year) for context in contexts]
+    results = [None] * len(contexts)
+    # Streamlit calls stay on the script thread; workers only talk to the API
+    for i, resource, error in complete_many(requests, max_workers=max_workers):
+        if error is not None:
+            slots[i].warning("⚠️ This resource could not be generated. Please try again.")
+        else:
+            results[i] = resource
+            display_output_block(resource, container=slots[i])
+
+    return [(context, resource) for context, resource in zip(contexts, results) if resource is not None]
+
+
+def display_lesson_plan(text, container=None):
+    """Render a lesson plan with its markdown headings in bold, in the grey plan block."""
+    target = container if container is not None else st
+    formatted_plan = text.replace("* ", "• ")
+    formatted_plan = re.sub(r"^#+\s*(.+)$", r"<br><b>\1</b>", formatted_plan, flags=re.MULTILINE)
+    html_plan = formatted_plan.replace("\n", "<br>")
+    target.markdown(
+        f"""
+        <div style='background-color: #f9f9f9; padding: 20px; border-radius: 8px;
+                    font-family: sans-serif; font-size: 16px; color: #111;
+                    line-height: 1.6; white-space: pre-wrap;'>
+            {html_plan}
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+
+def generate(year, subject, topic, duration=70, lessons=1, focus="Skills-Based", devices=(), grouping="Whole Class",
+             style="Discussion-Based", assessment="No Assessment", differentiation=(), resources=False,
+             curriculum=False):
+    """
+    Headless generation: (text, export sections) of a lesson plan, or an
+    outlined sequence written lesson by lesson, plus any resources it mentions.
+    """
+    details = class_details(focus, devices, grouping, style, assessment, differentiation, resources, curriculum)
+    if lessons > 1:
+        details = sequence_details(lessons, duration, year, subject, topic, details)
+        outline = fetch_outline(details, lessons, topic)
+        written = [None] * lessons
+        for i, text, error in complete_many(
+            lesson_requests(outline, details, lesson_budget(1, duration, resources)), max_workers=LESSON_CONCURRENCY
+        ):
+            if error is not None:
+                raise error
+            written[i] = f"### Lesson {i + 1}: {outline[i][0]}\n\n{text}"
+        lesson_plan = "\n\n".join(written)
+    else:
+        lesson_plan = chat_completion_request(**single_lesson_request(
+            lessons, duration, year, subject, topic, details, resources
+        ))
+
+    sections = text_sections(clean_export_text(lesson_plan))
+    if resources:
+        contexts = resource_lines(lesson_plan)
+        written = [None] * len(contexts)
+        for i, resource, error in complete_many(
+            [resource_request(context, year) for context in contexts], max_workers=RESOURCE_CONCURRENCY
+        ):
+            written[i] = resource
+        # Like the page, a resource that fails is left out rather than failing the plan
+        found = [(context, resource) for context, resource in zip(contexts, written) if resource is not None]
+        sections += [(f"Resource {i}: {context}", resource) for i, (context, resource) in enumerate(found, 1)]
+    text = "\n\n".join([lesson_plan] + [f"{heading}\n\n{body}" for heading, body in sections[1:]])
+    return text, sections
+
+
+def render():
+    st.markdown("### 📝 Lesson Builder")
+    year = st.text_input("Grade Level (e.g. 7)", placeholder="Enter grade level here")
+    subject = st.text_input("Subject (e.g. English, Science)")
+    topic = st.text_input("Lesson Topic")
+    duration = st.slider("Lesson Duration (minutes)", *PARAM_BOUNDS["duration"], 70, step=5)
+    low, high = PARAM_BOUNDS["lessons"]
+    lesson_count = st.number_input("Number of Lessons", min_value=low, max_value=high, value=1, step=1)
+    goal_focus = st.selectbox("Lesson Focus", ["Skills-Based", "Knowledge-Based", "Critical Thinking", "Creative Thinking"])
+    include_curriculum = st.checkbox("Include V9 curriculum reference")
+    device_use = st.multiselect("Resources to Include in Lessons", ["Laptops/Tablets", "Textbooks", "Worksheets", "Handouts"])
+    grouping = st.selectbox("Grouping Preference", ["Individual", "Pairs", "Small Groups", "Whole Class"])
+    lesson_style = st.selectbox("Lesson Style", ["Quiet/Reflective", "Discussion-Based", "Hands on", "Creative"])
+    assessment = st.selectbox("Assessment Format", ["No Assessment", "Exit Slip", "Short Response", "Group Presentation", "Quiz"])
+    differentiation = st.multiselect("Include Differentiation for:", ["Support", "Extension", "ESL", "Neurodiverse"])
+    generate_resources = st.checkbox("Generate suggested resources (e.g. handouts, worksheets)")
+    background = st.checkbox(BACKGROUND_LABEL)
+
+
+    
+    # After your input fields are defined
+    clicked = st.button("Generate Lesson Plan")
+    if clicked and background:
+        submit_job(
+            "Lesson Builder",
+            {"year": year, "subject": subject, "topic": topic, "duration": duration, "lessons": lesson_count,
+             "focus": goal_focus, "devices": device_use, "grouping": grouping, "style": lesson_style,
+             "assessment": assessment, "differentiation": differentiation, "resources": generate_resources,
+             "curriculum": include_curriculum},
+            f"Year {year} {subject}: {topic}"
+        )
+        show_job("Lesson Builder")
+    elif clicked:
+        details = class_details(
+            goal_focus, device_use, grouping, lesson_style, assessment, differentiation,
+            generate_resources, include_curriculum
+        )
+        deck = SlideDeckWriter()
+
+        if lesson_count > 1:
+            # A short outline first, then every lesson written at once with its own budget,
+            # so a long sequence takes about as long as its slowest lesson and is never cut off
+            details = sequence_details(lesson_count, duration, year, subject, topic, details)
+            with st.spinner("Outlining your lessons..."):
+                outline = fetch_outline(details, lesson_count, topic)
+            lesson_plan = generate_lessons_concurrently(
+                outline, details, lesson_budget(1, duration, generate_resources), deck
+            )
+        else:
+            with st.spinner("Planning your lesson(s)..."):
+                lesson_stream = chat_completion_request(**single_lesson_request(
+                    lesson_count, duration, year, subject, topic, details, generate_resources, stream=True
+                ))
+            # Slides are added as each section of the plan finishes streaming
+            lesson_plan = display_output_stream(deck.consume(lesson_stream), draw=display_lesson_plan)
+        # The finished deck is saved on the export pool while any resources are written
+        slide_sections = submit_deck(deck)
+
+        # --- RESOURCE GENERATION ---
+        matched_lines = resource_lines(lesson_plan)
+
+        # Display generated resources (if any) as each one finishes
+        st.markdown("## 📚 Suggested Resources")
+        resources = []
+        if generate_resources and matched_lines:
+            resources = generate_resources_concurrently(matched_lines, year)
+        if not resources:
+            st.info("No resource suggestions found in this plan.")
+
+
+
+        # After displaying the lesson plan:
+        st.subheader("Export Options")
+
+        # One or more slides per plan section, titled from its heading
+        export_buttons(slide_sections, "lesson_plan", kinds=("pptx",), labels={"pptx": "📊 Download Lesson PowerPoint"})
+
+        # Only add this if resources exist
+        resource_sections = [(f"Resource {i}: {context}", resource) for i, (context, resource) in enumerate(resources, 1)]
+        if resources:
+            # Combine all resources into a single document
+            export_buttons(
+                resource_sections,
+                "lesson_resources",
+                labels={"docx": "📥 Download Resources (Word)", "pdf": "📄 Download Resources (PDF)"}
+            )
+
+        save_generation(
+            "Lesson Builder",
+            f"Year {year} {subject}: {topic}",
+            {"year": year, "subject": subject, "topic": topic, "duration": duration, "lessons": lesson_count,
+             "focus": goal_focus, "style": lesson_style, "assessment": assessment},
+            "\n\n".join([lesson_plan] + [f"{heading}\n\n{body}" for heading, body in resource_sections]),
+            slide_sections + resource_sections
+        )
+    elif not show_job("Lesson Builder"):
+        # Coming back to the tool (or rerunning) redraws the last lesson and its resources from history
+        previous = last_generation("Lesson Builder")
+        if previous:
+            show_generation(previous, "lesson_plan", kinds=("pptx", "docx", "pdf"))
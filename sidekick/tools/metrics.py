@@ -0,0 +1,58 @@
+"""Metrics: hidden admin page with latency, token and cost percentiles per tool."""
+import time
+
+import streamlit as st
+
+from sidekick.blobstore import get_blob_store
+from sidekick.cache import get_cache
+from sidekick.routing import routing_table
+from sidekick.scheduler import get_scheduler
+from sidekick.semantic_cache import get_semantic_cache
+from sidekick.telemetry import get_telemetry, read_telemetry_files
+
+
+def render():
+    st.header("📈 Metrics")
+    telemetry = get_telemetry()
+    # Job workers and the API record into their own files; the last day of them is read back here
+    every_process = st.toggle("Include job workers and the API (last 24 hours)")
+    if every_process:
+        events = read_telemetry_files(since=time.time() - 24 * 3600)
+        scope = "in every process"
+    else:
+        events = telemetry.events()
+        scope = "in this process"
+    if not events:
+        st.info(f"No calls recorded {scope} yet.")
+        return
+    minutes = (time.time() - events[0]["ts"]) / 60
+    st.caption(f"{len(events)} events from the last {minutes:.0f} minutes {scope}. Times are in seconds.")
+
+    st.subheader("LLM calls")
+    st.dataframe(telemetry.summary("llm", events), hide_index=True)
+
+    st.subheader("Model routing")
+    st.dataframe(routing_table(), hide_index=True)
+
+    st.subheader("Exports")
+    st.dataframe(telemetry.summary("export", events), hide_index=True)
+
+    st.subheader("Page reruns")
+    st.dataframe(telemetry.summary("rerun", events), hide_index=True)
+
+    st.subheader("Stored generations")
+    blobs = get_blob_store().stats()
+    memory_column, raw_column, spilled_column, sessions_column = st.columns(4)
+    memory_column.metric("Held in memory", f"{blobs['memory_bytes'] / 1024 / 1024:.1f} MB")
+    raw_column.metric("Uncompressed", f"{blobs['raw_bytes'] / 1024 / 1024:.1f} MB")
+    spilled_column.metric("Spilled to disk", f"{blobs['spilled_bytes'] / 1024 / 1024:.1f} MB")
+    sessions_column.metric("Sessions holding references", blobs["sessions"])
+
+    st.subheader("Cache and queue")
+    cache_column, similar_column, queue_column = st.columns(3)
+    cache_column.json(get_cache().stats())
+    similar_column.json(get_semantic_cache().stats())
+    queue_column.json(get_scheduler().stats())
+
+    with st.expander("Recent LLM calls"):
+        st.dataframe(list(reversed([event for event in events if event["kind"] == "llm"][-100:])), hide_index=True)
@@ -0,0 +1,45 @@
+"""My History: browse, search and re-export past generations without calling the API again."""
+import time
+
+import streamlit as st
+
+from sidekick.history import get_history
+from sidekick.ui import current_user_id, show_generation
+
+ALL_TOOLS = "All tools"
+
+
+def render():
+    st.header("🕘 My History")
+    history = get_history()
+    user_id = current_user_id()
+    tools = history.tools(user_id)
+    if not tools:
+        st.info("Nothing saved yet. Your lesson plans, unit plans, worksheets and tests will appear here.")
+        return
+    st.caption(
+        "Bookmark this page's address to get back to your history on this device. "
+        "The address is the key to your history: anyone you share it with can see it. "
+        "Feedback on student writing is only saved when you are signed in."
+    )
+
+    query = st.text_input("Search", placeholder="e.g. volcanoes, Year 7, persuasive")
+    tool = st.selectbox("Tool", [ALL_TOOLS] + tools)
+    entries = history.search(user_id, query, tool=None if tool == ALL_TOOLS else tool)
+    if not entries:
+        st.info("No saved outputs match your search.")
+        return
+
+    # Only the chosen entry is drawn, so its exports are the only ones rendered
+    entry = st.radio(
+        f"{len(entries)} saved outputs",
+        entries,
+        format_func=lambda item: (
+            f"{time.strftime('%d %b %Y', time.localtime(item.created_at))} · {item.tool} · {item.title}"
+        )
+    )
+    st.markdown("---")
+    show_generation(entry, "history", kinds=("docx", "pdf", "pptx"))
+    if st.button("🗑️ Delete from history", key=f"history_delete_{entry.id}"):
+        history.delete(user_id, entry.id)
+        st.rerun()
@@ -0,0 +1,41 @@
+"""Self Care Tool: a quick, uplifting self care tip."""
+import streamlit as st
+
+from sidekick.exports import clean_export_text, text_sections
+from sidekick.llm import chat_completion_request
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.ui import display_output_stream
+
+SELF_CARE_PROMPT = PromptTemplate(
+    "You are a caring self care advisor who offers thoughtful, humorous, and uplifting self care tips.",
+    "Provide a self care tip for the person below. "
+    "Include some amusing or uplifting advice about what they can do today, "
+    "and tell them something amazing about themselves."
+)
+
+
+def self_care_request(mood, **kwargs):
+    """chat_completion_request arguments for a self care tip."""
+    return SELF_CARE_PROMPT.request(
+        f"They are feeling {mood}.",
+        max_tokens=output_budget(160),
+        temperature=0.8,
+        tool="Self Care Tool",
+        **kwargs
+    )
+
+
+def generate(mood="Tired"):
+    """Headless generation: (text, export sections) of a self care tip."""
+    tip = chat_completion_request(**self_care_request(mood))
+    return tip, text_sections(clean_export_text(tip))
+
+
+def render():
+    st.header("💖 Self Care Tool")
+    # Optionally ask how the user is feeling
+    mood = st.selectbox("How are you feeling today?", ["Stressed", "Happy", "Tired", "Lonely", "Motivated", "Calm"])
+    if st.button("Get Self Care Tip"):
+        with st.spinner("Breathe in the zen..."):
+            tip_stream = chat_completion_request(**self_care_request(mood, stream=True))
+        display_output_stream(tip_stream)
@@ -0,0 +1,200 @@
+"""Test Creator: printable tests grouped by question type."""
+import streamlit as st
+
+from sidekick.exports import clean_export_text, text_sections
+from sidekick.llm import chat_completion_request
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.structured import JSON_FORMAT, field, parse_reply
+from sidekick.ui import (
+    BACKGROUND_LABEL,
+    class_set_options,
+    display_structured_stream,
+    export_buttons,
+    last_generation,
+    run_class_set,
+    save_generation,
+    show_generation,
+    show_job,
+    submit_job,
+    version_heading,
+    version_instructions,
+)
+
+SYSTEM_MSG = "You are an expert teacher creating clear, printable classroom tests."
+
+# The reply shape asked of the model; numbering, spacing and the answer sheet are laid out here
+TEST_JSON = (
+    'Reply with a JSON object of the form {"instructions": "<test instructions for students>", '
+    '"sections": [{"heading": "<question type>", "note": "<line shown before the section, or empty>", '
+    '"questions": [{"question": "<question>", "options": ["<choice>"], "answer": "<correct answer>"}]}]}. '
+    "Only multiple choice questions have options; give them without letters. "
+    "Write plain text inside the strings, without markdown or numbering."
+)
+
+TEST_PROMPT = PromptTemplate(
+    SYSTEM_MSG,
+    "Write a classroom test with exactly the questions asked for below. "
+    "IMPORTANT: You must include ALL of the sections asked for, even if the number of questions is low. "
+    "Give one section per question type, in the order listed. "
+    "Short answer questions need 3–5 sentence responses; the short answer section's note must be: "
+    "'Short Answer responses require 3–5 sentences.' "
+    "Extended response questions need at least 10 sentences; the extended response section's note must be: "
+    "'Extended Response answers require a well-developed paragraph of at least 10 sentences.' "
+    "Other sections have an empty note.\n\n"
+    + TEST_JSON
+)
+
+# Expected words per question of each type, with its options, model answer and JSON
+WORDS_PER_QUESTION = {"tf": 18, "mcq": 45, "sa": 95, "er": 210}
+
+# (min, max) of each numeric generate() parameter, shared by the widgets and the HTTP API
+PARAM_BOUNDS = {"true_false": (0, 20), "multiple_choice": (0, 20), "short_answer": (0, 5), "extended_response": (0, 2)}
+
+
+def test_budget(num_tf, num_mcq, num_sa, num_er):
+    """max_tokens for the instructions, section headings and the questions asked for."""
+    words = 30 + 20 * sum(1 for count in (num_tf, num_mcq, num_sa, num_er) if count)
+    words += (
+        num_tf * WORDS_PER_QUESTION["tf"] + num_mcq * WORDS_PER_QUESTION["mcq"]
+        + num_sa * WORDS_PER_QUESTION["sa"] + num_er * WORDS_PER_QUESTION["er"]
+    )
+    return output_budget(words)
+
+
+def test_details(year, subject, topic, num_tf, num_mcq, num_sa, num_er, mix_difficulty=True):
+    """The per-request part of a test prompt: class, topic and question mix."""
+    details = (
+        f"A {num_tf + num_mcq + num_sa + num_er}-question test for Year {year} students on the topic '{topic}' in {subject}:\n"
+        f"- {num_tf} True/False questions\n"
+        f"- {num_mcq} Multiple Choice questions\n"
+        f"- {num_sa} Short Answer questions\n"
+        f"- {num_er} Extended Response questions"
+    )
+    if mix_difficulty:
+        details += "\nMix easy, medium, and hard questions."
+    return details
+
+
+def test_request(year, subject, topic, num_tf, num_mcq, num_sa, num_er, mix_difficulty=True, **kwargs):
+    """chat_completion_request arguments for a test's structured reply."""
+    return TEST_PROMPT.request(
+        test_details(year, subject, topic, num_tf, num_mcq, num_sa, num_er, mix_difficulty),
+        max_tokens=test_budget(num_tf, num_mcq, num_sa, num_er),
+        temperature=0.7,
+        tool="Test Creator",
+        response_format=JSON_FORMAT,
+        **kwargs
+    )
+
+
+def test_text(reply, include_instructions=True, include_answers=True):
+    """Printable test from a (possibly still streaming) structured reply, numbered across sections."""
+    parts = ["Student Name:___________________"]
+    if include_instructions and reply.get("instructions"):
+        parts.append(field(reply, "instructions"))
+    answers = []
+    for section in reply.get("sections", []):
+        lines = [field(section, "heading")]
+        if field(section, "note"):
+            lines.append(field(section, "note"))
+        for question in section.get("questions", []) if isinstance(section, dict) else []:
+            answers.append(f"{len(answers) + 1}. {field(question, 'answer')}")
+            lines.append(f"\n{len(answers)}. {field(question, 'question')}")
+            options = (question.get("options") or []) if isinstance(question, dict) else []
+            lines.extend(f"   {letter}. {option}" for letter, option in zip("ABCDEFGH", options))
+            # Space for the student's response
+            lines.append("")
+        parts.append("\n".join(lines))
+    if answers:
+        parts.append("End of Test")
+        if include_answers:
+            parts.append("Answer Sheet:\n\n" + "\n".join(answers))
+    return "\n\n".join(parts)
+
+
+def generate(year, subject, topic, true_false=3, multiple_choice=3, short_answer=4, extended_response=0,
+             mix_difficulty=True, include_instructions=True, include_answers=True):
+    """Headless generation: (text, export sections) of a test."""
+    reply = parse_reply(chat_completion_request(**test_request(
+        year, subject, topic, true_false, multiple_choice, short_answer, extended_response, mix_difficulty
+    )))
+    test = test_text(reply, include_instructions, include_answers)
+    return test, text_sections(clean_export_text(test))
+
+
+def render():
+    st.header("🧪 Test Creator")
+
+    # Input fields
+    year = st.text_input("Grade Level (e.g. 7)", placeholder="Enter grade level here")
+    subject = st.text_input("Subject", placeholder="e.g. English, Science, HASS")
+    topic = st.text_input("Topic", placeholder="e.g. Fractions, Ancient Rome, Persuasive Texts")
+
+
+    
+    low, high = PARAM_BOUNDS["true_false"]
+    num_tf = st.number_input(f"Number of True/False Questions (Max {high})", min_value=low, max_value=high, value=3, step=1)
+    low, high = PARAM_BOUNDS["multiple_choice"]
+    num_mcq = st.number_input(f"Number of Multiple Choice Questions (Max {high})", min_value=low, max_value=high, value=3, step=1)
+    low, high = PARAM_BOUNDS["short_answer"]
+    num_sa = st.number_input(f"Number of Short Response Questions (Max {high})", min_value=low, max_value=high, value=4, step=1)
+    low, high = PARAM_BOUNDS["extended_response"]
+    num_er = st.number_input(f"Number of Extended Response Questions (Max {high})", min_value=low, max_value=high, value=0, step=1)
+
+    mix_difficulty = st.checkbox("Mix difficulty levels?", value=True)
+    include_instructions = st.checkbox("Include instructions at the top?", value=True)
+    include_answers = st.checkbox("Generate an answer sheet?", value=True)
+
+    class_set = class_set_options("test")
+    background = not class_set and st.checkbox(BACKGROUND_LABEL)
+
+    clicked = st.button("Generate Test")
+    if clicked and background:
+        # A worker process writes the test; this page only checks on it
+        submit_job(
+            "Test Creator",
+            {"year": year, "subject": subject, "topic": topic, "true_false": num_tf, "multiple_choice": num_mcq,
+             "short_answer": num_sa, "extended_response": num_er, "mix_difficulty": mix_difficulty,
+             "include_instructions": include_instructions, "include_answers": include_answers},
+            f"Year {year} {subject}: {topic}"
+        )
+        show_job("Test Creator")
+    elif clicked:
+        request = test_request(year, subject, topic, num_tf, num_mcq, num_sa, num_er, mix_difficulty)
+
+        def to_text(reply):
+            return test_text(reply, include_instructions, include_answers)
+
+        if class_set:
+            count, differentiate, bundle = class_set
+            requests = [
+                {**request, "user_msg": request["user_msg"] + version_instructions(i, count, "test", differentiate)}
+                for i in range(count)
+            ]
+            headings = [version_heading(i, differentiate) for i in range(count)]
+            run_class_set(requests, headings, bundle, "test", to_text=to_text)
+            return
+
+        with st.spinner("Generating test..."):
+            test_stream = chat_completion_request(stream=True, **request)
+        test_output = to_text(display_structured_stream(test_stream, to_text))
+
+        save_generation(
+            "Test Creator",
+            f"Year {year} {subject}: {topic}",
+            {"year": year, "subject": subject, "topic": topic, "true_false": num_tf, "multiple_choice": num_mcq,
+             "short_answer": num_sa, "extended_response": num_er},
+            test_output,
+            text_sections(clean_export_text(test_output))
+        )
+
+        # ---- Export Options ----
+        st.subheader("Export Options")
+        st.write("How many students studied? ;)")
+
+        export_buttons(text_sections(clean_export_text(test_output)), "test", labels={"docx": "📥 Download Word"})
+    elif not show_job("Test Creator"):
+        # Coming back to the tool (or rerunning) redraws the last test from history
+        previous = last_generation("Test Creator")
+        if previous:
+            show_generation(previous, "test", labels={"docx": "📥 Download Word"})
@@ -0,0 +1,263 @@
+"""Unit Planner: unit overviews with Word and PDF exports, and whole-unit packs built from them."""
+import os
+
+import streamlit as st
+
+from sidekick.exports import clean_export_text, text_sections
+from sidekick.llm import CompletionError, GraphNode, chat_completion_request, run_graph
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.structured import JSON_FORMAT, field, parse_reply
+from sidekick.tools.glossary_generator import glossary_request
+from sidekick.tools.test_creator import TEST_PROMPT, test_budget, test_details, test_text
+from sidekick.tools.worksheet_generator import worksheet_request, worksheet_text
+from sidekick.ui import (
+    BACKGROUND_LABEL,
+    display_output_block,
+    export_buttons,
+    last_generation,
+    save_generation,
+    show_generation,
+    show_job,
+    submit_job,
+)
+
+UNIT_PROMPT = PromptTemplate(
+    "You are a practical and experienced curriculum-aligned teacher in Australia.",
+    "Write a unit plan overview. Include the following sections: "
+    "1. A short Unit Overview (what it's about). "
+    "2. 3–5 clear Learning Intentions. "
+    "3. A suggested sequence of subtopics or concepts to explore each week. "
+    "4. A comprehensive list of lesson types or activity ideas that would suit this unit. "
+    "Then add any extra sections asked for below, numbered on from 5."
+)
+
+# Expected words for each optional section
+EXTRA_SECTION_WORDS = {"assessment": 60, "hook": 60, "fast_finishers": 80, "cheat_sheet": 220}
+
+# (min, max) of each numeric generate() parameter, shared by the widgets and the HTTP API
+PARAM_BOUNDS = {"weeks": (1, 10)}
+
+
+def unit_budget(weeks, extras):
+    """max_tokens for the core sections (the sequence grows with the weeks) plus the extras asked for."""
+    return output_budget(350 + 50 * weeks + sum(EXTRA_SECTION_WORDS[name] for name in extras))
+
+
+def unit_request(year, subject, topic, weeks, assessment=False, hook=False, fast_finishers=False, cheat_sheet=False):
+    """chat_completion_request arguments for a unit plan with the optional sections asked for."""
+    prompt_parts = [
+        f"A Year {year} {subject} unit on '{topic}'.",
+        f"The unit runs for approximately {weeks} weeks."
+    ]
+    extras = []
+    if assessment:
+        extras.append("assessment")
+        prompt_parts.append("Include 1–2 assessment ideas (format only, keep it brief).")
+    if hook:
+        extras.append("hook")
+        prompt_parts.append("Suggest 2–3 engaging Hook Ideas for Lesson 1.")
+    if fast_finishers:
+        extras.append("fast_finishers")
+        prompt_parts.append("Suggest Fast Finisher or Extension Task ideas.")
+    if cheat_sheet:
+        extras.append("cheat_sheet")
+        prompt_parts.append("Provide a Quick Content Cheat Sheet: 10 bullet-point facts a teacher should know to teach this unit.")
+
+    return UNIT_PROMPT.request(
+        " ".join(prompt_parts),
+        max_tokens=unit_budget(weeks, extras),
+        temperature=1.0,
+        tool="Unit Planner",
+        inputs={
+            "year": year, "subject": subject, "topic": topic, "weeks": weeks, "assessment": assessment,
+            "hook": hook, "fast_finishers": fast_finishers, "cheat_sheet": cheat_sheet,
+        }
+    )
+
+
+def generate(year, subject, topic, weeks=5, assessment=False, hook=False, fast_finishers=False, cheat_sheet=False):
+    """Headless generation: (text, export sections) of a unit plan."""
+    unit_plan = chat_completion_request(**unit_request(
+        year, subject, topic, weeks, assessment, hook, fast_finishers, cheat_sheet
+    ))
+    return unit_plan, text_sections(clean_export_text(unit_plan))
+
+
+# How many of a unit pack's generations run at once
+UNIT_PACK_CONCURRENCY = int(os.environ.get("SIDEKICK_UNIT_PACK_CONCURRENCY", "6"))
+
+SEQUENCE_PROMPT = PromptTemplate(
+    UNIT_PROMPT.system,
+    "From the unit plan below, give the learning goal for each week's worksheet, in order. "
+    'Reply with a JSON object of the form {"weeks": [{"week": 1, "focus": "<one-sentence learning goal>"}]}.'
+)
+
+# The end-of-unit test's question mix (true/false, multiple choice, short answer, extended response)
+UNIT_TEST_MIX = (5, 5, 3, 1)
+WORKSHEET_QUESTIONS = 5
+WORKSHEET_PASSAGE_WORDS = 150
+
+
+def week_focuses(plan, topic, weeks):
+    """One learning goal per week of the plan, from one short request."""
+    reply = parse_reply(chat_completion_request(**SEQUENCE_PROMPT.request(
+        f"The unit runs for {weeks} weeks.\n\nUnit plan:\n{plan}",
+        max_tokens=output_budget(weeks * 30 + 10),
+        tool="Unit Planner",
+        response_format=JSON_FORMAT
+    )))
+    items = reply.get("weeks") if isinstance(reply.get("weeks"), list) else []
+    focuses = [field(item, "focus") for item in items][:weeks]
+    while len(focuses) < weeks:
+        focuses.append(f"{topic} (week {len(focuses) + 1})")
+    return focuses
+
+
+def unit_pack_nodes(plan, year, subject, topic, weeks, glossary=True, worksheets=True, test=True):
+    """
+    The pack's generations as a graph: the glossary and test need only the
+    plan, and each week's worksheet waits for the weekly sequence.
+    """
+    nodes = []
+    if glossary:
+        nodes.append(GraphNode("glossary", (), lambda results: chat_completion_request(
+            **glossary_request(year, subject, topic)
+        )))
+    if worksheets:
+        nodes.append(GraphNode("sequence", (), lambda results: week_focuses(plan, topic, weeks)))
+        for week in range(1, weeks + 1):
+            nodes.append(GraphNode(f"week {week}", ("sequence",), lambda results, week=week: worksheet_text(
+                parse_reply(chat_completion_request(**worksheet_request(
+                    year, results["sequence"][week - 1], WORKSHEET_QUESTIONS, WORKSHEET_PASSAGE_WORDS
+                )))
+            )))
+    if test:
+        nodes.append(GraphNode("test", (), lambda results: test_text(parse_reply(chat_completion_request(
+            **TEST_PROMPT.request(
+                test_details(year, subject, topic, *UNIT_TEST_MIX),
+                f"Cover the learning intentions of this unit plan:\n{plan}",
+                max_tokens=test_budget(*UNIT_TEST_MIX),
+                tool="Test Creator",
+                response_format=JSON_FORMAT
+            )
+        )))))
+    return nodes
+
+
+def unit_pack_heading(name, focuses):
+    if name == "glossary":
+        return "Unit Glossary"
+    if name == "test":
+        return "End-of-Unit Test"
+    week = int(name.split()[1])
+    return f"Week {week} Worksheet: {focuses[week - 1]}" if focuses else f"Week {week} Worksheet"
+
+
+def build_unit_pack(plan_entry, glossary, worksheets, test):
+    """
+    Run the pack's graph, showing each part as it finishes, and save the
+    plan plus every part that succeeded as one document.
+    """
+    inputs = plan_entry.inputs
+    nodes = unit_pack_nodes(
+        plan_entry.text, inputs["year"], inputs["subject"], inputs["topic"], inputs["weeks"],
+        glossary=glossary, worksheets=worksheets, test=test
+    )
+    parts = [node.name for node in nodes if node.name != "sequence"]
+    progress = st.progress(0.0, text=f"Building {len(parts)} parts at once...")
+    slots = {}
+    for name in parts:
+        slots[name] = st.empty()
+        slots[name].caption(f"Writing the {unit_pack_heading(name, None).lower()}...")
+
+    results = {}
+    focuses = None
+    for name, result, error in run_graph(nodes, max_workers=UNIT_PACK_CONCURRENCY):
+        if name == "sequence":
+            focuses = result
+            continue
+        results[name] = result
+        if error is not None:
+            slots[name].warning(f"⚠️ The {unit_pack_heading(name, None).lower()} could not be generated.")
+        else:
+            slots[name].caption(f"✅ {unit_pack_heading(name, focuses)}")
+        progress.progress(len(results) / len(parts), text=f"{len(results)} of {len(parts)} parts written")
+    progress.empty()
+
+    sections = [("Unit Plan", clean_export_text(plan_entry.text))] + [
+        (unit_pack_heading(name, focuses), clean_export_text(results[name])) for name in parts if results.get(name)
+    ]
+    if len(sections) == 1:
+        st.warning("⚠️ None of the unit pack could be generated. Please try again.")
+        return
+    text = "\n\n".join(f"### {heading}\n\n{body}" for heading, body in sections)
+    save_generation(
+        "Unit Pack",
+        plan_entry.title,
+        {**inputs, "plan_id": plan_entry.id, "glossary": glossary, "worksheets": worksheets, "test": test},
+        text,
+        sections
+    )
+
+
+def render():
+    st.header("📘 Unit Planner")
+    year = st.text_input("Grade Level (e.g. 7)", placeholder="Enter grade level here")
+    subject = st.text_input("Subject (e.g. HASS, English, Science)")
+    topic = st.text_input("Unit Topic or Focus (e.g. Ancient Egypt, Persuasive Writing)")
+    weeks = st.slider("Estimated Duration (Weeks)", *PARAM_BOUNDS["weeks"], 5)
+
+    include_assessment = st.checkbox("Include Assessment Suggestions?")
+    include_hook = st.checkbox("Include Hook Ideas for Lesson 1?")
+    include_fast_finishers = st.checkbox("Include Fast Finisher Suggestions?")
+    include_cheat_sheet = st.checkbox("Include Quick Content Cheat Sheet (for teacher)?")
+    background = st.checkbox(BACKGROUND_LABEL)
+
+    clicked = st.button("Generate Unit Plan")
+    if clicked and background:
+        submit_job(
+            "Unit Planner",
+            {"year": year, "subject": subject, "topic": topic, "weeks": weeks, "assessment": include_assessment,
+             "hook": include_hook, "fast_finishers": include_fast_finishers, "cheat_sheet": include_cheat_sheet},
+            f"Year {year} {subject}: {topic}"
+        )
+    elif clicked:
+        with st.spinner("Planning your unit..."):
+            try:
+                unit_plan = chat_completion_request(**unit_request(
+                    year, subject, topic, weeks,
+                    include_assessment, include_hook, include_fast_finishers, include_cheat_sheet
+                ))
+                # Saved to history so the plan doesn't reset on download clicks
+                save_generation(
+                    "Unit Planner",
+                    f"Year {year} {subject}: {topic}",
+                    {"year": year, "subject": subject, "topic": topic, "weeks": weeks},
+                    unit_plan,
+                    text_sections(clean_export_text(unit_plan))
+                )
+            except CompletionError:
+                st.warning("⚠️ Unit plan generation failed. Please try again.")
+    if show_job("Unit Planner"):
+        return
+
+    # If the unit plan is generated, show it and provide download options
+    previous = last_generation("Unit Planner")
+    if previous:
+        st.subheader("Your Generated Unit Plan")
+        display_output_block(previous.text)
+        st.markdown("---")
+        st.subheader("📄 Export Options")
+        export_buttons(previous.sections, "unit_plan")
+
+        st.markdown("---")
+        st.subheader("📦 Build the Whole Unit")
+        st.caption("Turn this plan into a glossary, a worksheet for each week and an end-of-unit test, in one document.")
+        with_glossary = st.checkbox("Unit glossary", value=True)
+        with_worksheets = st.checkbox(f"A worksheet for each of the {previous.inputs['weeks']} weeks", value=True)
+        with_test = st.checkbox("End-of-unit test", value=True)
+        if st.button("Build Unit Pack", disabled=not (with_glossary or with_worksheets or with_test)):
+            build_unit_pack(previous, with_glossary, with_worksheets, with_test)
+        pack = last_generation("Unit Pack")
+        if pack and pack.inputs.get("plan_id") == previous.id:
+            show_generation(pack, "unit_pack")
@@ -0,0 +1,45 @@
+"""Video Assistant: discussion questions and vocabulary for a class video."""
+import streamlit as st
+
+from sidekick.exports import clean_export_text, text_sections
+from sidekick.llm import chat_completion_request
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.ui import display_output_stream
+
+VIDEO_PROMPT = PromptTemplate(
+    "You are a creative educational content generator.",
+    "Generate the following based on the video description for the class below:\n"
+    "1. A few discussion starter questions\n"
+    "2. A list of key vocabulary words they might encounter along with a brief definition of each but dont repeat the word in the definition\n"
+    "3. Some thoughtful questions to promote deeper engagement"
+)
+
+
+def video_request(grade, description, **kwargs):
+    """chat_completion_request arguments for a video's questions and vocabulary."""
+    return VIDEO_PROMPT.request(
+        f"Class: Grade {grade}\n\nVideo description: {description}",
+        max_tokens=output_budget(300),
+        temperature=0.7,
+        tool="Video Assistant",
+        inputs={"grade": grade, "description": description},
+        **kwargs
+    )
+
+
+def generate(grade, description):
+    """Headless generation: (text, export sections) of content for a class video."""
+    content = chat_completion_request(**video_request(grade, description))
+    return content, text_sections(clean_export_text(content))
+
+
+def render():
+    st.header("🎥 Video Assistant")
+    grade = st.text_input("Grade Level (e.g. 7)", placeholder="Enter grade level here")
+    video_description = st.text_area("What is the video about? Provide a brief overview:")
+
+    
+    if st.button("Generate Content"):
+        with st.spinner("Generating video assistant content..."):
+            video_stream = chat_completion_request(**video_request(grade, video_description, stream=True))
+        display_output_stream(video_stream)
@@ -0,0 +1,210 @@
+"""Worksheet Generator: short answer and cloze worksheets."""
+import streamlit as st
+
+from sidekick.cloze import create_cloze, create_cloze_variants
+from sidekick.exports import class_set_writer, clean_export_text, text_sections
+from sidekick.llm import chat_completion_request
+from sidekick.prompts import PromptTemplate, output_budget
+from sidekick.structured import JSON_FORMAT, field, numbered, parse_reply
+from sidekick.ui import (
+    class_set_download,
+    class_set_options,
+    display_structured_stream,
+    export_buttons,
+    last_generation,
+    run_class_set,
+    save_generation,
+    show_generation,
+    version_heading,
+    version_instructions,
+)
+
+
+CLOZE_HEADER = "Information Passage:"
+
+# (min, max) of each numeric generate() parameter, shared by the widgets and the HTTP API
+PARAM_BOUNDS = {"num_questions": (3, 15), "passage_length": (50, 200), "num_blanks": (5, 20)}
+
+SYSTEM_MSG = "You are a creative teacher assistant who specializes in generating educational worksheets."
+
+# The reply shape asked of the model, so the passage, questions and answers never need recovering from prose
+WORKSHEET_JSON = (
+    'Reply with a JSON object of the form {"passage": "<the information passage>", '
+    '"questions": [{"question": "<question>", "answer": "<correct answer>"}]}. '
+    "Write plain text inside the strings, without markdown or numbering."
+)
+
+WORKSHEET_PROMPT = PromptTemplate(
+    SYSTEM_MSG,
+    "Write a student worksheet: an information passage followed by short answer questions about it, "
+    "each with its correct answer. Write the passage in full, without removing words or leaving blanks. "
+    + WORKSHEET_JSON
+)
+
+
+def worksheet_details(year, learning_goal, num_questions, passage_length):
+    return (
+        f"Year level: {year}\n"
+        f"Passage length: about {passage_length} words\n"
+        f"Number of questions: {num_questions}\n\n"
+        f"Based on this learning goal or lesson plan excerpt:\n{learning_goal}"
+    )
+
+
+def worksheet_budget(num_questions, passage_length):
+    """max_tokens for the passage plus each question and answer (about 40 words with its JSON)."""
+    return output_budget(passage_length + num_questions * 40 + 20)
+
+
+def worksheet_request(year, learning_goal, num_questions, passage_length, **kwargs):
+    """chat_completion_request arguments for a worksheet's structured reply."""
+    return WORKSHEET_PROMPT.request(
+        worksheet_details(year, learning_goal, num_questions, passage_length),
+        max_tokens=worksheet_budget(num_questions, passage_length),
+        temperature=0.7,
+        tool="Worksheet Generator",
+        response_format=JSON_FORMAT,
+        **kwargs
+    )
+
+
+def worksheet_text(reply):
+    """Printable worksheet from a (possibly still streaming) structured reply, answers at the bottom."""
+    parts = []
+    if reply.get("passage"):
+        parts.append(f"{CLOZE_HEADER}\n\n{field(reply, 'passage')}")
+    questions = reply.get("questions", [])
+    if questions:
+        parts.append(f"Questions:\n\n{numbered(questions, 'question')}")
+        parts.append(f"Answers:\n\n{numbered(questions, 'answer')}")
+    return "\n\n".join(parts)
+
+
+def assemble_cloze_worksheet(cloze_body, answer_list, questions_only, answers_only):
+    """Build the printable cloze worksheet from a blanked passage and the questions."""
+    cloze_passage = f"{CLOZE_HEADER}\n\n{cloze_body}".strip()
+
+    # Build cloze answer list
+    cloze_answers = "\n".join([f"{i+1}. {word}" for i, word in enumerate(answer_list)])
+
+    # Build final worksheet
+    worksheet = (
+        f"**Cloze Passage:**\n\n{cloze_passage}\n\n"
+        f"**Answer Key (Blanks):**\n\n{cloze_answers}\n\n"
+        f"{questions_only}"
+    )
+
+    if answers_only:
+        worksheet += f"\n\n**Short Answer Answers:**\n\n{answers_only}"
+    return worksheet.strip()
+
+
+def cloze_worksheet_text(reply, cloze):
+    """Printable cloze worksheet from a structured reply, given the (passage, answers) blanked from it."""
+    questions = reply.get("questions", [])
+    cloze_body, answer_list = cloze
+    return assemble_cloze_worksheet(
+        cloze_body,
+        answer_list,
+        numbered(questions, "question"),
+        numbered(questions, "answer")
+    )
+
+
+def generate(year, learning_goal, num_questions=5, passage_length=100, cloze=False, num_blanks=10):
+    """Headless generation: (text, export sections) of a worksheet, blanked locally when cloze is set."""
+    reply = parse_reply(chat_completion_request(**worksheet_request(year, learning_goal, num_questions, passage_length)))
+    if cloze:
+        worksheet = cloze_worksheet_text(reply, create_cloze(field(reply, "passage"), num_blanks=num_blanks))
+    else:
+        worksheet = worksheet_text(reply)
+    return worksheet, text_sections(clean_export_text(worksheet))
+
+
+def render():
+    st.header("📝 Worksheet Generator")
+
+    # Input fields
+    year = st.text_input("Grade Level (e.g. 7)", placeholder="Enter grade level here")
+    learning_goal = st.text_area("Enter a learning goal or paste a lesson plan excerpt", height=200)
+    num_questions = st.slider("Number of questions", *PARAM_BOUNDS["num_questions"], value=5, step=1)
+    low, high = PARAM_BOUNDS["passage_length"]
+    passage_length = st.slider(f"Desired word count for the information passage ({low}-{high})", low, high, value=100, step=10)
+
+    # Toggle cloze activity
+    cloze_activity = st.checkbox("Make the passage a cloze activity (fill-in-the-blank worksheet)")
+    if cloze_activity:
+        num_blanks = st.slider("Number of words to remove", *PARAM_BOUNDS["num_blanks"], value=10, step=1)
+
+    # Cloze class sets share one passage and vary the blanks; others vary the whole worksheet
+    class_set = class_set_options("worksheet")
+
+    if st.button("Generate Worksheet"):
+        request = worksheet_request(year, learning_goal, num_questions, passage_length)
+        if cloze_activity:
+            # Step 1: Generate base passage and questions from GPT; the blanks are made locally
+
+            if class_set:
+                # One passage, a different set of blanks for every version;
+                # support versions get fewer blanks and extension versions more
+                count, differentiate, bundle = class_set
+                with st.spinner("Generating cloze worksheet..."):
+                    reply = parse_reply(chat_completion_request(**request))
+                blank_counts = [max(1, round(num_blanks * scale)) for scale in (0.6, 1.0, 1.4)] if differentiate else num_blanks
+                writer = class_set_writer(bundle, "worksheet")
+                variants = create_cloze_variants(field(reply, "passage"), count, num_blanks=blank_counts)
+                for i, cloze in enumerate(variants):
+                    worksheet = cloze_worksheet_text(reply, cloze)
+                    writer.add(i, version_heading(i, differentiate), clean_export_text(worksheet))
+                class_set_download(writer.close(), bundle, "worksheet")
+                return
+
+            # The passage is blanked once, as soon as it arrives, and the questions fill in below it
+            blanked = {}
+
+            def to_text(reply):
+                passage = field(reply, "passage")
+                if passage not in blanked:
+                    blanked[passage] = create_cloze(passage, num_blanks=num_blanks)
+                return cloze_worksheet_text(reply, blanked[passage])
+
+            with st.spinner("Generating cloze worksheet..."):
+                worksheet_stream = chat_completion_request(stream=True, **request)
+            worksheet = to_text(display_structured_stream(worksheet_stream, to_text))
+
+        else:
+            # Regular worksheet
+            if class_set:
+                count, differentiate, bundle = class_set
+                requests = [
+                    {**request, "user_msg": request["user_msg"] + version_instructions(i, count, "worksheet", differentiate)}
+                    for i in range(count)
+                ]
+                headings = [version_heading(i, differentiate) for i in range(count)]
+                run_class_set(requests, headings, bundle, "worksheet", to_text=worksheet_text)
+                return
+
+            with st.spinner("Generating worksheet..."):
+                worksheet_stream = chat_completion_request(stream=True, **request)
+            worksheet = worksheet_text(display_structured_stream(worksheet_stream, worksheet_text))
+
+
+        inputs = {"year": year, "learning_goal": learning_goal, "num_questions": num_questions,
+                  "passage_length": passage_length, "cloze": cloze_activity}
+        save_generation(
+            "Worksheet Generator",
+            f"Year {year}: {learning_goal.strip()[:80]}",
+            inputs,
+            worksheet,
+            text_sections(clean_export_text(worksheet))
+        )
+
+        # ---- Export Options ----
+        st.subheader("Export Options")
+        st.write("Do you think your students will notice the answers at the bottom? :)")
+        export_buttons(text_sections(clean_export_text(worksheet)), "worksheet")
+    else:
+        # Coming back to the tool (or rerunning) redraws the last worksheet from history
+        previous = last_generation("Worksheet Generator")
+        if previous:
+            show_generation(previous, "worksheet")
@@ -0,0 +1,326 @@
+"""Output rendering helpers shared by the tool pages."""
+import hmac
+import os
+import time
+import uuid
+
+import streamlit as st
+
+from sidekick.blobstore import get_blob_store
+from sidekick.exports import MIME_TYPES, class_set_writer, clean_export_text, export_bytes, submit_export
+from sidekick.history import get_history
+from sidekick.jobs import DONE, FAILED, JOB_STALE_SECONDS, ensure_workers, get_job_queue
+from sidekick.llm import CompletionError, complete_many
+from sidekick.structured import iter_partial, parse_reply
+
+
+def current_session_id():
+    """Id of the Streamlit session running this script, or "anonymous" outside one."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "anonymous"
+
+
+def signed_in_email():
+    """The visitor's email when the app has Streamlit login configured and they are signed in, else None."""
+    return st.user.get("email") if hasattr(st, "user") else None
+
+
+def current_user_id():
+    """
+    Stable id for the visitor's generation history: their email when the app
+    has Streamlit login configured, otherwise an id kept in the page URL
+    (?u=...) so it survives reloads and bookmarks. The URL id is a bearer
+    secret: anyone given the link sees that history, so tools in
+    PRIVATE_TOOLS aren't saved under it.
+    """
+    email = signed_in_email()
+    if email:
+        return email
+    user_id = st.query_params.get("u")
+    if not user_id:
+        user_id = uuid.uuid4().hex
+        st.query_params["u"] = user_id
+    return user_id
+
+
+# Tools whose output quotes student work, only kept in history for signed-in visitors
+PRIVATE_TOOLS = {"Feedback Assistant"}
+
+
+def save_generation(tool, title, inputs, text, sections):
+    """
+    Add a finished output to the visitor's history and make it the tool's
+    last output for this session. Only the entry id goes into session_state.
+    Returns None, saving nothing, for a private tool without login.
+    """
+    if tool in PRIVATE_TOOLS and not signed_in_email():
+        return None
+    entry_id = get_history().add(current_user_id(), tool, title, inputs, text, sections)
+    st.session_state.setdefault("last_generation", {})[tool] = entry_id
+    return entry_id
+
+
+def last_generation(tool):
+    """This session's last output from tool, read back from history without an API call, or None."""
+    entry_id = st.session_state.get("last_generation", {}).get(tool)
+    return None if entry_id is None else get_history().get(current_user_id(), entry_id)
+
+
+BACKGROUND_LABEL = "Run in the background (keeps going if you switch tools or close the tab)"
+# Seconds between checks on a background job
+JOB_REFRESH_SECONDS = 2
+
+
+def submit_job(tool, params, title):
+    """
+    Queue the tool's generate(**params) as a background job for this visitor
+    and make it the tool's pending job for this session, replacing any earlier one.
+    """
+    from sidekick.tools import TOOL_MODULES
+
+    ensure_workers()
+    job_id = get_job_queue().submit(TOOL_MODULES[tool], params, current_user_id(), title)
+    st.session_state.setdefault("jobs", {})[tool] = job_id
+    return job_id
+
+
+@st.fragment(run_every=JOB_REFRESH_SECONDS)
+def _job_status(tool):
+    job_id = st.session_state.get("jobs", {}).get(tool)
+    job = None if job_id is None else get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.get("jobs", {}).pop(tool, None)
+        st.rerun(scope="app")
+    if job.status == DONE:
+        # The worker saves the output to history just after marking the job done
+        entry_id = get_job_queue().history_id(job_id, current_user_id())
+        if entry_id is not None or time.time() - job.finished_at > JOB_STALE_SECONDS:
+            st.session_state["jobs"].pop(tool)
+            if entry_id is not None:
+                st.session_state.setdefault("last_generation", {})[tool] = entry_id
+            st.rerun(scope="app")
+    if job.status == FAILED:
+        st.session_state["jobs"].pop(tool)
+        st.session_state.setdefault("job_errors", {})[tool] = job.error
+        st.rerun(scope="app")
+    waited = time.time() - (job.started_at or job.created_at)
+    state = "Generating" if job.started_at else "Waiting for a free worker"
+    st.info(f"⏳ {state}… ({waited:.0f}s). You can keep working or close the tab; it will be in My History.")
+
+
+def show_job(tool):
+    """
+    Draw the tool's pending background job, checking on it every few seconds
+    without rerunning the page. Returns True while a job is pending. When it
+    finishes, the page reruns and its output is the tool's last generation.
+    """
+    error = st.session_state.get("job_errors", {}).pop(tool, None)
+    if error:
+        st.error(f"⚠️ {error}")
+    if tool not in st.session_state.get("jobs", {}):
+        return False
+    _job_status(tool)
+    return True
+
+
+# Admin pages are listed for visitors who open the app with ?admin=<this key>
+ADMIN_KEY = os.environ.get("SIDEKICK_ADMIN_KEY")
+
+
+def admin_enabled():
+    """Whether this visitor opened the app with the admin key."""
+    supplied = st.query_params.get("admin")
+    return bool(ADMIN_KEY and supplied) and hmac.compare_digest(supplied, ADMIN_KEY)
+
+
+def queue_position_notice(slot):
+    """A scheduler on_wait callback that shows the queue position in slot."""
+    def notify(position):
+        if position:
+            slot.info(f"⏳ Lots of teachers are using Sidekick right now. You're number {position} in the queue...")
+        else:
+            slot.empty()
+    return notify
+
+
+def cached_answer_notice(slot):
+    """A cache listener that says in slot when a near-identical request's answer was reused."""
+    def notify(similarity):
+        slot.info(
+            f"♻️ Someone asked for almost exactly this before ({similarity:.0%} match), so here's that answer "
+            "straight away. Change your inputs a little for a fresh one."
+        )
+    return notify
+
+
+def display_output_block(text, container=None):
+    """
+    Render text in the white output block. Pass a container (e.g. an st.empty()
+    slot) to draw the block somewhere other than the current position.
+    """
+    target = container if container is not None else st
+    cleaned_text = text.strip().replace("*", "").replace("#", "")
+    html_text = cleaned_text.replace("\n", "<br>")  # Move this out of the f-string
+    target.markdown(
+        f"""
+        <div style='background-color: white; color: black; padding: 20px; 
+                    border-radius: 8px; font-family: sans-serif; 
+                    font-size: 16px; line-height: 1.6; white-space: pre-wrap; margin-left: 0;'>
+            {html_text}
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+
+def display_output_stream(deltas, container=None, refresh_seconds=0.1, draw=display_output_block):
+    """
+    Render streamed text deltas into the white output block (or with another
+    draw(text, container=...) function) as they arrive and return the full
+    text once the stream ends. Redraws are throttled so long outputs don't
+    re-render the block on every token.
+    """
+    slot = container if container is not None else st.empty()
+    parts = []
+    last_draw = 0.0
+    for delta in deltas:
+        parts.append(delta)
+        now = time.monotonic()
+        if now - last_draw >= refresh_seconds:
+            draw("".join(parts), container=slot)
+            last_draw = now
+    text = "".join(parts).strip()
+    draw(text, container=slot)
+    return text
+
+
+def display_structured_stream(deltas, to_text, container=None):
+    """
+    Render a streamed JSON reply into the white output block, redrawing
+    to_text(partial reply) each time a field or list item completes, and
+    return the whole reply object.
+    """
+    slot = container if container is not None else st.empty()
+    reply = {}
+    for reply in iter_partial(deltas):
+        display_output_block(to_text(reply), container=slot)
+    return reply
+
+
+EXPORT_LABELS = {
+    "docx": "📝 Download Word",
+    "pptx": "📊 Download PowerPoint",
+    "pdf": "📄 Download PDF",
+}
+
+
+def _deferred_export(kind, sections):
+    # Called by Streamlit only when the button is clicked, so the page never holds the file bytes
+    return lambda: export_bytes(kind, sections)
+
+
+def export_buttons(sections, basename, kinds=("docx", "pdf"), labels=None, key=None):
+    """
+    Draw a download button per export format. All formats start rendering
+    concurrently on the export pool straight away, but the bytes are only
+    fetched from the blob store when a button is clicked.
+    """
+    labels = {**EXPORT_LABELS, **(labels or {})}
+    for kind in kinds:
+        submit_export(kind, sections)
+    for column, kind in zip(st.columns(len(kinds)), kinds):
+        column.download_button(
+            label=labels[kind],
+            data=_deferred_export(kind, sections),
+            file_name=f"{basename}.{kind}",
+            mime=MIME_TYPES[kind],
+            key=f"{key or basename}_{kind}_download_btn"
+        )
+
+
+def show_generation(entry, basename, kinds=("docx", "pdf"), labels=None):
+    """Redraw a stored output with its export buttons."""
+    created = time.strftime("%d %b %Y, %H:%M", time.localtime(entry.created_at))
+    st.caption(f"🕘 {entry.title} · generated {created}")
+    display_output_block(entry.text)
+    export_buttons(entry.sections, basename, kinds=kinds, labels=labels, key=f"{basename}_{entry.id}")
+
+
+CLASS_SET_BUNDLES = {
+    "One Word document": "docx",
+    "Zip of Word documents": "zip",
+}
+DIFFICULTY_LEVELS = ["support (easier)", "core", "extension (harder)"]
+
+
+def class_set_options(noun):
+    """
+    Draw the class set controls. Returns (version count, mix difficulty, bundle)
+    when class set mode is on, otherwise None.
+    """
+    if not st.checkbox(f"Class set mode: generate several versions of the {noun} at once"):
+        return None
+    count = st.slider("Number of versions", min_value=2, max_value=30, value=5, step=1)
+    differentiate = st.checkbox("Mix difficulty across versions (support / core / extension)")
+    bundle = CLASS_SET_BUNDLES[st.radio("Download as", list(CLASS_SET_BUNDLES), horizontal=True)]
+    return count, differentiate, bundle
+
+
+def version_heading(index, differentiate):
+    heading = f"Version {index + 1}"
+    if differentiate:
+        heading += f" ({DIFFICULTY_LEVELS[index % len(DIFFICULTY_LEVELS)].split(' ')[0].title()})"
+    return heading
+
+
+def version_instructions(index, count, noun, differentiate):
+    """Prompt lines that make one version of a class set differ from the rest."""
+    text = (
+        f"\n\nThis is version {index + 1} of {count} of this {noun}. "
+        f"Write different content and questions from the other versions."
+    )
+    if differentiate:
+        text += f" Pitch this version at a {DIFFICULTY_LEVELS[index % len(DIFFICULTY_LEVELS)]} level."
+    return text
+
+
+def run_class_set(requests, headings, bundle, basename, to_text=None):
+    """
+    Generate every version concurrently, writing each into the bundle as soon
+    as it finishes, then offer the bundle for download. For structured
+    requests, to_text turns each parsed reply into the version's text.
+    """
+    writer = class_set_writer(bundle, basename)
+    status = st.empty()
+    progress = st.progress(0.0)
+    failed = []
+    for done, (index, text, error) in enumerate(complete_many(requests), 1):
+        if error is None and to_text is not None:
+            try:
+                text = to_text(parse_reply(text))
+            except CompletionError as parse_error:
+                error = parse_error
+        if error is None:
+            writer.add(index, headings[index], clean_export_text(text))
+        else:
+            writer.skip(index)
+            failed.append(index + 1)
+        progress.progress(done / len(requests))
+        status.caption(f"{done} of {len(requests)} versions ready")
+    if failed:
+        st.warning(f"⚠️ Version(s) {', '.join(map(str, sorted(failed)))} could not be generated and were left out.")
+    class_set_download(writer.close(), bundle, basename)
+
+
+def class_set_download(data, bundle, basename):
+    # The bundle waits in the blob store rather than in the page until it is clicked
+    key = get_blob_store().put(data, session_id=current_session_id())
+    st.download_button(
+        label="📦 Download Class Set",
+        data=lambda: get_blob_store().get(key),
+        file_name=f"{basename}_class_set.{bundle}",
+        mime=MIME_TYPES[bundle],
+        key=f"{basename}_class_set_download_btn"
+    )
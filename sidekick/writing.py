@@ -0,0 +1,238 @@
+"""
+Local writing checks for the Feedback Assistant.
+
+These run before the model is called, so the model only writes the Star and 2
+Wishes commentary instead of finding and bolding every error itself. The
+text is tokenised once into words (with their spans) and sentences, then
+checked for doubled words ("the the"), content words overused within a
+short stretch, sentences that keep opening with the same word, sentence
+length, and spelling against an Australian English word list. The list
+(SIDEKICK_DICTIONARY, or the en_AU Hunspell dictionary when one is
+installed) is loaded once per process into a set; a plain list of words or
+a Hunspell .dic file will do. Without one the spelling check is skipped,
+the report says so and the Feedback Assistant asks the model about spelling
+instead: the system's US list (/usr/share/dict/words) is deliberately not
+used, as it would flag "colour" and "organise". Australian spellings are
+also accepted where a list only has the US form. Every finding is a span
+of the text, and highlight() merges them into one **bold** copy.
+"""
+import collections
+import os
+import re
+import threading
+
+from sidekick.cloze import STOPWORDS
+
+# Where Debian/Ubuntu's hunspell-en-au and myspell-en-au packages put the en_AU list
+AU_DICTIONARIES = ("/usr/share/hunspell/en_AU.dic", "/usr/share/myspell/en_AU.dic")
+DICTIONARY_PATH = os.environ.get("SIDEKICK_DICTIONARY") or next(
+    (path for path in AU_DICTIONARIES if os.path.exists(path)), None
+)
+
+WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+SENTENCE_PATTERN = re.compile(r"[^.!?\n]+[.!?]*")
+
+# A content word used this many times within REPEAT_WINDOW words is overused
+REPEAT_MIN = 3
+REPEAT_WINDOW = 60
+# Sentences longer than this are flagged as possible run-ons
+LONG_SENTENCE_WORDS = 35
+# An opener used by this many sentences, or by two in a row, is flagged
+OPENER_MIN = 3
+# Inflections tried when a word isn't in the list itself: (suffix, replacement)
+SUFFIXES = (
+    ("'s", ""), ("s'", "s"), ("ies", "y"), ("es", ""), ("s", ""), ("ied", "y"), ("ed", ""), ("ed", "e"),
+    ("ing", ""), ("ing", "e"), ("ly", ""), ("er", ""), ("er", "e"), ("est", ""), ("est", "e"),
+)
+# Australian spellings rewritten to their US forms, tried when a word isn't in the list as spelt
+US_SPELLINGS = tuple((re.compile(pattern), replacement) for pattern, replacement in (
+    # colour, behaviour, favourite, honourable
+    (r"our(?=(s|ed|ing|ful|ite|ites|able|er|ers|ist|ists|less)?$)", "or"),
+    # organise, realised, organisation
+    (r"is(?=(e|es|ed|ing|er|ers|ation|ations)$)", "iz"),
+    # analyse, paralysed
+    (r"ys(?=(e|es|ed|ing)$)", "yz"),
+    # centre, theatres
+    (r"tre(?=s?$)", "ter"),
+    # catalogue, dialogues
+    (r"ogue(?=s?$)", "og"),
+    # travelled, modelling
+    (r"([aeiou][bcdfgklmnprstvz]*[aeiou])ll(?=(ed|ing|er|ers)$)", r"\1l"),
+    # defence, licence
+    (r"([fc])ence(?=s?$)", r"\1ense"),
+))
+
+WritingAnalysis = collections.namedtuple(
+    "WritingAnalysis",
+    "words sentences average_length longest long_sentences misspellings doubled overused openers spans"
+)
+
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+
+def read_word_list(lines):
+    """
+    Lower-case words from a plain word list or a Hunspell .dic file (a count
+    on the first line, then "word/FLAGS" entries, which are kept as stems).
+    """
+    words = set()
+    for line in lines:
+        word = line.split("/", 1)[0].strip()
+        if word and not word.isdigit():
+            words.add(word.split()[0].lower())
+    return frozenset(words)
+
+
+def load_dictionary(path=None):
+    """The lower-case word list as a set, loaded on first use; None when there isn't one."""
+    global _dictionary
+    with _dictionary_lock:
+        if _dictionary is None:
+            _dictionary = False
+            if path or DICTIONARY_PATH:
+                try:
+                    with open(path or DICTIONARY_PATH, encoding="utf-8", errors="ignore") as words:
+                        _dictionary = read_word_list(words)
+                except OSError:
+                    pass
+        return _dictionary or None
+
+
+def _known_form(word, dictionary):
+    if word in dictionary:
+        return True
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            stem = word[:-len(suffix)] + replacement
+            # "running" -> "run"
+            if stem in dictionary or (len(stem) > 2 and stem[-1] == stem[-2] and stem[:-1] in dictionary):
+                return True
+    return False
+
+
+def known_word(word, dictionary):
+    """True if word, a simple inflection of it, or its US spelling is in the dictionary."""
+    word = word.lower()
+    if _known_form(word, dictionary):
+        return True
+    us_word = word
+    for pattern, replacement in US_SPELLINGS:
+        us_word = pattern.sub(replacement, us_word)
+    return us_word != word and _known_form(us_word, dictionary)
+
+
+def analyse_writing(text, dictionary=None):
+    """Findings for text as a WritingAnalysis; pass a word set to use instead of load_dictionary()."""
+    dictionary = dictionary if dictionary is not None else load_dictionary()
+    words = [(match.group(0), match.span()) for match in WORD_PATTERN.finditer(text)]
+    spans = []
+
+    doubled = []
+    for (previous, _), (word, span) in zip(words, words[1:]):
+        if word.lower() == previous.lower() and word.lower() not in {"had", "that"}:
+            doubled.append(word.lower())
+            spans.append(span)
+
+    # Each further use of a content word within the window of its last use
+    overused = collections.Counter()
+    recent = collections.defaultdict(list)
+    for position, (word, span) in enumerate(words):
+        key = word.lower()
+        if key in STOPWORDS or len(key) <= 3:
+            continue
+        uses = [used for used in recent[key] if position - used[0] <= REPEAT_WINDOW] + [(position, span)]
+        recent[key] = uses
+        if len(uses) >= REPEAT_MIN:
+            overused[key] = max(overused[key], len(uses))
+            spans.extend(used_span for _, used_span in uses[1:])
+
+    # (sentence, its words); every word falls inside exactly one sentence match
+    sentences = []
+    position = 0
+    for match in SENTENCE_PATTERN.finditer(text):
+        first = position
+        while position < len(words) and words[position][1][0] < match.end():
+            position += 1
+        if position > first:
+            sentences.append((match.group(0).strip(), words[first:position]))
+    lengths = [len(sentence_words) for _, sentence_words in sentences]
+    long_sentences = [sentence for sentence, sentence_words in sentences if len(sentence_words) > LONG_SENTENCE_WORDS]
+
+    opener_counts = collections.Counter(sentence_words[0][0].lower() for _, sentence_words in sentences)
+    openers = {}
+    for i, (_, sentence_words) in enumerate(sentences):
+        opener = sentence_words[0][0].lower()
+        follows = i > 0 and sentences[i - 1][1][0][0].lower() == opener
+        if opener_counts[opener] >= OPENER_MIN or follows:
+            openers[opener] = opener_counts[opener]
+    for _, sentence_words in sentences:
+        if sentence_words[0][0].lower() in openers:
+            spans.append(sentence_words[0][1])
+
+    misspellings = []
+    if dictionary:
+        sentence_starts = {sentence_words[0][1] for _, sentence_words in sentences}
+        for word, span in words:
+            # Capitalised words mid-sentence are names, and all-caps words are acronyms
+            if (word.isupper() and len(word) > 1) or (word[0].isupper() and span not in sentence_starts):
+                continue
+            if not known_word(word, dictionary):
+                spans.append(span)
+                if word.lower() not in misspellings:
+                    misspellings.append(word.lower())
+
+    return WritingAnalysis(
+        words=len(words),
+        sentences=len(sentences),
+        average_length=sum(lengths) / len(lengths) if lengths else 0.0,
+        longest=max(lengths, default=0),
+        long_sentences=long_sentences,
+        misspellings=misspellings if dictionary else None,
+        doubled=doubled,
+        overused=dict(overused.most_common()),
+        openers=openers,
+        spans=spans,
+    )
+
+
+def highlight(text, spans):
+    """text with every span (overlapping or touching ones merged) wrapped in **bold**."""
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    pieces = []
+    last = 0
+    for start, end in merged:
+        pieces.append(text[last:start])
+        pieces.append(f"**{text[start:end]}**")
+        last = end
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def writing_report(analysis):
+    """The findings as short lines, for the teacher and for the model's commentary prompt."""
+    lines = [
+        f"- {analysis.words} words in {analysis.sentences} sentences, "
+        f"{analysis.average_length:.1f} words per sentence on average (longest {analysis.longest})."
+    ]
+    if analysis.long_sentences:
+        lines.append(f"- {len(analysis.long_sentences)} sentence(s) over {LONG_SENTENCE_WORDS} words: possible run-ons.")
+    if analysis.misspellings is None:
+        lines.append("- Spelling was not checked automatically (no Australian English word list is installed).")
+    elif analysis.misspellings:
+        lines.append(f"- Possible spelling errors: {', '.join(analysis.misspellings)}.")
+    if analysis.doubled:
+        lines.append(f"- Doubled words: {', '.join(f'{word} {word}' for word in analysis.doubled)}.")
+    if analysis.overused:
+        lines.append("- Repeated words: " + ", ".join(f"{word} ×{count}" for word, count in analysis.overused.items()) + ".")
+    if analysis.openers:
+        lines.append(
+            "- Sentences starting the same way: "
+            + ", ".join(f"{opener.capitalize()} ×{count}" for opener, count in analysis.openers.items()) + "."
+        )
+    return "\n".join(lines)
@@ -0,0 +1,57 @@
+import pytest
+
+from sidekick.api import check_request
+
+TEST = {"year": "7", "subject": "Science", "topic": "Volcanoes"}
+
+
+def test_valid_request():
+    tool, params, exports = check_request({"tool": "test_creator", "params": {**TEST, "true_false": 5}, "exports": ["docx"]})
+    assert (tool, params, exports) == ("test_creator", {**TEST, "true_false": 5}, ["docx"])
+
+
+def test_defaults_for_params_and_exports():
+    assert check_request({"tool": "feeling_peckish", "params": {"dish": "soup"}}) == ("feeling_peckish", {"dish": "soup"}, [])
+
+
+@pytest.mark.parametrize("item, message", [
+    ("test_creator", "JSON object"),
+    ({"tool": "nope"}, "Unknown tool"),
+    ({"tool": "test_creator", "params": [1]}, "params must be"),
+    ({"tool": "test_creator", "params": TEST, "exports": ["exe"]}, "exports must be"),
+    ({"tool": "test_creator", "params": {"year": "7"}}, "missing"),
+    ({"tool": "test_creator", "params": {**TEST, "colour": "red"}}, "unexpected"),
+])
+def test_malformed_requests(item, message):
+    with pytest.raises(ValueError, match=message):
+        check_request(item)
+
+
+@pytest.mark.parametrize("name, value, message", [
+    ("true_false", "3", "a whole number"),
+    ("true_false", True, "a whole number"),
+    ("true_false", 2.5, "a whole number"),
+    ("mix_difficulty", 1, "true or false"),
+])
+def test_param_types(name, value, message):
+    with pytest.raises(ValueError, match=message):
+        check_request({"tool": "test_creator", "params": {**TEST, name: value}})
+
+
+@pytest.mark.parametrize("tool, params", [
+    ("test_creator", {**TEST, "true_false": 21}),
+    ("test_creator", {**TEST, "short_answer": -1}),
+    ("test_creator", {**TEST, "extended_response": 3}),
+    ("unit_planner", {**TEST, "weeks": 0}),
+    ("lesson_builder", {**TEST, "duration": 121}),
+    ("lesson_builder", {**TEST, "lessons": 0}),
+    ("worksheet_generator", {"year": "7", "learning_goal": "Cells", "num_questions": 100}),
+])
+def test_params_outside_the_widget_limits(tool, params):
+    with pytest.raises(ValueError, match="must be between"):
+        check_request({"tool": tool, "params": params})
+
+
+def test_params_at_the_widget_limits():
+    check_request({"tool": "test_creator", "params": {**TEST, "true_false": 20, "extended_response": 0}})
+    check_request({"tool": "worksheet_generator", "params": {"year": "7", "learning_goal": "Cells", "passage_length": 50}})
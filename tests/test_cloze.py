@@ -0,0 +1,51 @@
+import random
+
+from sidekick.cloze import BLANK, ClozePassage, create_cloze, create_cloze_variants
+
+PASSAGE = (
+    "Volcanoes form where magma rises through cracks in the crust. When pressure builds, "
+    "magma erupts as lava, ash and gas. Lava cools into igneous rock, and volcanoes "
+    "slowly grow taller with every eruption."
+)
+
+
+def fill(text, answers_in_order):
+    for answer in answers_in_order:
+        text = text.replace(BLANK, answer, 1)
+    return text
+
+
+def test_candidates_skip_stopwords_and_short_words():
+    passage = ClozePassage(PASSAGE)
+    assert "Volcanoes" in passage.candidates
+    assert "magma" in passage.candidates
+    assert not {"the", "in", "as", "and", "ash", "gas"} & set(passage.candidates)
+    # Each word is a candidate once, at its first occurrence
+    assert passage.candidates.count("magma") == 1
+
+
+def test_blank_removes_first_occurrence_of_each_answer():
+    passage = ClozePassage(PASSAGE)
+    text, answers = passage.blank(4, random.Random(1))
+    assert len(answers) == 4
+    assert text.count(BLANK) == 4
+    blanked = sorted(answers, key=lambda word: passage.first_index[word])
+    assert fill(text, blanked) == PASSAGE
+
+
+def test_more_blanks_than_candidates():
+    text, answers = create_cloze("Photosynthesis needs sunlight.", num_blanks=10)
+    assert sorted(answers) == ["Photosynthesis", "needs", "sunlight"]
+    assert text == f"{BLANK} {BLANK} {BLANK}."
+
+
+def test_variants_are_reproducible_and_differ():
+    first = create_cloze_variants(PASSAGE, 4, num_blanks=3, seed=7)
+    assert first == create_cloze_variants(PASSAGE, 4, num_blanks=3, seed=7)
+    assert len({text for text, _ in first}) > 1
+
+
+def test_variants_cycle_blank_counts():
+    variants = create_cloze_variants(PASSAGE, 4, num_blanks=[2, 5], seed=3)
+    assert [len(answers) for _, answers in variants] == [2, 5, 2, 5]
+    assert [text.count(BLANK) for text, _ in variants] == [2, 5, 2, 5]
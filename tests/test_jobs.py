@@ -0,0 +1,77 @@
+import pytest
+
+from sidekick import history, jobs
+from sidekick.jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+PARAMS = {"year": "7", "subject": "Science", "topic": "Volcanoes", "true_false": 2}
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "_history", history.GenerationHistory(str(tmp_path / "history.sqlite3")))
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_identical_jobs_are_deduplicated(queue):
+    first = queue.submit("test_creator", PARAMS, "alice", "Volcano test")
+    assert queue.submit("test_creator", dict(PARAMS), "bob", "Bob's test") == first
+    assert queue.submit("test_creator", {**PARAMS, "true_false": 3}, "alice", "Another") != first
+    assert queue.stats() == {QUEUED: 2}
+
+
+def test_claim_takes_the_oldest_queued_job_once(queue):
+    first = queue.submit("test_creator", PARAMS, "alice", "First")
+    second = queue.submit("unit_planner", {"year": "7", "subject": "HASS", "topic": "Egypt"}, "alice", "Second")
+    assert queue.claim("w1") == (first, "test_creator", PARAMS)
+    assert queue.claim("w2")[0] == second
+    assert queue.claim("w3") is None
+    job = queue.get(first)
+    assert (job.status, job.attempts) == (RUNNING, 1)
+
+
+def test_finish_saves_to_every_subscriber_once(queue):
+    job_id = queue.submit("test_creator", PARAMS, "alice", "Volcano test")
+    queue.submit("test_creator", PARAMS, "bob", "Bob's test")
+    queue.claim("w1")
+    queue.finish(job_id, "w1", "Test Creator", PARAMS, "the test", [("Test", "the test")])
+    assert queue.get(job_id).status == DONE
+    assert queue.result(job_id) == ("the test", [("Test", "the test")])
+    saved = history.get_history().get("bob", queue.history_id(job_id, "bob"))
+    assert (saved.title, saved.text) == ("Bob's test", "the test")
+    assert queue.history_id(job_id, "alice") is not None
+    # A finished job takes new submissions as a fresh job
+    assert queue.submit("test_creator", PARAMS, "carol", "Carol's test") != job_id
+
+
+def test_stale_job_is_retried_and_its_old_worker_ignored(queue, monkeypatch):
+    job_id = queue.submit("test_creator", PARAMS, "alice", "Volcano test")
+    queue.claim("w1")
+    # Every running job now counts as stale
+    monkeypatch.setattr(jobs, "JOB_STALE_SECONDS", -1)
+    assert queue.claim("w2")[0] == job_id
+    assert queue.get(job_id).attempts == 2
+    # The first worker turning up late can't finish the job or save it twice
+    queue.finish(job_id, "w1", "Test Creator", PARAMS, "late", [("Test", "late")])
+    assert queue.get(job_id).status == RUNNING
+    queue.finish(job_id, "w2", "Test Creator", PARAMS, "on time", [("Test", "on time")])
+    assert queue.result(job_id)[0] == "on time"
+
+
+def test_job_fails_after_max_attempts(queue, monkeypatch):
+    job_id = queue.submit("test_creator", PARAMS, "alice", "Volcano test")
+    monkeypatch.setattr(jobs, "JOB_STALE_SECONDS", -1)
+    for attempt in range(jobs.JOB_MAX_ATTEMPTS):
+        assert queue.claim(f"w{attempt}")[0] == job_id
+    assert queue.claim("last") is None
+    job = queue.get(job_id)
+    assert (job.status, job.attempts) == (FAILED, jobs.JOB_MAX_ATTEMPTS)
+    assert "interrupted" in job.error
+
+
+def test_fail_records_the_error(queue):
+    job_id = queue.submit("test_creator", PARAMS, "alice", "Volcano test")
+    queue.claim("w1")
+    queue.fail(job_id, "w1", "No API key")
+    job = queue.get(job_id)
+    assert (job.status, job.error) == (FAILED, "No API key")
+    assert queue.result(job_id) is None
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from sidekick.scheduler import BACKGROUND, INTERACTIVE, Scheduler, SharedBudget, WindowBudget
+
+
+class GateBudget:
+    """Admits nothing until opened, then everything, recording who got in and in what order."""
+
+    def __init__(self):
+        self.open = False
+        self.admitted = []
+
+    def admit(self, tokens):
+        if not self.open:
+            return 0.01
+        self.admitted.append(threading.current_thread().name)
+        return 0.0
+
+    def pause(self, seconds):
+        pass
+
+    def usage(self):
+        return len(self.admitted), 0
+
+
+def queue_up(scheduler, requests):
+    """Start an acquire() per (name, session, priority), each queued before the next starts."""
+    threads = []
+    for name, session_id, priority in requests:
+        thread = threading.Thread(target=scheduler.acquire, args=(session_id, priority), kwargs={"timeout": 5}, name=name)
+        thread.start()
+        threads.append(thread)
+        deadline = time.monotonic() + 2
+        while scheduler.stats()["waiting"] < len(threads):
+            assert time.monotonic() < deadline, f"{name} was never queued"
+            time.sleep(0.005)
+    return threads
+
+
+def test_sessions_take_turns_and_interactive_goes_first():
+    budget = GateBudget()
+    scheduler = Scheduler(budget=budget)
+    threads = queue_up(scheduler, [
+        ("boost", "c", BACKGROUND),
+        ("a1", "a", INTERACTIVE), ("a2", "a", INTERACTIVE), ("a3", "a", INTERACTIVE),
+        ("b1", "b", INTERACTIVE), ("b2", "b", INTERACTIVE),
+    ])
+    budget.open = True
+    for thread in threads:
+        thread.join(5)
+    assert budget.admitted == ["a1", "b1", "a2", "b2", "a3", "boost"]
+    assert scheduler.stats()["waiting"] == 0
+
+
+def test_on_wait_reports_place_in_line_then_admission():
+    budget = GateBudget()
+    scheduler = Scheduler(budget=budget)
+    threads = queue_up(scheduler, [("first", "a", INTERACTIVE)])
+    positions = []
+    waiter = threading.Thread(
+        target=scheduler.acquire, args=("b",), kwargs={"timeout": 5, "on_wait": positions.append}
+    )
+    waiter.start()
+    deadline = time.monotonic() + 2
+    while not positions:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+    budget.open = True
+    for thread in threads + [waiter]:
+        thread.join(5)
+    assert positions[0] == 2
+    assert positions[-1] == 0
+
+
+def test_full_window_times_out():
+    scheduler = Scheduler(requests_per_minute=2, tokens_per_minute=1000)
+    scheduler.acquire("a")
+    scheduler.acquire("a")
+    with pytest.raises(TimeoutError):
+        scheduler.acquire("b", timeout=0.05)
+    assert scheduler.stats() == {"waiting": 0, "requests_last_minute": 2, "tokens_last_minute": 0}
+
+
+def test_token_budget():
+    budget = WindowBudget(requests_per_minute=100, tokens_per_minute=1000)
+    # A request bigger than the whole budget still goes through on an empty window
+    assert budget.admit(5000) == 0
+    assert budget.admit(1) > 0
+
+
+def test_throttle_pauses_admissions():
+    scheduler = Scheduler(requests_per_minute=100, tokens_per_minute=1000)
+    scheduler.throttle(0.2)
+    start = time.monotonic()
+    scheduler.acquire("a", timeout=2)
+    assert time.monotonic() - start >= 0.15
+
+
+def test_shared_budget_is_spent_once_across_schedulers(tmp_path):
+    # Two schedulers on one file, as the app and a job worker would be
+    path = str(tmp_path / "scheduler.sqlite3")
+    app = Scheduler(budget=SharedBudget(path, requests_per_minute=3, tokens_per_minute=1000))
+    worker = Scheduler(budget=SharedBudget(path, requests_per_minute=3, tokens_per_minute=1000))
+    app.acquire("a", tokens=100)
+    worker.acquire("b", tokens=100)
+    app.acquire("a", tokens=100)
+    with pytest.raises(TimeoutError):
+        worker.acquire("b", timeout=0.05)
+    assert worker.stats()["requests_last_minute"] == 3
+    assert worker.stats()["tokens_last_minute"] == 300
+
+
+def test_shared_throttle_pauses_every_scheduler(tmp_path):
+    path = str(tmp_path / "scheduler.sqlite3")
+    app = Scheduler(budget=SharedBudget(path))
+    worker = Scheduler(budget=SharedBudget(path))
+    app.throttle(0.2)
+    start = time.monotonic()
+    worker.acquire("b", timeout=2)
+    assert time.monotonic() - start >= 0.15
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from sidekick.llm import CompletionError
+from sidekick.structured import IncrementalJSONParser, iter_partial, parse_reply
+
+REPLY = {
+    "passage": 'Lava is "molten" rock {not solid}.',
+    "questions": [
+        {"question": "What is lava?", "answer": "Molten rock"},
+        {"question": "Is it solid?", "answer": "No"},
+    ],
+    "count": 2,
+    "cloze": False,
+}
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_iter_partial_fills_in_then_yields_the_whole_reply(size):
+    snapshots = [json.loads(json.dumps(partial)) for partial in iter_partial(chunks(json.dumps(REPLY), size))]
+    assert snapshots[-1] == REPLY
+    if size == 1:
+        # One snapshot per completed field or list item, then the whole reply
+        assert snapshots[:-1] == [
+            {"passage": REPLY["passage"]},
+            {"passage": REPLY["passage"], "questions": REPLY["questions"][:1]},
+            {"passage": REPLY["passage"], "questions": REPLY["questions"][:2]},
+            {"passage": REPLY["passage"], "questions": REPLY["questions"]},
+            {"passage": REPLY["passage"], "questions": REPLY["questions"], "count": 2},
+            {"passage": REPLY["passage"], "questions": REPLY["questions"], "count": 2, "cloze": False},
+        ]
+
+
+def test_text_around_the_object_is_ignored():
+    text = "```json\n" + json.dumps(REPLY, indent=2) + "\n```"
+    assert parse_reply(text) == REPLY
+
+
+def test_truncated_reply_raises():
+    text = json.dumps(REPLY)[:-20]
+    partials = iter_partial(chunks(text, 5))
+    with pytest.raises(CompletionError):
+        for _ in partials:
+            pass
+
+
+def test_reply_without_an_object_raises():
+    with pytest.raises(CompletionError):
+        parse_reply("Sorry, I can't help with that.")
+
+
+def test_parser_reports_paths_down_to_emit_depth():
+    parser = IncrementalJSONParser(emit_depth=1)
+    events = parser.feed('{"a": [1, 2], "b": {"c": 3}}')
+    assert events == [(("a",), [1, 2]), (("b",), {"c": 3})]
+    assert parser.done